@@ -0,0 +1,276 @@
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from matplotlib.backend_bases import MouseEvent
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+from excel_plot.excel_plot import ExcelPlotUi, ExcelPlotUiMini
+from excel_plot.dtype_policy import DtypePolicy, data_nbytes
+from excel_plot.file_cache import FileCache
+from excel_plot.file_loader import load_data_file
+from example_data_generation import write_data_file
+
+# resource只在类Unix系统上可用, 不可用时不统计峰值内存
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+
+"""
+性能基准测试: 生成不同行数和列数的数据文件, 测量读取文件, 首次绘制及平移/缩放/点选的耗时和峰值内存, 结果以JSON输出
+    python benchmark.py --rows 10000 1000000 10000000 --cols 5 50 500 -o result.json
+    python benchmark.py --rows 10000 1000000 --cols 5 50 --baseline result.json
+每组参数在单独的子进程中运行, 峰值内存互不影响; 交互事件在Agg后端下直接调用mouse_toggle_event
+"""
+
+def peak_memory_mib() -> float:
+    """
+    当前进程的峰值常驻内存, 单位MiB
+    """
+    if not RESOURCE_AVAILABLE:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS单位为字节, Linux为KiB
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+def latency_stats(samples: list[float]) -> dict:
+    """
+    统计单次事件耗时, 单位ms
+    """
+    samples = np.asarray(samples) * 1000.0
+    if len(samples) == 0:
+        return {}
+    return {
+        'mean_ms': round(float(np.mean(samples)), 3),
+        'p50_ms': round(float(np.percentile(samples, 50)), 3),
+        'p95_ms': round(float(np.percentile(samples, 95)), 3),
+        'max_ms': round(float(np.max(samples)), 3),
+    }
+
+def benchmark_layout(columns: list[str]) -> dict:
+    """
+    第一列为横轴, 其余数值列两两一组组成最多3幅子图
+    """
+    y_columns = [name for name in columns[1:] if name != 'extra_info'][:6]
+    return {
+        'title': 'Benchmark',
+        'x': columns[0],
+        'cursor_info': [name for name in (columns[0], 'extra_info') if name in columns],
+        'subplots': [
+            {'name': f'Subplot{i // 2}', 'curves': [{'column': name} for name in y_columns[i:i + 2]]}
+            for i in range(0, len(y_columns), 2)
+        ],
+    }
+
+def mouse_event(figure, name: str, x_data: float, y_data: float, button, **kwargs) -> MouseEvent:
+    """
+    按数据坐标构造鼠标事件
+    """
+    x, y = figure.plot_ax.transData.transform((x_data, y_data))
+    return MouseEvent(name, figure.fig.canvas, x, y, button=button, **kwargs)
+
+def dispatch(figure, event: MouseEvent) -> float:
+    """
+    把事件交给mouse_toggle_event处理, Agg后端的定时器不会触发, 手动执行调度器中的任务, 返回耗时
+    """
+    start_time = time.perf_counter()
+    figure.mouse_toggle_event(event)
+    if figure.scheduler is not None:
+        figure.scheduler.flush()
+    return time.perf_counter() - start_time
+
+def interaction_latency(figure, event_num: int) -> dict:
+    """
+    依次模拟右键拖动平移, 滚轮缩放和左键点选曲线, 统计每个事件的耗时
+    """
+    x_min, x_max = figure.plot_ax.get_xlim()
+    y_min, y_max = figure.plot_ax.get_ylim()
+    x_mid, y_mid = (x_min + x_max) / 2.0, (y_min + y_max) / 2.0
+
+    # 平移, 拖动按像素移动, 与真实拖动一样每个事件的数据坐标由当前显示范围换算
+    canvas = figure.fig.canvas
+    x_pixel, y_pixel = figure.plot_ax.transData.transform((x_mid, y_mid))
+    pixel_step = figure.plot_ax.bbox.width / (4.0 * max(event_num, 1))
+    dispatch(figure, MouseEvent('button_press_event', canvas, x_pixel, y_pixel, button=3))
+    pan = [dispatch(figure, MouseEvent('motion_notify_event', canvas, x_pixel - (i + 1) * pixel_step, y_pixel, button=3)) for i in range(event_num)]
+    dispatch(figure, MouseEvent('button_release_event', canvas, x_pixel - event_num * pixel_step, y_pixel, button=3))
+
+    # 缩放, 先放大再缩小回原范围
+    zoom = []
+    for i in range(event_num):
+        x_min, x_max = figure.plot_ax.get_xlim()
+        x_mid, y_mid = (x_min + x_max) / 2.0, sum(figure.plot_ax.get_ylim()) / 2.0
+        button = 'up' if i < event_num // 2 else 'down'
+        zoom.append(dispatch(figure, mouse_event(figure, 'scroll_event', x_mid, y_mid, button, step=1)))
+    if figure.blit_manager is not None:
+        figure.blit_manager.end_interaction() # 滚轮结束定时器不会触发
+    figure.fig.canvas.draw()
+
+    # 点选可见范围内均匀分布的样本
+    click = []
+    curve = next((curve for curve in figure.curves if curve.visible), None)
+    if curve is not None and len(curve.x_axis_data) > 0:
+        x_min, x_max = figure.plot_ax.get_xlim()
+        targets = np.searchsorted(curve.x_axis_data, np.linspace(x_min, x_max, event_num + 2)[1:-1]) if curve.x_sorted else []
+        for index in np.clip(targets, 0, len(curve.x_axis_data) - 1):
+            x_data, y_data = curve.x_axis_data[index], curve.y_axis_data[index]
+            click.append(dispatch(figure, mouse_event(figure, 'button_press_event', x_data, y_data, 1)))
+            dispatch(figure, mouse_event(figure, 'button_release_event', x_data, y_data, 1))
+    return {'pan': latency_stats(pan), 'zoom': latency_stats(zoom), 'click': latency_stats(click)}
+
+def run_case(file_path: str, row_num: int, column_num: int, event_num: int) -> dict:
+    """
+    测量单个数据文件, 在子进程中运行
+    """
+    plt.rcParams['figure.figsize'] = (18, 9)
+    warnings.filterwarnings('ignore', message='.*non-interactive.*') # Agg后端下plt.show的提示
+    result = {'rows': row_num, 'cols': column_num, 'file_mib': round(os.path.getsize(file_path) / 2**20, 2)}
+    # 被测代码的打印信息输出到stderr, stdout只输出JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        # 读取文件: 直接解析, 首次写入缓存, 命中缓存
+        start_time = time.perf_counter()
+        data_frame = load_data_file(file_path, cache=None, dtype_policy=DtypePolicy())
+        result['open_parse_s'] = round(time.perf_counter() - start_time, 4)
+        result['data_mib'] = round(data_nbytes(data_frame) / 2**20, 2)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = FileCache(cache_dir)
+            start_time = time.perf_counter()
+            load_data_file(file_path, cache=cache, dtype_policy=DtypePolicy())
+            result['open_cache_write_s'] = round(time.perf_counter() - start_time, 4)
+            start_time = time.perf_counter()
+            load_data_file(file_path, cache=cache, dtype_policy=DtypePolicy())
+            result['open_cached_s'] = round(time.perf_counter() - start_time, 4)
+
+        # ExcelPlotUi首次绘制及交互
+        layout = benchmark_layout(list(data_frame.columns))
+        excel_plot_ui = ExcelPlotUi('Benchmark')
+        start_time = time.perf_counter()
+        excel_plot_ui.add_layout(layout, data_frame)
+        excel_plot_ui.plot(suptitle=layout['title'], x_axis_data=data_frame[layout['x']])
+        excel_plot_ui.fig.canvas.draw()
+        result['ui_first_draw_s'] = round(time.perf_counter() - start_time, 4)
+        result['ui_events'] = interaction_latency(excel_plot_ui.subplots[0], event_num)
+        plt.close(excel_plot_ui.fig)
+
+        # ExcelPlotUiMini后台读取, 首次绘制及交互
+        fig = plt.figure('Benchmark')
+        excel_plot_ui_mini = ExcelPlotUiMini('Benchmark', fig)
+        excel_plot_ui_mini.file_cache = None
+        start_time = time.perf_counter()
+        excel_plot_ui_mini.open_file(file_path)
+        while excel_plot_ui_mini.loader is not None:
+            time.sleep(0.005)
+            excel_plot_ui_mini.poll_loading()
+        result['mini_open_s'] = round(time.perf_counter() - start_time, 4)
+        start_time = time.perf_counter()
+        excel_plot_ui_mini.checkbuttons_toggle_event(layout['x'])
+        for curve_layout in layout['subplots'][0]['curves']:
+            excel_plot_ui_mini.checkbuttons_toggle_event(curve_layout['column'])
+        fig.canvas.draw()
+        result['mini_first_draw_s'] = round(time.perf_counter() - start_time, 4)
+        result['mini_events'] = interaction_latency(excel_plot_ui_mini, event_num)
+        plt.close(fig)
+
+    result['peak_rss_mib'] = round(peak_memory_mib(), 1) if RESOURCE_AVAILABLE else None
+    return result
+
+def flatten(result: dict, prefix: str = '') -> dict:
+    """
+    把嵌套的结果展开为{'ui_events.pan.p50_ms': 值}的形式, 用于和基准结果比较
+    """
+    flat = {}
+    for key, value in result.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f'{prefix}{key}.'))
+        elif isinstance(value, (int, float)) and key not in ('rows', 'cols'):
+            flat[f'{prefix}{key}'] = value
+    return flat
+
+def compare(results: list[dict], baseline: list[dict], threshold: float) -> list[str]:
+    """
+    和基准结果比较耗时及内存, 返回超过基准threshold倍的指标
+    """
+    regressions = []
+    baseline_cases = {(case['rows'], case['cols']): flatten(case) for case in baseline}
+    for case in results:
+        old = baseline_cases.get((case['rows'], case['cols']))
+        if old is None:
+            continue
+        for key, value in flatten(case).items():
+            if key in ('file_mib', 'data_mib') or not old.get(key) or value is None:
+                continue
+            ratio = value / old[key]
+            if ratio > threshold:
+                regressions.append(f"rows={case['rows']} cols={case['cols']} {key}: {old[key]} -> {value} ({ratio:.2f}x)")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark file loading, drawing and interaction latency')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000], help='row numbers, 10k to 50M')
+    parser.add_argument('--cols', type=int, nargs='+', default=[5, 50], help='column numbers, 5 to 500')
+    parser.add_argument('--events', type=int, default=50, help='number of events per interaction')
+    parser.add_argument('--data-dir', default=None, help='directory of generated data files, reused between runs')
+    parser.add_argument('-o', '--output', default=None, help='JSON output file, default stdout')
+    parser.add_argument('--baseline', default=None, help='JSON result of a previous run to compare with')
+    parser.add_argument('--threshold', type=float, default=1.25, help='ratio to baseline reported as regression')
+    args = parser.parse_args()
+
+    temp_dir = None
+    data_dir = args.data_dir
+    if data_dir is None:
+        temp_dir = tempfile.TemporaryDirectory()
+        data_dir = temp_dir.name
+    os.makedirs(data_dir, exist_ok=True)
+
+    results = []
+    for row_num in args.rows:
+        for column_num in args.cols:
+            file_path = os.path.join(data_dir, f'benchmark_{row_num}x{column_num}.csv')
+            if not os.path.exists(file_path):
+                print(f"Generating {file_path}", file=sys.stderr)
+                write_data_file(file_path, row_num, column_num)
+            print(f"Benchmarking rows={row_num} cols={column_num}", file=sys.stderr)
+            # 每组参数使用新的子进程, 峰值内存只包含本组
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+                results.append(executor.submit(run_case, file_path, row_num, column_num, args.events).result())
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'matplotlib': matplotlib.__version__,
+        'cases': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output is None:
+        print(text)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text)
+    if temp_dir is not None:
+        temp_dir.cleanup()
+
+    if args.baseline is not None:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            regressions = compare(results, json.load(file)['cases'], args.threshold)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+if __name__ == '__main__':
+    main()
@@ -1,58 +1,73 @@
+import argparse
 import numpy as np
 import pandas as pd
 
-time = np.linspace(0, 10, 500)
-
-t_list = []
-s1_list = []
-s2_list = []
-v1_list = []
-v2_list = []
-a1_list = []
-a2_list = []
-extra_info_lit = []
-
-s1 = 0
-s2 = 0
-a1 = 0.1
-a2 = 0.2
-v1 = 0
-v2 = 0
-dt = (10 - 0) / 500
-
-# 生成示例数据, 两个匀加速直线运动物体的运动状态
-for t in time:
-    dv1 = a1 * dt
-    dv2 = a2 * dt
-    s1_dot = (v1 + 0.5 * dv1)
-    s2_dot = (v2 + 0.5 * dv2)
-    v1 = v1 + dv1
-    v2 = v2 + dv2
-    s1 = s1 + s1_dot * dt
-    s2 = s2 + s2_dot * dt
-    t_list.append(round(t, 2))
-    s1_list.append(round(s1, 2))
-    s2_list.append(round(s2, 2))
-    v1_list.append(round(v1, 2))
-    v2_list.append(round(v2, 2))
-    a1_list.append(round(a1, 2))
-    a2_list.append(round(a2, 2))
-    extra_info_lit.append(f"info{round(t, 2)}")
-
-# 创建dataframe
-data = pd.DataFrame({
-    'time': t_list,
-    's1': s1_list,
-    's2': s2_list,
-    'v1': v1_list,
-    'v2': v2_list,
-    'a1': a1_list,
-    'a2': a2_list,
-    'extra_info': extra_info_lit
-})
-
-# 保存数据文件
-data.to_csv('example_data.txt', index=False)
-data.to_excel('example_data.xlsx', index=False)
-
-print('Data saved to example_data.csv')
\ No newline at end of file
+BASE_COLUMNS = ['time', 's1', 's2', 'v1', 'v2', 'a1', 'a2', 'extra_info']
+EXCEL_MAX_ROWS = 1048575
+
+def generate_data(row_num: int = 500, column_num: int = 8, start: int = 0, stop: int = None, duration: float = None, seed: int = 0) -> pd.DataFrame:
+    """
+    生成示例数据, 两个匀加速直线运动物体的运动状态
+    column_num不足8列时只保留前几列, 超过8列时追加正弦加噪声的通道ch0, ch1...
+    start, stop为生成的行范围, 用于分块生成大文件, 各块的时间连续; duration为总时长, 默认每行0.02s
+    """
+    stop = row_num if stop is None else stop
+    duration = row_num * 0.02 if duration is None else duration
+    a1 = 0.1
+    a2 = 0.2
+    dt = duration / row_num
+
+    # 按匀加速运动公式直接计算第k行的速度和位移, 不逐行累加, 与累加结果只差浮点舍入
+    k = np.arange(start, stop)
+    time = k * (duration / max(row_num - 1, 1))
+    if stop == row_num and row_num > 1:
+        time[-1] = duration # 与np.linspace一致, 末尾时间精确等于总时长
+    step_time = (k + 1) * dt
+    columns = {
+        'time': np.round(time, 2),
+        's1': np.round(0.5 * a1 * step_time**2, 2),
+        's2': np.round(0.5 * a2 * step_time**2, 2),
+        'v1': np.round(a1 * step_time, 2),
+        'v2': np.round(a2 * step_time, 2),
+        'a1': np.full(len(k), a1),
+        'a2': np.full(len(k), a2),
+        'extra_info': None,
+    }
+    names = BASE_COLUMNS[:column_num]
+    if 'extra_info' in names:
+        columns['extra_info'] = 'info' + pd.Series(columns['time']).astype(str)
+    data = pd.DataFrame({name: columns[name] for name in names})
+
+    # 附加通道, 每个通道的频率和相位不同
+    rng = np.random.default_rng([seed, start])
+    for i in range(column_num - len(BASE_COLUMNS)):
+        frequency = 0.05 * (i % 20 + 1)
+        phase = 0.1 * i
+        data[f'ch{i}'] = np.round(np.sin(2 * np.pi * frequency * time + phase) + 0.1 * rng.standard_normal(len(k)), 4)
+    return data
+
+def write_data_file(file_path: str, row_num: int = 500, column_num: int = 8, chunk_rows: int = 1_000_000, duration: float = None) -> None:
+    """
+    分块生成并写入CSV数据文件, 生成千万行以上的文件时内存占用只与chunk_rows有关
+    """
+    for start in range(0, max(row_num, 1), chunk_rows):
+        data = generate_data(row_num, column_num, start, min(start + chunk_rows, row_num), duration)
+        data.to_csv(file_path, index=False, mode='w' if start == 0 else 'a', header=start == 0)
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate example data files')
+    parser.add_argument('--rows', type=int, default=500, help='number of rows')
+    parser.add_argument('--cols', type=int, default=8, help='number of columns')
+    parser.add_argument('-o', '--output', default='example_data.txt', help='CSV output file')
+    parser.add_argument('--excel', default='example_data.xlsx', help='Excel output file, empty to skip')
+    args = parser.parse_args()
+
+    # 保存数据文件
+    write_data_file(args.output, args.rows, args.cols)
+    print(f'Data saved to {args.output}')
+    if args.excel and args.rows <= EXCEL_MAX_ROWS:
+        generate_data(args.rows, args.cols).to_excel(args.excel, index=False)
+        print(f'Data saved to {args.excel}')
+
+if __name__ == '__main__':
+    main()
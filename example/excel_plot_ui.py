@@ -11,7 +11,7 @@ def main():
 
     # 创建Ui并读取数据
     excel_plot_ui = ExcelPlotUi(TOOL_VERSION)
-    data_frame = excel_plot_ui.open_file()
+    data_frame = excel_plot_ui.open_file(usecols=['time', 's1', 's2', 'v1', 'v2', 'a1', 'a2', 'extra_info'], x_label='time')
 
     # 鼠标点击标签上显示的信息
     cursor_info = CursorInfo()
@@ -0,0 +1,18 @@
+import os
+import sys
+import matplotlib.pyplot as plt
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+from excel_plot.excel_plot import ExcelPlotUi
+
+TOOL_VERSION = "DEBUG_PLOT_TOOL 241020"
+LAYOUT_PATH = os.path.join(os.path.dirname(__file__), 'excel_plot_layout.json')
+
+def main():
+    plt.rcParams['toolbar'] = 'None'
+
+    # 子图, 曲线及标签信息均由布局文件描述, 只读取布局中用到的列
+    excel_plot_ui = ExcelPlotUi(TOOL_VERSION)
+    excel_plot_ui.plot_layout(LAYOUT_PATH)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+# 批量导出相关模块
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import matplotlib.figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from .decimation import is_sorted, minmax_decimate
+from .dtype_policy import DtypePolicy
+from .file_cache import FileCache
+from .file_loader import load_data_file
+from .layout import LayoutError, check_layout, load_layout, layout_columns, layout_frame
+from .ticks import NiceTickLocator, NiceTickFormatter
+
+def render_figure(data_frame, layout: dict, size: tuple[float, float] = (18, 9), dpi: int = 100) -> matplotlib.figure.Figure:
+    """
+    按布局把所有子图纵向排列绘制到不依赖GUI的Agg画布上, 曲线按像素宽度做min/max降采样
+    """
+    fig = matplotlib.figure.Figure(figsize=size, dpi=dpi)
+    FigureCanvasAgg(fig)
+    fig.suptitle(layout.get('title', ''))
+    x_axis_data = np.asarray(data_frame[layout['x']])
+    x_sorted = is_sorted(x_axis_data)
+
+    subplot_num = len(layout['subplots'])
+    shared_ax = None
+    for i, subplot in enumerate(layout['subplots']):
+        plot_ax = fig.add_subplot(subplot_num, 1, i + 1, sharex=shared_ax)
+        shared_ax = shared_ax or plot_ax
+        pixel_width = max(int(plot_ax.bbox.width), 1)
+        for curve in subplot['curves']:
+            y_axis_data = np.asarray(data_frame[curve['column']])
+            if x_sorted and len(y_axis_data) > 0:
+                display_index = minmax_decimate(y_axis_data, 0, len(y_axis_data), pixel_width)
+                x_data, y_data = x_axis_data[display_index], y_axis_data[display_index]
+            else:
+                x_data, y_data = x_axis_data, y_axis_data
+            plot_ax.plot(
+                x_data,
+                y_data,
+                label=curve.get('label', curve['column']),
+                color=curve.get('color'),
+                visible=curve.get('visible', True),
+            )
+        plot_ax.set_title(subplot.get('name', ''), fontsize=10, loc='left')
+        plot_ax.legend(fontsize=8)
+        plot_ax.grid()
+        plot_ax.tick_params(axis='x', rotation=20)
+        plot_ax.xaxis.set_major_locator(NiceTickLocator())
+        plot_ax.xaxis.set_major_formatter(NiceTickFormatter())
+    if len(x_axis_data) > 0:
+        shared_ax.set_xlim(np.nanmin(x_axis_data), np.nanmax(x_axis_data))
+    fig.tight_layout()
+    return fig
+
+def output_stems(file_paths: list[str]) -> dict[str, str]:
+    """
+    各数据文件导出图片的文件名(不含扩展名), 默认为数据文件名, 保证各文件的图片不会互相覆盖
+    文件名相同(如run1/log.csv和run2/log.csv)时改用相对于公共目录的路径, 仍相同(只有扩展名不同)时保留扩展名
+    再有重名时依次加上序号, 比较时不区分大小写
+    """
+    stems = {file_path: os.path.splitext(os.path.basename(file_path))[0] for file_path in file_paths}
+    groups: dict[str, list[str]] = {}
+    for file_path, stem in stems.items():
+        groups.setdefault(stem.lower(), []).append(file_path)
+    for group in groups.values():
+        if len(group) < 2:
+            continue
+        abs_paths = [os.path.abspath(file_path) for file_path in group]
+        common_dir = os.path.commonpath([os.path.dirname(abs_path) for abs_path in abs_paths])
+        relative_paths = [os.path.relpath(abs_path, common_dir) for abs_path in abs_paths]
+        names = [os.path.splitext(relative_path)[0] for relative_path in relative_paths]
+        if len({name.lower() for name in names}) < len(names):
+            names = relative_paths
+        for file_path, name in zip(group, names):
+            stems[file_path] = name.replace(os.sep, '_').replace('/', '_')
+
+    used = set()
+    for file_path in file_paths:
+        stem = candidate = stems[file_path]
+        index = 1
+        while candidate.lower() in used:
+            candidate = f'{stem}_{index}'
+            index += 1
+        used.add(candidate.lower())
+        stems[file_path] = candidate
+    return stems
+
+def render_file(
+    file_path: str,
+    layout: dict,
+    output_dir: str,
+    formats: tuple[str] = ('png',),
+    size: tuple[float, float] = (18, 9),
+    dpi: int = 100,
+    use_cache: bool = False,
+    output_stem: str = None
+) -> list[str]:
+    """
+    读取单个数据文件并按布局导出图片, 返回导出的文件路径, 作为进程池的任务在子进程中运行
+    output_stem为导出图片的文件名(不含扩展名), 为None时使用数据文件名
+    """
+    data_frame = load_data_file(
+        file_path,
+        usecols=layout_columns(layout, include_cursor_info=False),
+        cache=FileCache() if use_cache else None,
+        dtype_policy=DtypePolicy(keep_columns=[layout['x']]) # 横轴保持读取时的类型
+    )
+    fig = render_figure(layout_frame(layout, data_frame), layout, size, dpi)
+    if output_stem is None:
+        output_stem = os.path.splitext(os.path.basename(file_path))[0]
+    output_paths = []
+    for file_format in formats:
+        output_path = os.path.join(output_dir, f'{output_stem}.{file_format}')
+        fig.savefig(output_path, format=file_format)
+        output_paths.append(output_path)
+    return output_paths
+
+def export_files(
+    file_paths: list[str],
+    layout: dict,
+    output_dir: str,
+    formats: tuple[str] = ('png',),
+    workers: int = None,
+    size: tuple[float, float] = (18, 9),
+    dpi: int = 100,
+    use_cache: bool = False
+) -> dict:
+    """
+    批量导出, 各文件分配到进程池并行绘制, workers为进程数, 为None时使用CPU核数, 为1时在当前进程依次导出
+    单个文件失败时打印错误并继续, 返回{文件路径: 导出的图片路径列表或异常}
+    同名的数据文件按output_stems导出为不同的图片文件名, 重复给出的文件只导出一次
+    """
+    check_layout(layout)
+    os.makedirs(output_dir, exist_ok=True)
+    file_paths = list(dict.fromkeys(file_paths))
+    stems = output_stems(file_paths)
+    results = {}
+    if workers == 1:
+        for file_path in file_paths:
+            try:
+                results[file_path] = render_file(file_path, layout, output_dir, formats, size, dpi, use_cache, stems[file_path])
+            except Exception as e:
+                results[file_path] = e
+            report_result(file_path, results[file_path], len(results), len(file_paths))
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(render_file, file_path, layout, output_dir, formats, size, dpi, use_cache, stems[file_path]): file_path
+            for file_path in file_paths
+        }
+        for future in as_completed(futures):
+            file_path = futures[future]
+            try:
+                results[file_path] = future.result()
+            except Exception as e:
+                results[file_path] = e
+            report_result(file_path, results[file_path], len(results), len(file_paths))
+    return results
+
+def report_result(file_path: str, result, finished_num: int, file_num: int) -> None:
+    """
+    在终端打印单个文件的导出结果
+    """
+    if isinstance(result, Exception):
+        print(f"[{finished_num}/{file_num}] Export {file_path} failed: {result}!")
+    else:
+        print(f"[{finished_num}/{file_num}] Export {file_path} -> {', '.join(result)}")
+
+def main(argv: list[str] = None) -> int:
+    """
+    命令行入口: python -m excel_plot.batch_export --layout layout.json -o output data1.csv data2.csv
+    """
+    parser = argparse.ArgumentParser(description='Export plots of data files without GUI')
+    parser.add_argument('files', nargs='+', help='data files to export')
+    parser.add_argument('--layout', required=True, help='layout file, JSON/YAML/TOML')
+    parser.add_argument('-o', '--output-dir', default='.', help='output directory')
+    parser.add_argument('-f', '--format', dest='formats', action='append', help='image format, png/svg/pdf, can be repeated')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='number of worker processes, default CPU count')
+    parser.add_argument('--width', type=float, default=18, help='figure width in inches')
+    parser.add_argument('--height', type=float, default=9, help='figure height in inches')
+    parser.add_argument('--dpi', type=int, default=100, help='figure dpi')
+    parser.add_argument('--cache', action='store_true', help='use the binary file cache')
+    args = parser.parse_args(argv)
+
+    try:
+        layout = load_layout(args.layout)
+    except LayoutError as e:
+        print(f"Read layout failed: {e}!")
+        return 1
+    results = export_files(
+        args.files,
+        layout,
+        args.output_dir,
+        formats=tuple(args.formats or ['png']),
+        workers=args.workers,
+        size=(args.width, args.height),
+        dpi=args.dpi,
+        use_cache=args.cache
+    )
+    failed_num = sum(isinstance(result, Exception) for result in results.values())
+    print(f"Exported {len(results) - failed_num} files, {failed_num} failed")
+    return 1 if failed_num > 0 else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+# 画布局部刷新相关模块
+import matplotlib.artist
+import matplotlib.axes
+import matplotlib.backend_bases
+import matplotlib.figure
+from .profiler import PHASE_RENDER, profile_span
+
+class BlitManager:
+    """
+    画布局部刷新(blit)管理类
+    静态图层(按键, 复选框, 标题等)在完整重绘后缓存为背景, 交互过程中只重绘曲线坐标轴和时间竖线等动态元素
+    后端不支持blit时退化为draw_idle完整重绘
+    """
+    def __init__(self, fig: matplotlib.figure.Figure, enabled: bool = True, scroll_end_interval: int = 300) -> None:
+        """
+        初始化成员变量, 绑定画布重绘事件
+        """
+        self.fig = fig
+        self.canvas = fig.canvas
+        self.enabled = enabled and self.canvas.supports_blit
+        self.background = None # 缓存的静态背景
+
+        self.interactive_axes: list[matplotlib.axes.Axes] = []        # 平移缩放时需要重绘的坐标轴
+        self.animated_artists: list[matplotlib.artist.Artist] = []    # 常驻的动态元素, 如时间竖线
+        self.interacting = False
+        self.redraw_pending = False # 已请求完整重绘但尚未执行, 期间背景已过期
+        self.profiler = None        # 开启性能记录时记录每次局部刷新的耗时
+
+        # 滚轮没有结束事件, 最后一次滚动后延时结束交互
+        self.scroll_end_interval = scroll_end_interval
+        self.scroll_end_timer = None
+
+        self.draw_cid = self.canvas.mpl_connect('draw_event', self.on_draw)
+
+    def add_axes(self, ax: matplotlib.axes.Axes) -> None:
+        """
+        登记交互时需要重绘的坐标轴
+        """
+        if ax not in self.interactive_axes:
+            self.interactive_axes.append(ax)
+
+    def add_artist(self, artist: matplotlib.artist.Artist) -> None:
+        """
+        登记动态元素, 动态元素不参与完整重绘, 每次刷新时单独绘制
+        """
+        if not self.enabled:
+            return
+        artist.set_animated(True)
+        self.animated_artists.append(artist)
+
+    def remove_artist(self, artist: matplotlib.artist.Artist) -> None:
+        """
+        注销动态元素
+        """
+        if artist in self.animated_artists:
+            self.animated_artists.remove(artist)
+            artist.set_animated(False)
+
+    def on_draw(self, event: matplotlib.backend_bases.DrawEvent) -> None:
+        """
+        完整重绘后缓存背景, 并在背景之上补画动态元素
+        """
+        if not self.enabled:
+            return
+        self.redraw_pending = False
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.draw_animated()
+
+    def draw_animated(self) -> None:
+        """
+        绘制所有动态元素, 交互期间坐标轴也作为动态元素绘制
+        """
+        if self.interacting:
+            for ax in self.interactive_axes:
+                if ax.get_visible():
+                    self.fig.draw_artist(ax)
+        for artist in self.animated_artists:
+            if artist.figure is not None and artist.get_visible():
+                self.fig.draw_artist(artist)
+
+    def begin_interaction(self) -> None:
+        """
+        开始平移缩放, 把坐标轴设为动态元素并重绘一次得到不含坐标轴的静态背景
+        """
+        if not self.enabled or self.interacting:
+            return
+        self.interacting = True
+        for ax in self.interactive_axes:
+            ax.set_animated(True)
+        self.canvas.draw()
+
+    def end_interaction(self) -> None:
+        """
+        结束平移缩放, 坐标轴恢复为静态元素并完整重绘
+        """
+        if self.scroll_end_timer is not None:
+            self.scroll_end_timer.stop()
+        if not self.interacting:
+            return
+        self.interacting = False
+        for ax in self.interactive_axes:
+            ax.set_animated(False)
+        self.redraw_pending = True
+        self.canvas.draw_idle()
+
+    def scroll_interaction(self) -> None:
+        """
+        滚轮缩放时开始交互, 停止滚动一段时间后自动结束
+        """
+        if not self.enabled:
+            return
+        self.begin_interaction()
+        if self.scroll_end_timer is None:
+            self.scroll_end_timer = self.canvas.new_timer(interval=self.scroll_end_interval)
+            self.scroll_end_timer.single_shot = True
+            self.scroll_end_timer.add_callback(self.end_interaction)
+        self.scroll_end_timer.stop()
+        self.scroll_end_timer.start()
+
+    def update(self) -> None:
+        """
+        刷新画布: 恢复静态背景, 重绘动态元素, 只拷贝变化的像素到屏幕
+        """
+        if self.redraw_pending:
+            return
+        if not self.enabled or self.background is None:
+            self.canvas.draw_idle()
+            return
+        with profile_span(self.profiler, 'blit', PHASE_RENDER):
+            self.canvas.restore_region(self.background)
+            self.draw_animated()
+            self.canvas.blit(self.fig.bbox)
+            self.canvas.flush_events()
@@ -0,0 +1,152 @@
+# 多文件对比相关模块
+import os
+import numpy as np
+from .decimation import is_sorted
+
+ALIGN_NONE = 'none'         # 使用原始横轴
+ALIGN_OFFSET = 'offset'     # 各文件横轴减去各自的偏移, 默认偏移为首个样本, 各次运行从0开始对齐
+ALIGN_RESAMPLE = 'resample' # 按偏移对齐后插值到同一条等间隔横轴上
+
+def run_names(file_paths: list[str]) -> list[str]:
+    """
+    各文件在图例中显示的名称, 文件名重复时加上序号
+    """
+    names = [os.path.splitext(os.path.basename(file_path))[0] for file_path in file_paths]
+    return [f'{name}#{i}' if names.count(name) > 1 else name for i, name in enumerate(names)]
+
+class RunSet:
+    """
+    多个数据文件(每个文件为一次运行)的对比数据, 按对齐方式提供各次运行的横轴和纵轴
+    不重采样时纵轴直接使用原始数据的列, 不复制; 同一次运行的横轴只计算一次, 由该运行的所有曲线共用;
+    重采样时所有运行共用同一条横轴, 纵轴按需插值并缓存
+    """
+    def __init__(self, file_paths: list[str], data_frames: list, align: str = ALIGN_OFFSET, offsets: list[float] = None, max_samples: int = None) -> None:
+        """
+        初始化成员变量, offsets为各次运行的横轴偏移, 为None时取各自横轴的第一个有效值
+        max_samples为重采样横轴的最大点数, 为None时不超过最长一次运行的样本数
+        """
+        self.file_paths = list(file_paths)
+        self.data_frames = list(data_frames)
+        self.names = run_names(self.file_paths)
+        self.align = align
+        self.offsets = offsets
+        self.max_samples = max_samples
+        # 所有文件都包含的列, 按第一个文件的列顺序
+        self.columns = [name for name in self.data_frames[0].columns if all(name in data_frame.columns for data_frame in self.data_frames[1:])]
+        self.x_cache: dict[tuple[int, str], np.ndarray] = {}
+        self.x_sorted_cache: dict[tuple[int, str], bool] = {}
+        self.y_cache: dict[tuple[int, str, str], np.ndarray] = {}
+        self.time_base_cache: dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.data_frames)
+
+    def offset(self, run_index: int, x_label: str) -> float:
+        """
+        第run_index次运行的横轴偏移
+        """
+        if self.align == ALIGN_NONE:
+            return 0.0
+        if self.offsets is not None:
+            return self.offsets[run_index]
+        raw_x = np.asarray(self.data_frames[run_index][x_label])
+        finite = np.flatnonzero(np.isfinite(raw_x[:4096])) if len(raw_x) > 0 else []
+        if len(finite) > 0:
+            return float(raw_x[finite[0]])
+        return float(np.nanmin(raw_x)) if len(raw_x) > 0 else 0.0
+
+    def aligned_x(self, run_index: int, x_label: str) -> np.ndarray:
+        """
+        按偏移对齐后的横轴, 偏移为0时直接使用原始列
+        """
+        key = (run_index, x_label)
+        if key not in self.x_cache:
+            raw_x = np.asarray(self.data_frames[run_index][x_label])
+            offset = self.offset(run_index, x_label)
+            self.x_cache[key] = raw_x if offset == 0.0 else raw_x - offset
+        return self.x_cache[key]
+
+    def x(self, run_index: int, x_label: str) -> np.ndarray:
+        """
+        第run_index次运行绘制用的横轴
+        """
+        if self.align == ALIGN_RESAMPLE:
+            return self.time_base(x_label)
+        return self.aligned_x(run_index, x_label)
+
+    def x_sorted(self, run_index: int, x_label: str) -> bool:
+        """
+        第run_index次运行绘制用的横轴是否单调, 每次运行只判断一次
+        """
+        return self.align == ALIGN_RESAMPLE or self.aligned_x_sorted(run_index, x_label)
+
+    def aligned_x_sorted(self, run_index: int, x_label: str) -> bool:
+        """
+        按偏移对齐后(未重采样)的横轴是否单调
+        """
+        key = (run_index, x_label)
+        if key not in self.x_sorted_cache:
+            self.x_sorted_cache[key] = is_sorted(self.aligned_x(run_index, x_label))
+        return self.x_sorted_cache[key]
+
+    def x_limits(self, x_label: str) -> tuple[float, float]:
+        """
+        所有运行横轴的范围
+        """
+        limits = [(np.nanmin(x), np.nanmax(x)) for x in (self.x(i, x_label) for i in range(len(self))) if len(x) > 0]
+        if len(limits) == 0:
+            return 0.0, 1.0
+        return min(limit[0] for limit in limits), max(limit[1] for limit in limits)
+
+    def time_base(self, x_label: str) -> np.ndarray:
+        """
+        重采样的公共横轴: 覆盖所有运行对齐后的范围, 间隔取各次运行采样间隔中位数的最小值
+        """
+        if x_label not in self.time_base_cache:
+            x_min, x_max, step, sample_num_max = np.inf, -np.inf, np.inf, 0
+            for i in range(len(self)):
+                x = self.aligned_x(i, x_label)
+                finite_x = x[np.isfinite(x)]
+                if len(finite_x) < 2:
+                    continue
+                x_min, x_max = min(x_min, finite_x.min()), max(x_max, finite_x.max())
+                steps = np.abs(np.diff(finite_x))
+                steps = steps[steps > 0]
+                if len(steps) > 0:
+                    step = min(step, float(np.median(steps)))
+                sample_num_max = max(sample_num_max, len(finite_x))
+            if not np.isfinite(step) or x_max <= x_min:
+                self.time_base_cache[x_label] = np.zeros(0)
+            else:
+                max_samples = self.max_samples if self.max_samples is not None else sample_num_max
+                sample_num = int(min((x_max - x_min) / step + 1, max_samples))
+                self.time_base_cache[x_label] = np.linspace(x_min, x_max, max(sample_num, 2))
+        return self.time_base_cache[x_label]
+
+    def y(self, run_index: int, x_label: str, label: str) -> np.ndarray:
+        """
+        第run_index次运行label列绘制用的纵轴, 重采样时非数值列返回None
+        """
+        y = np.asarray(self.data_frames[run_index][label])
+        if self.align != ALIGN_RESAMPLE:
+            return y
+        key = (run_index, x_label, label)
+        if key not in self.y_cache:
+            if not np.issubdtype(y.dtype, np.number):
+                return None
+            x = self.aligned_x(run_index, x_label)
+            if not self.aligned_x_sorted(run_index, x_label):
+                order = np.argsort(x, kind='stable')
+                x, y = x[order], y[order]
+            # 超出本次运行范围的部分为NaN, 不绘制
+            dtype = y.dtype if np.issubdtype(y.dtype, np.floating) else np.float64
+            self.y_cache[key] = np.interp(self.time_base(x_label), x, y, left=np.nan, right=np.nan).astype(dtype, copy=False)
+        return self.y_cache[key]
+
+    def nbytes(self) -> int:
+        """
+        对齐及重采样额外占用的内存字节数, 不含原始数据
+        """
+        arrays = list(self.y_cache.values()) + list(self.time_base_cache.values())
+        arrays += [x for x in self.x_cache.values() if x.flags.owndata] # 偏移为0时为原始列的视图
+        return sum(array.nbytes for array in arrays)
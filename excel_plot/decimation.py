@@ -0,0 +1,270 @@
+# 曲线降采样相关模块
+import numpy as np
+
+def is_sorted(x_axis_data: np.ndarray, block_size: int = 1 << 22) -> bool:
+    """
+    判断横轴数据是否单调不减, 只有单调的横轴才能按可见范围二分查找和降采样
+    """
+    x_axis_data = np.asarray(x_axis_data)
+    # 分块比较, 限制临时内存, 内存映射的超长数据也只需顺序读取一遍
+    for start in range(0, x_axis_data.size - 1, block_size):
+        block = x_axis_data[start:start + block_size + 1]
+        if not np.all(block[1:] >= block[:-1]):
+            return False
+    return True
+
+def visible_range(x_axis_data: np.ndarray, x_min: float, x_max: float) -> tuple[int, int]:
+    """
+    二分查找可见横轴范围对应的样本下标区间[start, stop), 两端各多保留一个点使曲线延伸到坐标轴边缘
+    """
+    start = int(np.searchsorted(x_axis_data, x_min, side='left')) - 1
+    stop = int(np.searchsorted(x_axis_data, x_max, side='right')) + 1
+    return max(start, 0), min(stop, len(x_axis_data))
+
+def block_extrema(segments: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    二维数组每行(每块)最小值和最大值的列下标, 忽略NaN, 整行都为NaN时取第0列
+    argmin/argmax遇到NaN时返回NaN的位置, 只有这些行需要把NaN替换为正负无穷后重新计算, 没有NaN时不产生临时数组
+    """
+    index_min = segments.argmin(axis=1)
+    index_max = segments.argmax(axis=1)
+    if segments.dtype.kind == 'f' and len(segments) > 0:
+        rows = np.flatnonzero(np.isnan(segments[np.arange(len(segments)), index_min]))
+        if len(rows) > 0:
+            nan_segments = segments[rows]
+            nan_mask = np.isnan(nan_segments)
+            index_min[rows] = np.where(nan_mask, np.inf, nan_segments).argmin(axis=1)
+            index_max[rows] = np.where(nan_mask, -np.inf, nan_segments).argmax(axis=1)
+    return index_min, index_max
+
+def minmax_decimate(y_axis_data: np.ndarray, start: int, stop: int, bin_num: int) -> np.ndarray:
+    """
+    min/max降采样, 把[start, stop)区间分成bin_num段, 每段保留最小值和最大值两个点, 返回保留点的原始下标
+    每段的极值都被保留, 因此尖峰和毛刺不会因为降采样而消失
+    """
+    sample_num = stop - start
+    bin_num = max(int(bin_num), 1)
+    if sample_num <= 2 * bin_num:
+        return np.arange(start, stop)
+
+    # 等样本数分段, 最后不足一段的样本单独成段
+    bin_size = sample_num // bin_num
+    full_num = bin_num * bin_size
+    segments = np.asarray(y_axis_data[start:start + full_num]).reshape(bin_num, bin_size)
+    offsets = start + np.arange(bin_num) * bin_size
+    block_min, block_max = block_extrema(segments)
+    index_min = offsets + block_min
+    index_max = offsets + block_max
+    if full_num < sample_num:
+        rest_min, rest_max = block_extrema(np.asarray(y_axis_data[start + full_num:stop]).reshape(1, -1))
+        index_min = np.append(index_min, start + full_num + rest_min)
+        index_max = np.append(index_max, start + full_num + rest_max)
+
+    # 段内按原始顺序排列极值点, 并保留区间首尾点
+    index = np.sort(np.stack([index_min, index_max], axis=1), axis=1).ravel()
+    return np.concatenate(([start], index, [stop - 1]))
+
+class MinMaxPyramid:
+    """
+    单条曲线的min/max多分辨率金字塔, 加载时构建一次
+    第0层每块包含base_block个样本, 之后每层块数减半, 每块储存块内最小值和最大值的原始下标
+    缩放时按可见样本数选取合适层级, 取出的块数和像素数同一量级, 与数据总长度无关
+    额外内存约为 2 * 2 * 下标字节数 / base_block 每样本, base_block=8时约为float64原始数据的25%
+    """
+    def __init__(self, y_axis_data: np.ndarray, base_block: int = 8) -> None:
+        """
+        初始化并构建金字塔
+        """
+        self.y_axis_data = np.asarray(y_axis_data)
+        self.base_block = base_block
+        self.index_dtype = np.int32 if len(self.y_axis_data) < 2**31 else np.int64
+        self.levels_min: list[np.ndarray] = [] # 每层各块最小值下标
+        self.levels_max: list[np.ndarray] = [] # 每层各块最大值下标
+        self.buffers_min: list[np.ndarray] = [] # 每层的存储空间, 追加数据时按2倍扩容
+        self.buffers_max: list[np.ndarray] = []
+        self.build()
+
+    def build(self) -> None:
+        """
+        自底向上构建金字塔
+        """
+        self.levels_min = []
+        self.levels_max = []
+        self.buffers_min = []
+        self.buffers_max = []
+        self.update(0)
+
+    def extend(self, y_axis_data: np.ndarray) -> None:
+        """
+        数据末尾追加样本后增量更新, 已有样本不变, 只重新计算受影响的块
+        各层存储按2倍扩容, 均摊代价与新增样本数成正比
+        """
+        sample_num = len(self.y_axis_data)
+        self.y_axis_data = np.asarray(y_axis_data)
+        if self.index_dtype == np.int32 and len(self.y_axis_data) >= 2**31:
+            self.index_dtype = np.int64
+            self.build()
+            return
+        self.update(sample_num // self.base_block)
+
+    def update(self, first_block: int) -> None:
+        """
+        从第0层的first_block块开始重新计算各层
+        """
+        sample_num = len(self.y_axis_data)
+        if sample_num <= self.base_block:
+            self.levels_min = []
+            self.levels_max = []
+            return
+
+        # 第0层直接由原始数据分块求极值
+        start = first_block * self.base_block
+        block_num = -(-(sample_num - start) // self.base_block)
+        index_min = np.empty(block_num, dtype=self.index_dtype)
+        index_max = np.empty(block_num, dtype=self.index_dtype)
+        full_num = (sample_num - start) // self.base_block
+        segments = self.y_axis_data[start:start + full_num * self.base_block].reshape(full_num, self.base_block)
+        offsets = start + np.arange(full_num, dtype=self.index_dtype) * self.base_block
+        block_min, block_max = block_extrema(segments)
+        index_min[:full_num] = offsets + block_min
+        index_max[:full_num] = offsets + block_max
+        if full_num < block_num:
+            rest_start = start + full_num * self.base_block
+            rest_min, rest_max = block_extrema(self.y_axis_data[rest_start:].reshape(1, -1))
+            index_min[-1] = rest_start + rest_min[0]
+            index_max[-1] = rest_start + rest_max[0]
+        self.write_level(0, first_block, index_min, index_max)
+
+        # 上层由下层相邻两块合并
+        level = 0
+        while len(self.levels_min[level]) > 1:
+            first_block //= 2
+            index_min = self.merge(self.levels_min[level][2 * first_block:], np.less)
+            index_max = self.merge(self.levels_max[level][2 * first_block:], np.greater)
+            self.write_level(level + 1, first_block, index_min, index_max)
+            level += 1
+        del self.levels_min[level + 1:]
+        del self.levels_max[level + 1:]
+        del self.buffers_min[level + 1:]
+        del self.buffers_max[level + 1:]
+
+    def write_level(self, level: int, first_block: int, index_min: np.ndarray, index_max: np.ndarray) -> None:
+        """
+        把第level层从first_block开始的块替换为新计算的结果, 存储空间不足时按2倍扩容
+        """
+        block_num = first_block + len(index_min)
+        if level == len(self.levels_min):
+            self.buffers_min.append(np.empty(block_num, dtype=self.index_dtype))
+            self.buffers_max.append(np.empty(block_num, dtype=self.index_dtype))
+            self.levels_min.append(None)
+            self.levels_max.append(None)
+        for buffers, levels, index in ((self.buffers_min, self.levels_min, index_min), (self.buffers_max, self.levels_max, index_max)):
+            buffer = buffers[level]
+            if block_num > len(buffer) or buffer.dtype != self.index_dtype:
+                grown = np.empty(max(block_num, 2 * len(buffer)), dtype=self.index_dtype)
+                grown[:first_block] = buffer[:first_block]
+                buffer = grown
+                buffers[level] = buffer
+            buffer[first_block:block_num] = index
+            levels[level] = buffer[:block_num]
+
+    def merge(self, index: np.ndarray, better: np.ufunc) -> np.ndarray:
+        """
+        相邻两块合并为一块, better判断右块极值是否优于左块, 左块极值为NaN(整块都为NaN)而右块不是时取右块
+        """
+        left = index[0::2]
+        right = index[1::2]
+        merged = left.copy()
+        pair_num = len(right)
+        right_values = self.y_axis_data[right]
+        left_values = self.y_axis_data[left[:pair_num]]
+        take_right = better(right_values, left_values)
+        if right_values.dtype.kind == 'f':
+            take_right |= np.isnan(left_values) & ~np.isnan(right_values)
+        merged[:pair_num][take_right] = right[take_right]
+        return merged
+
+    @property
+    def nbytes(self) -> int:
+        """
+        金字塔占用的内存字节数
+        """
+        return sum(buffer.nbytes for buffer in self.buffers_min) + sum(buffer.nbytes for buffer in self.buffers_max)
+
+    def decimate(self, start: int, stop: int, bin_num: int) -> np.ndarray:
+        """
+        返回[start, stop)区间降采样后保留点的原始下标, 选取块数不少于bin_num的最粗层级
+        """
+        sample_num = stop - start
+        bin_num = max(int(bin_num), 1)
+        if sample_num <= 2 * bin_num:
+            return np.arange(start, stop)
+        level = int(np.floor(np.log2(sample_num / (bin_num * self.base_block))))
+        if level < 0 or not self.levels_min:
+            # 可见样本较少, 直接在原始数据上降采样, 代价仍只和像素数同一量级
+            return minmax_decimate(self.y_axis_data, start, stop, bin_num)
+        level = min(level, len(self.levels_min) - 1)
+
+        block_size = self.base_block << level
+        first_block = start // block_size
+        last_block = (stop - 1) // block_size + 1
+        index_min = self.levels_min[level][first_block:last_block]
+        index_max = self.levels_max[level][first_block:last_block]
+        index = np.concatenate(([start], index_min, index_max, [stop - 1]))
+        return np.sort(index)
+
+    def extent(self, start: int, stop: int) -> tuple[float, float]:
+        """
+        返回[start, stop)区间的最小值和最大值, 区间为空或全为NaN时返回None
+        与线段树查询相同, 两端不足一块的样本直接扫描, 中间每层最多取两端各一块, 代价为O(base_block + log n)
+        各块极值由block_extrema得到并已忽略NaN, 只有整块都为NaN时块极值为NaN, 此时忽略该块
+        """
+        start, stop = max(int(start), 0), min(int(stop), len(self.y_axis_data))
+        if start >= stop:
+            return None
+        first_block = -(-start // self.base_block)
+        last_block = stop // self.base_block
+        if not self.levels_min or first_block >= last_block:
+            return self.scan_extent([self.y_axis_data[start:stop]])
+
+        # 两端不足一块的样本
+        values = [self.y_axis_data[start:first_block * self.base_block], self.y_axis_data[last_block * self.base_block:stop]]
+        # 各层取区间两端未成对的块, 其余块合并到上一层, 最顶层取剩余的全部块
+        index = []
+        for level in range(len(self.levels_min)):
+            if first_block >= last_block:
+                break
+            if level == len(self.levels_min) - 1:
+                index.append(self.levels_min[level][first_block:last_block])
+                index.append(self.levels_max[level][first_block:last_block])
+                break
+            if first_block & 1:
+                index.append(self.levels_min[level][first_block:first_block + 1])
+                index.append(self.levels_max[level][first_block:first_block + 1])
+                first_block += 1
+            if last_block & 1:
+                last_block -= 1
+                index.append(self.levels_min[level][last_block:last_block + 1])
+                index.append(self.levels_max[level][last_block:last_block + 1])
+            first_block >>= 1
+            last_block >>= 1
+        if index:
+            values.append(self.y_axis_data[np.concatenate(index)])
+        return self.scan_extent(values)
+
+    @staticmethod
+    def scan_extent(values: list[np.ndarray]) -> tuple[float, float]:
+        """
+        扫描各段数值的最小值和最大值, 忽略NaN, 没有有效数值时返回None
+        """
+        y_min, y_max = np.inf, -np.inf
+        for value in values:
+            value = np.asarray(value)
+            if value.dtype.kind == 'f':
+                value = value[~np.isnan(value)]
+            if len(value) > 0:
+                y_min = min(y_min, float(value.min()))
+                y_max = max(y_max, float(value.max()))
+        if y_min > y_max:
+            return None
+        return y_min, y_max
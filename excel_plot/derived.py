@@ -0,0 +1,278 @@
+# 派生通道(表达式)相关模块
+import ast
+import numpy as np
+from .live_tail import ColumnBuffer
+
+# numexpr为可选依赖, 安装后不含窗口函数的表达式用numexpr多线程计算
+try:
+    import numexpr
+    NUMEXPR_AVAILABLE = True
+except ImportError:
+    NUMEXPR_AVAILABLE = False
+
+"""
+表达式为Python算术表达式, 变量为数据列名, 例如:
+    v2 - v1
+    sqrt(v1**2 + v2**2)
+    derivative(s1, time)
+    moving_average(v1, 50)
+    lowpass(col('Velocity (m/s)'), 101)
+列名不是合法标识符时写为col('列名'); 窗口函数都是因果的(只用当前及之前的样本), 数据追加时只需从末尾回看有限个样本增量计算
+"""
+
+class ExpressionError(Exception):
+    """
+    表达式无法解析或计算
+    """
+
+def derivative(y: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """
+    对x的后向差分导数, 第一个样本为NaN
+    """
+    y = np.asarray(y, dtype=np.float64)
+    x = np.asarray(x, dtype=np.float64)
+    result = np.full(len(y), np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result[1:] = np.diff(y) / np.diff(x)
+    return result
+
+def moving_average(y: np.ndarray, window: int) -> np.ndarray:
+    """
+    最近window个样本的滑动平均, 开头不足window个样本时取已有样本的平均
+    """
+    y = np.asarray(y, dtype=np.float64)
+    cumsum = np.concatenate(([0.0], np.cumsum(y)))
+    index = np.arange(1, len(y) + 1)
+    start = np.maximum(index - int(window), 0)
+    return (cumsum[index] - cumsum[start]) / (index - start)
+
+def lowpass(y: np.ndarray, window: int) -> np.ndarray:
+    """
+    长度为window的Hann窗FIR低通滤波, 因果实现, 开头不足window个样本时按已用到的权重归一化
+    有限长冲激响应使增量计算只需回看window-1个样本, IIR滤波器则需要保存状态
+    """
+    y = np.asarray(y, dtype=np.float64)
+    window = int(window)
+    weights = np.hanning(window + 2)[1:-1] if window > 1 else np.ones(1) # 去掉两端的0权重
+    weights = weights / weights.sum()
+    result = np.convolve(y, weights)[:len(y)]
+    head = min(window - 1, len(y))
+    result[:head] /= np.cumsum(weights)[:head]
+    return result
+
+# 窗口函数, 输出样本依赖当前及之前有限个样本
+WINDOW_FUNCTIONS = {
+    'derivative': derivative,
+    'moving_average': moving_average,
+    'lowpass': lowpass,
+}
+
+# 逐元素函数, numexpr同样支持的函数可交给numexpr计算
+ELEMENTWISE_FUNCTIONS = {
+    'abs': np.abs, 'sqrt': np.sqrt, 'exp': np.exp, 'log': np.log, 'log10': np.log10,
+    'sin': np.sin, 'cos': np.cos, 'tan': np.tan, 'arcsin': np.arcsin, 'arccos': np.arccos,
+    'arctan': np.arctan, 'arctan2': np.arctan2, 'sinh': np.sinh, 'cosh': np.cosh, 'tanh': np.tanh,
+    'where': np.where,
+    'minimum': np.minimum, 'maximum': np.maximum, 'hypot': np.hypot,
+    'degrees': np.degrees, 'radians': np.radians, 'sign': np.sign,
+}
+NUMEXPR_FUNCTIONS = {
+    'abs', 'sqrt', 'exp', 'log', 'log10', 'sin', 'cos', 'tan', 'arcsin', 'arccos',
+    'arctan', 'arctan2', 'sinh', 'cosh', 'tanh', 'where',
+}
+CONSTANTS = {'pi': np.pi, 'e': np.e, 'nan': np.nan, 'inf': np.inf}
+
+def widen(column: np.ndarray) -> np.ndarray:
+    """
+    把读取时压缩过的列类型(int8/int16/float32等)扩展为int64/float64, 避免表达式计算中溢出或损失精度
+    bool及uint64保持不变, 已是int64/float64的列不复制
+    """
+    column = np.asarray(column)
+    if column.dtype.kind == 'f' and column.dtype != np.float64:
+        return column.astype(np.float64)
+    if column.dtype.kind in 'iu' and column.dtype != np.int64 and column.dtype != np.uint64:
+        return column.astype(np.int64)
+    return column
+
+ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare, ast.Call, ast.Name, ast.Constant, ast.Load,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow, ast.USub, ast.UAdd,
+    ast.BitAnd, ast.BitOr, ast.Invert,
+    ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq,
+)
+
+class Expression:
+    """
+    解析后的表达式, 记录用到的列, 回看样本数及能否交给numexpr计算
+    列名统一改写为_c0, _c1...的变量名, 不受列名中特殊字符的影响
+    """
+    def __init__(self, expression: str) -> None:
+        """
+        解析并检查表达式, 只允许算术运算, 比较及已知函数
+        """
+        self.expression = expression
+        try:
+            tree = ast.parse(expression.strip(), mode='eval')
+        except SyntaxError as e:
+            raise ExpressionError(f'invalid expression {expression!r}: {e.msg}') from e
+        self.columns: list[str] = []
+        self.use_numexpr = NUMEXPR_AVAILABLE
+        tree = self.rewrite(tree)
+        self.lookback = self.node_lookback(tree.body)
+        self.source = ast.unparse(tree)
+        self.code = compile(tree, '<expression>', 'eval')
+
+    def variable(self, column: str) -> ast.Name:
+        """
+        列名对应的变量
+        """
+        if column not in self.columns:
+            self.columns.append(column)
+        return ast.Name(id=f'_c{self.columns.index(column)}', ctx=ast.Load())
+
+    def rewrite(self, tree: ast.Expression) -> ast.Expression:
+        """
+        检查语法树中的节点, 把列名及col('列名')替换为变量
+        """
+        expression = self.expression
+        parent = self
+        class Rewriter(ast.NodeTransformer):
+            def generic_visit(self, node: ast.AST) -> ast.AST:
+                if not isinstance(node, ALLOWED_NODES):
+                    raise ExpressionError(f'unsupported syntax {type(node).__name__} in {expression!r}')
+                return super().generic_visit(node)
+
+            def visit_Call(self, node: ast.Call) -> ast.AST:
+                name = node.func.id if isinstance(node.func, ast.Name) else None
+                if node.keywords:
+                    raise ExpressionError(f'keyword arguments are not supported in {expression!r}')
+                if name == 'col':
+                    if len(node.args) != 1 or not isinstance(node.args[0], ast.Constant) or not isinstance(node.args[0].value, str):
+                        raise ExpressionError(f"col() takes one column name in {expression!r}")
+                    return parent.variable(node.args[0].value)
+                if name in WINDOW_FUNCTIONS:
+                    parent.use_numexpr = False
+                    if len(node.args) != 2:
+                        raise ExpressionError(f'{name}() takes two arguments in {expression!r}')
+                    if name != 'derivative' and (not isinstance(node.args[1], ast.Constant) or type(node.args[1].value) is not int or node.args[1].value < 1):
+                        raise ExpressionError(f'{name}() takes a positive integer window in {expression!r}')
+                elif name in ELEMENTWISE_FUNCTIONS:
+                    if name not in NUMEXPR_FUNCTIONS:
+                        parent.use_numexpr = False
+                else:
+                    raise ExpressionError(f'unknown function {name} in {expression!r}')
+                node.args = [self.visit(arg) for arg in node.args]
+                return node
+
+            def visit_Name(self, node: ast.Name) -> ast.AST:
+                if node.id in CONSTANTS:
+                    return ast.Constant(value=CONSTANTS[node.id])
+                return parent.variable(node.id)
+
+            def visit_Constant(self, node: ast.Constant) -> ast.AST:
+                if not isinstance(node.value, (int, float)) or isinstance(node.value, bool):
+                    raise ExpressionError(f'unsupported constant {node.value!r} in {expression!r}')
+                return node
+        return ast.fix_missing_locations(Rewriter().visit(tree))
+
+    def node_lookback(self, node: ast.AST) -> int:
+        """
+        计算一个输出样本需要回看的样本数, 嵌套的窗口函数回看数相加
+        """
+        lookback = max((self.node_lookback(child) for child in ast.iter_child_nodes(node)), default=0)
+        if isinstance(node, ast.Call) and node.func.id == 'derivative':
+            lookback += 1
+        elif isinstance(node, ast.Call) and node.func.id in WINDOW_FUNCTIONS:
+            lookback += node.args[1].value - 1
+        return lookback
+
+    def evaluate(self, columns: list[np.ndarray]) -> np.ndarray:
+        """
+        按列数据计算表达式, columns与self.columns一一对应, 各列先扩展为int64/float64再计算
+        """
+        variables = {f'_c{i}': widen(column) for i, column in enumerate(columns)}
+        try:
+            if self.use_numexpr:
+                result = numexpr.evaluate(self.source, local_dict=variables)
+            else:
+                result = eval(self.code, {'__builtins__': {}, **WINDOW_FUNCTIONS, **ELEMENTWISE_FUNCTIONS}, variables)
+        except Exception as e:
+            raise ExpressionError(f'evaluate {self.expression!r} failed: {e}') from e
+        result = np.asarray(result)
+        if not (np.issubdtype(result.dtype, np.number) or result.dtype == np.bool_):
+            raise ExpressionError(f'{self.expression!r} is not numeric')
+        return np.broadcast_to(result, len(columns[0])) # 结果与列等长
+
+class DerivedFrame:
+    """
+    在数据之上附加派生通道, 按列名取列的用法与DataFrame相同
+    派生通道在第一次取用时计算并缓存; 数据末尾追加行(跟踪模式)后再次取用时, 只从末尾回看lookback个样本计算新增的行
+    """
+    def __init__(self, data_frame, expressions: dict[str, str] = None) -> None:
+        """
+        初始化成员变量, expressions为派生通道名称到表达式的映射
+        """
+        self.data_frame = data_frame
+        self.expressions: dict[str, Expression] = {}
+        self.results: dict[str, ColumnBuffer] = {}
+        self.last_rows: dict[str, list[bytes]] = {} # 上次计算时各源列的最后一个样本, 用于判断已有的行是否改变
+        for name, expression in (expressions or {}).items():
+            self.add_expression(name, expression)
+
+    def add_expression(self, name: str, expression: str) -> None:
+        """
+        添加派生通道, 表达式只检查语法和列名, 不计算
+        """
+        parsed = Expression(expression)
+        if len(parsed.columns) == 0:
+            raise ExpressionError(f'expression {expression!r} uses no column')
+        for column in parsed.columns:
+            if column not in self.columns or column == name:
+                raise ExpressionError(f'unknown column {column} in {expression!r}')
+        self.expressions[name] = parsed
+        self.results.pop(name, None)
+
+    @property
+    def columns(self) -> list[str]:
+        return list(self.data_frame.columns) + [name for name in self.expressions if name not in self.data_frame.columns]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.expressions or name in self.data_frame
+
+    def __len__(self) -> int:
+        return len(self.data_frame)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name not in self.expressions:
+            return self.data_frame[name]
+        return self.evaluate(name)
+
+    def source_columns(self, name: str) -> list[np.ndarray]:
+        """
+        派生通道用到的各列, 派生通道可以引用其他派生通道
+        """
+        return [np.asarray(self[column]) for column in self.expressions[name].columns]
+
+    def evaluate(self, name: str) -> np.ndarray:
+        """
+        计算派生通道, 数据未变时直接返回缓存, 只追加了行时增量计算
+        """
+        expression = self.expressions[name]
+        sources = self.source_columns(name)
+        length = len(sources[0])
+        result = self.results.get(name)
+        # 行数未减少且上次最后一行未变时认为只在末尾追加了行, 否则(文件被重写等)全部重新计算
+        computed = 0 if result is None else len(result)
+        appended = result is not None and computed <= length and \
+            [source[computed - 1:computed].tobytes() for source in sources] == self.last_rows[name]
+        if not appended:
+            values = expression.evaluate(sources)
+            result = ColumnBuffer(values.dtype if np.issubdtype(values.dtype, np.floating) else np.float64, max(length, 1))
+            result.append(values)
+            self.results[name] = result
+        elif computed < length:
+            start = max(computed - expression.lookback, 0)
+            values = expression.evaluate([source[start:] for source in sources])
+            result.append(values[computed - start:])
+        self.last_rows[name] = [source[length - 1:length].tobytes() for source in sources]
+        return result.data
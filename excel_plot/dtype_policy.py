@@ -0,0 +1,131 @@
+# 数据列类型相关模块
+import copy
+import importlib.util
+import numpy as np
+import pandas as pd
+
+# pyarrow为可选依赖, 安装后文本列可按Arrow字符串存储
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+TEXT_STORAGE_CATEGORY = 'category'
+TEXT_STORAGE_ARROW = 'arrow'
+TEXT_STORAGE_OBJECT = 'object'
+
+class DtypePolicy:
+    """
+    读取数据后的列类型策略, 减少宽表的内存占用
+        浮点列转为float32, 转换误差超过该列数值范围的float_tolerance倍, 或超过相邻样本典型间隔(非零差值的中位数)的step_tolerance倍时保留float64,
+        如以时间戳为值的时间列, 以及长时间记录的相对时间列(转换后采样间隔抖动甚至出现重复值);
+        取值全为整数的列转为能容纳其范围的最小整数类型;
+        文本列重复较多时转为category, 否则安装pyarrow时按Arrow字符串存储
+    keep_columns中的列保持读取时的类型, 横轴列应放在其中, 见with_keep_columns
+    """
+    def __init__(
+        self,
+        float_dtype: str = 'float32',
+        float_tolerance: float = 1e-6,
+        step_tolerance: float = 0.01,
+        downcast_int: bool = True,
+        text_storage: str = TEXT_STORAGE_CATEGORY,
+        category_max_ratio: float = 0.5,
+        keep_columns: list[str] = ()
+    ) -> None:
+        """
+        初始化成员变量, float_dtype为'float64'时不转换浮点列, category_max_ratio为转为category的最大不重复值比例
+        """
+        self.float_dtype = np.dtype(float_dtype)
+        self.float_tolerance = float_tolerance
+        self.step_tolerance = step_tolerance
+        self.downcast_int = downcast_int
+        self.text_storage = text_storage
+        self.category_max_ratio = category_max_ratio
+        self.keep_columns = set(keep_columns)
+
+    def with_keep_columns(self, columns: list[str]) -> 'DtypePolicy':
+        """
+        返回额外保持columns类型的策略副本, 用于读取时已知横轴列的场景, columns中的None被忽略
+        """
+        policy = copy.copy(self)
+        policy.keep_columns = self.keep_columns | {column for column in columns if column is not None}
+        return policy
+
+    def apply(self, data_frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        按策略转换各列类型, 返回新的DataFrame
+        """
+        columns = {}
+        for name in data_frame.columns:
+            column = data_frame[name]
+            columns[name] = column if name in self.keep_columns else self.convert_column(column)
+        return pd.DataFrame(columns, index=data_frame.index)
+
+    def convert_column(self, column: pd.Series) -> pd.Series:
+        """
+        转换单列类型
+        """
+        if pd.api.types.is_bool_dtype(column):
+            return column
+        if pd.api.types.is_integer_dtype(column):
+            return pd.to_numeric(column, downcast='integer') if self.downcast_int else column
+        if pd.api.types.is_float_dtype(column):
+            return self.convert_float(column)
+        if column.dtype == object and pd.api.types.infer_dtype(column, skipna=True) == 'string':
+            return self.convert_text(column)
+        return column
+
+    def convert_float(self, column: pd.Series) -> pd.Series:
+        """
+        浮点列取值全为整数时转为最小整数类型, 否则在精度允许时转为float_dtype
+        """
+        values = column.to_numpy()
+        if len(values) == 0:
+            return column
+        if self.downcast_int and np.all(np.isfinite(values)) and np.all(values == np.round(values)):
+            return pd.to_numeric(column.astype(np.int64), downcast='integer')
+        if self.float_dtype.itemsize >= values.dtype.itemsize:
+            return column
+        converted = values.astype(self.float_dtype)
+        with np.errstate(invalid='ignore'):
+            span = np.nanmax(values) - np.nanmin(values) if not np.all(np.isnan(values)) else 0.0
+            error = np.nanmax(np.abs(converted - values)) if not np.all(np.isnan(values)) else 0.0
+        # 误差按数值范围衡量, 范围为0时按数值本身衡量
+        scale = span if span > 0 else np.nanmax(np.abs(values))
+        if not np.isfinite(error) or error > self.float_tolerance * scale:
+            return column
+        # 误差还需远小于相邻样本的典型间隔, 数值范围较小而数值本身较大的列(如长时间记录的时间列)不满足
+        step = median_step(values)
+        if step > 0 and error > self.step_tolerance * step:
+            return column
+        return pd.Series(converted, index=column.index, name=column.name)
+
+    def convert_text(self, column: pd.Series) -> pd.Series:
+        """
+        文本列按重复程度转为category或Arrow字符串
+        """
+        if self.text_storage == TEXT_STORAGE_OBJECT:
+            return column
+        if self.text_storage == TEXT_STORAGE_CATEGORY and column.nunique() <= self.category_max_ratio * len(column):
+            return column.astype('category')
+        if PYARROW_AVAILABLE:
+            return column.astype('string[pyarrow]')
+        return column
+
+def median_step(values: np.ndarray, sample_num: int = 1 << 20) -> float:
+    """
+    相邻样本非零差值绝对值的中位数, 相同的相邻样本及NaN不计入, 没有非零差值时返回0
+    样本较多时只取均匀分布的sample_num对相邻样本估计, 不产生与列等长的临时数组
+    """
+    if len(values) < 2:
+        return 0.0
+    index = np.unique(np.linspace(0, len(values) - 2, min(len(values) - 1, sample_num)).astype(np.int64))
+    steps = np.abs(values[index + 1] - values[index])
+    steps = steps[steps > 0]
+    return float(np.median(steps)) if len(steps) > 0 else 0.0
+
+def data_nbytes(data_frame) -> int:
+    """
+    统计数据占用的内存字节数, 内存映射的列按映射文件大小计算
+    """
+    if isinstance(data_frame, pd.DataFrame):
+        return int(data_frame.memory_usage(index=False, deep=True).sum())
+    return sum(int(getattr(data_frame[name], 'nbytes', 0)) for name in data_frame.columns)
@@ -4,7 +4,6 @@ import matplotlib.backend_bases
 import matplotlib.figure
 import matplotlib.lines
 import matplotlib.widgets
-import mplcursors
 import matplotlib
 import matplotlib.pyplot as plt
 from matplotlib.widgets import CheckButtons
@@ -13,8 +12,26 @@ from matplotlib.widgets import Button
 import numpy as np
 import pandas as pd
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from .decimation import is_sorted, visible_range, MinMaxPyramid
+from .blit import BlitManager
+from .scheduler import RedrawScheduler
+from .file_loader import DataFileError, BackgroundLoader, MultiFileLoader, load_data_file, print_progress
+from .file_cache import FileCache
+from .dtype_policy import DtypePolicy, data_nbytes
+from .live_tail import CsvTailReader
+from .compare import RunSet, ALIGN_OFFSET
+from .derived import DerivedFrame, ExpressionError
+from .window_loader import SlidingWindow, WindowedFile, load_data_window
+from .file_stats import FileStats, OverviewFrame
+from .layout import LayoutError, check_layout, load_layout, layout_columns, layout_frame
+from .picker import CurvePicker, CurveSelection
+from .ticks import NiceTickLocator, NiceTickFormatter
+from .profiler import Profiler, PHASE_EVENT, PHASE_SYNC, PHASE_LOAD, profiled, profile_span
 # 路径相关模块
+import os
 import sys
+import time
 import tkinter as tk
 from tkinter import filedialog
 
@@ -32,17 +49,30 @@ class CursorInfo:
 
     def add_info(self, name: str, data: list) -> None:
         """
-        添加一条待显示的信息
+        添加一条待显示的信息, data按原始数据的行位置取值
         """
+        # Series按标签取值, 取出底层数组后按位置取值, 与曲线数据的下标一致
+        # category及Arrow字符串列直接使用其扩展数组, 不展开为Python字符串对象
+        if isinstance(data, pd.Series):
+            data = data.to_numpy() if isinstance(data.dtype, np.dtype) else data.array
+        elif isinstance(data, list):
+            data = np.asarray(data)
         self.info_name_list.append(name)
         self.info_data_list.append(data)
         self.info_num += 1
 
+    def lookup(self, index) -> list[tuple[str, object]]:
+        """
+        取出所有信息在原始数据第index行的值, index为下标数组时每条信息返回对应行的数组
+        """
+        return [(name, data[index]) for name, data in zip(self.info_name_list, self.info_data_list)]
+
 class ExcelPlotCurve:
     """
-    图中需要绘制的单条曲线类
+    图中需要绘制的单条曲线类, 横轴单调时按可见范围做min/max降采样, 绘制点数只和屏幕宽度有关
+    降采样基于绘制时构建的min/max金字塔, 缩放平移的代价与数据总长度无关
     """
-    def __init__(self, y_axis_data: np.ndarray, label: str, color: str, visible: bool = True) -> None:
+    def __init__(self, y_axis_data: np.ndarray, label: str, color: str, visible: bool = True, decimation: bool = True) -> None:
         """
         初始化曲线
         """
@@ -52,38 +82,144 @@ class ExcelPlotCurve:
         self.visible = visible
         self.line: matplotlib.lines.Line2D
 
+        # 降采样相关参数
+        self.decimation = decimation # 是否开启降采样
+        self.x_axis_data: np.ndarray = None
+        self.x_sorted = False                  # 横轴是否单调, 不单调时无法降采样
+        self.display_index: np.ndarray = None # 当前显示点在原始数据中的下标, 为None表示显示全部数据
+        self.view_key: tuple = None           # 上次降采样的范围, 范围不变时跳过计算
+        self.pyramid: MinMaxPyramid = None    # min/max金字塔, 同一份纵轴数据只构建一次
+
     # 绘制曲线
-    def plot(self, plot_ax: matplotlib.axes.Axes, x_axis_data: np.ndarray) -> None:
+    def plot(self, plot_ax: matplotlib.axes.Axes, x_axis_data: np.ndarray, x_sorted: bool = None) -> None:
         """
-        绘制单条曲线
+        绘制单条曲线, x_sorted为横轴是否单调, 为None时自行判断
         """
+        self.x_axis_data = np.asarray(x_axis_data)
+        self.y_axis_data = np.asarray(self.y_axis_data)
+        if x_sorted is None:
+            x_sorted = is_sorted(self.x_axis_data)
+        self.x_sorted = x_sorted
+        self.display_index = None
+        self.view_key = None
+
+        x_data, y_data = self.x_axis_data, self.y_axis_data
+        if self.decimation and self.x_sorted and len(self.x_axis_data) > 0:
+            if self.pyramid is None or self.pyramid.y_axis_data is not self.y_axis_data:
+                self.pyramid = MinMaxPyramid(self.y_axis_data)
+            # 先按全部范围降采样, 后续由坐标轴范围变化触发更新
+            self.display_index = self.pyramid.decimate(0, len(self.y_axis_data), plot_ax.bbox.width)
+            x_data, y_data = self.x_axis_data[self.display_index], self.y_axis_data[self.display_index]
         self.line, = plot_ax.plot(
-            x_axis_data,
-            self.y_axis_data,
+            x_data,
+            y_data,
             label=self.label,
             color=self.color,
             visible=self.visible,
         )
 
+    def update_view(self, x_min: float, x_max: float, pixel_width: float) -> None:
+        """
+        根据可见横轴范围和坐标轴像素宽度重新降采样, 每个像素保留最小值和最大值两个点
+        """
+        if not self.decimation or not self.x_sorted or not self.visible or self.pyramid is None:
+            return # 没有数据时不构建金字塔
+        start, stop = visible_range(self.x_axis_data, x_min, x_max)
+        bin_num = max(int(pixel_width), 1)
+        if (start, stop, bin_num) == self.view_key:
+            return
+        self.view_key = (start, stop, bin_num)
+        self.display_index = self.pyramid.decimate(start, stop, bin_num)
+        self.line.set_data(self.x_axis_data[self.display_index], self.y_axis_data[self.display_index])
+
+    def visible_extent(self, x_min: float, x_max: float) -> tuple[float, float]:
+        """
+        横轴在[x_min, x_max]内的纵轴最小值和最大值, 没有可见数据时返回None
+        有金字塔时二分查找下标区间后按金字塔查询, 代价与数据总长度无关; 否则逐点筛选
+        文本等非数值曲线没有数值范围, 返回None
+        """
+        if self.x_axis_data is None or len(self.x_axis_data) == 0:
+            return None
+        if getattr(self.y_axis_data, 'dtype', None) is None or self.y_axis_data.dtype.kind not in 'biuf':
+            return None
+        if self.pyramid is not None and self.x_sorted:
+            start = int(np.searchsorted(self.x_axis_data, x_min, side='left'))
+            stop = int(np.searchsorted(self.x_axis_data, x_max, side='right'))
+            return self.pyramid.extent(start, stop)
+        mask = (self.x_axis_data >= x_min) & (self.x_axis_data <= x_max)
+        return MinMaxPyramid.scan_extent([self.y_axis_data[mask]])
+
+    def refresh_view(self) -> None:
+        """
+        按曲线所在坐标轴当前的范围更新降采样结果
+        """
+        plot_ax = self.line.axes
+        if plot_ax is not None:
+            x_min, x_max = plot_ax.get_xlim()
+            self.update_view(x_min, x_max, plot_ax.bbox.width)
+
+    def extend_data(self, x_axis_data: np.ndarray, y_axis_data: np.ndarray) -> None:
+        """
+        数据末尾追加样本后更新曲线数据, 金字塔增量更新, 已有样本不重新计算
+        降采样结果由调用方随后更新横轴范围或调用refresh_view刷新
+        """
+        sample_num = 0 if self.x_axis_data is None else len(self.x_axis_data)
+        self.x_axis_data = np.asarray(x_axis_data)
+        self.y_axis_data = np.asarray(y_axis_data)
+        # 已有部分单调时只需检查衔接处及新增部分
+        if self.x_sorted and sample_num > 0:
+            self.x_sorted = is_sorted(self.x_axis_data[sample_num - 1:])
+        self.view_key = None
+
+        if self.decimation and self.x_sorted and len(self.x_axis_data) > 0:
+            if self.pyramid is None:
+                self.pyramid = MinMaxPyramid(self.y_axis_data)
+            else:
+                self.pyramid.extend(self.y_axis_data)
+        else:
+            self.pyramid = None
+            self.display_index = None
+            self.line.set_data(self.x_axis_data, self.y_axis_data)
+
+    def set_data(self, x_axis_data: np.ndarray, y_axis_data: np.ndarray, x_sorted: bool = None) -> None:
+        """
+        替换曲线数据并重建金字塔, 用于更换已读取的数据段或以完整数据替换概览, x_sorted为None时自行判断
+        降采样结果由调用方随后调用update_view或refresh_view刷新
+        """
+        self.x_axis_data = np.asarray(x_axis_data)
+        self.y_axis_data = np.asarray(y_axis_data)
+        self.x_sorted = is_sorted(self.x_axis_data) if x_sorted is None else x_sorted
+        self.view_key = None
+        if self.decimation and self.x_sorted and len(self.x_axis_data) > 0:
+            self.pyramid = MinMaxPyramid(self.y_axis_data)
+        else:
+            self.pyramid = None
+            self.display_index = None
+            self.line.set_data(self.x_axis_data, self.y_axis_data)
+
     def set_visible(self, visible: bool) -> None:
         """
         设置曲线是否可见
         """
         self.visible = visible
         self.line.set_visible(visible)
+        # 隐藏期间不更新降采样, 重新显示时按当前范围补算
+        if visible:
+            self.refresh_view()
 
 class ExcelPlotBaseFigure:
     """
     绘图的基础类, 能够实现多条曲线在同一张图显示, 左键点击曲线显示标签信息, 右键按住空白处拖动移动
     """
-    def __init__(self, name: str, fig: matplotlib.figure.Figure, cursor_info: CursorInfo = None, mouse_event_callback = None) -> None:
+    def __init__(self, name: str, fig: matplotlib.figure.Figure, cursor_info: CursorInfo = None, mouse_event_callback = None, blit_manager: BlitManager = None, scheduler: RedrawScheduler = None) -> None:
         """
         初始化成员变量
         """
         self.fig = fig
         self.name = name
         self.x_axis_data: np.ndarray
-        self.xticks_density = 30 # 本图横轴刻度密度
+        self.xticks_density = 30 # 本图横轴最多刻度数
+        self.xticks_spacing = 80 # 本图横轴相邻刻度的最小像素间距
 
         # 画布及坐标轴相关参数
         self.plot_ax_pos: np.ndarray
@@ -111,36 +247,145 @@ class ExcelPlotBaseFigure:
         self.mouse_move_ry = 0.0   # 鼠标移动纵向比例, 用于和其它子图同步
         self.mouse_scroll_rx = 1.0 # 鼠标滚轮横向缩放比例, 用于和其它子图同步
         self.mouse_scroll_ry = 1.0 # 鼠标滚轮纵向缩放比例, 用于和其它子图同步
+        self.pending_scroll_rx = 1.0 # 本帧内累计的横向缩放比例
+        self.pending_scroll_ry = 1.0 # 本帧内累计的纵向缩放比例
+        self.pending_event: matplotlib.backend_bases.MouseEvent = None # 本帧内最后一个平移缩放事件
         self.mouse_event_callback = mouse_event_callback
         self.cursor_info: CursorInfo = cursor_info # 鼠标点击信息
-        self.cursor: mplcursors._mplcursors.Cursor # 标签
-
-    def plot(self, plot_ax_pos: np.ndarray, x_axis_data: np.ndarray) -> None:
+        self.picker: CurvePicker = None # 曲线点选及标签
+        self.pressed_on_annotation = False # 本次左键是否点在已有标签上, 点在标签上时不显示时间竖线
+        self.xlim_cid: int = None # 坐标轴范围变化回调id, 用于更新曲线降采样
+        self.vline: matplotlib.lines.Line2D = None # 左键点击空白处显示的时间竖线
+        self.blit_manager = blit_manager # 画布局部刷新管理, 为None时完整重绘
+        self.scheduler = scheduler       # 重绘调度器, 为None时每个鼠标事件立即处理
+        self.profiler: Profiler = None   # 性能记录, 为None时不记录
+        self.auto_ylim = False   # 纵轴是否自适应可见数据, 开启时横轴范围变化后按可见曲线的极值设置纵轴, 手动纵向平移缩放无效
+        self.ylim_margin = 0.05  # 纵轴自适应时上下各留出的空白比例
+
+    def plot(self, plot_ax_pos: np.ndarray, x_axis_data: np.ndarray, x_sorted: bool = None, sharex: matplotlib.axes.Axes = None) -> None:
         """
-        画图和绘制曲线
+        画图和绘制曲线, x_sorted为横轴是否单调, 为None时自行判断
+        sharex不为None时与该坐标轴共享横轴范围及刻度, 任一子图改变横轴范围时其余子图由matplotlib同步
         """
         self.plot_ax_pos = plot_ax_pos
-        self.plot_ax = self.fig.add_axes(self.plot_ax_pos)
+        self.plot_ax = self.fig.add_axes(self.plot_ax_pos, sharex=sharex)
         self.x_axis_data = x_axis_data
-        lines = []
+        if x_sorted is None:
+            x_sorted = is_sorted(self.x_axis_data)
         for curve in self.curves:
-            curve.plot(self.plot_ax, self.x_axis_data)
-            lines.append(curve.line)
-        # 给一幅子图绑定标签, 每条曲线都绑定会有重叠现象, 故只绑定一次
-        self.cursor = mplcursors.cursor(lines, multiple=True)
-        self.cursor.connect('add', self.update_cursor_annotation)
-
-        # 设置显示格式
-        self.plot_ax.set_xlim(self.x_axis_data.min(), self.x_axis_data.max())
+            curve.plot(self.plot_ax, self.x_axis_data, x_sorted)
+        self.connect_view_update()
+        # 一幅子图共用一个点选器, 点击时只选中离鼠标最近的一条曲线
+        if self.picker is not None:
+            self.picker.remove_all_selection()
+        self.picker = CurvePicker(self.plot_ax, blit_manager=self.blit_manager)
+
+        # 设置显示格式, 与已有子图共享横轴时沿用当前的显示范围
+        if sharex is None:
+            self.plot_ax.set_xlim(self.x_axis_data.min(), self.x_axis_data.max())
         self.plot_ax.legend(fontsize=8)
         self.plot_ax.grid()
-        self.plot_ax.set_xticks(np.linspace(self.x_axis_data.min(), self.x_axis_data.max(), self.xticks_density))
         self.plot_ax.tick_params(axis='x', rotation=20)
-        self.plot_ax.ticklabel_format(axis='x', style='plain')
+        self.setup_xticks()
 
         # 曲线绘制时设置invisible会导致legend不显示颜色, 因此需要先绘制曲线再设置visible
         for curve in self.curves:
             curve.set_visible(curve.visible)
+        if self.auto_ylim:
+            self.autoscale_y()
+
+    def setup_xticks(self) -> None:
+        """
+        设置横轴刻度定位及标签格式, 刻度随显示范围自动计算, 平移缩放时无需再手动设置刻度
+        子类可重写本方法替换为其它定位方式
+        """
+        locator = NiceTickLocator(self.xticks_density, self.xticks_spacing)
+        locator.profiler = self.profiler
+        self.plot_ax.xaxis.set_major_locator(locator)
+        self.plot_ax.xaxis.set_major_formatter(NiceTickFormatter())
+
+    def connect_view_update(self) -> None:
+        """
+        绑定坐标轴横轴范围变化回调, 平移缩放及子图同步后都会重新降采样
+        plot_ax.clear()会重置坐标轴回调, 因此每次绘制都需要重新绑定
+        """
+        if self.xlim_cid is not None:
+            self.plot_ax.callbacks.disconnect(self.xlim_cid)
+        self.xlim_cid = self.plot_ax.callbacks.connect('xlim_changed', self.update_curves_view)
+
+    def draw_vline(self, x: float) -> None:
+        """
+        在横轴x处显示时间竖线, 已有竖线时直接移动, 竖线作为动态元素参与局部刷新
+        """
+        if self.vline is not None and self.vline in self.plot_ax.lines:
+            self.vline.set_xdata([x, x])
+            return
+        if self.vline is not None and self.blit_manager is not None:
+            self.blit_manager.remove_artist(self.vline)
+        self.vline = self.plot_ax.axvline(x=x, color='black', linewidth=1, visible=True)
+        if self.blit_manager is not None:
+            self.blit_manager.add_artist(self.vline)
+
+    def redraw(self) -> None:
+        """
+        刷新画布, 支持blit时只重绘动态元素
+        """
+        if self.blit_manager is not None:
+            self.blit_manager.update()
+        else:
+            self.fig.canvas.draw_idle()
+
+    def decimation_nbytes(self) -> int:
+        """
+        统计本图所有曲线降采样金字塔占用的内存字节数
+        """
+        return sum(curve.pyramid.nbytes for curve in self.curves if curve.pyramid is not None)
+
+    def update_curves_view(self, plot_ax: matplotlib.axes.Axes = None) -> None:
+        """
+        按当前横轴范围更新所有曲线的降采样结果, 隐藏的子图跳过, 重新显示时再补算
+        """
+        if not self.visible:
+            return
+        x_min, x_max = self.plot_ax.get_xlim()
+        pixel_width = self.plot_ax.bbox.width
+        for curve in self.curves:
+            curve.update_view(x_min, x_max, pixel_width)
+        if self.auto_ylim:
+            self.autoscale_y()
+
+    def visible_extent(self) -> tuple[float, float]:
+        """
+        当前横轴范围内所有可见曲线的纵轴最小值和最大值, 没有可见数据时返回None
+        """
+        x_min, x_max = self.plot_ax.get_xlim()
+        extents = [curve.visible_extent(x_min, x_max) for curve in self.curves if curve.visible]
+        extents = [extent for extent in extents if extent is not None]
+        if not extents:
+            return None
+        return min(extent[0] for extent in extents), max(extent[1] for extent in extents)
+
+    def autoscale_y(self, extent: tuple[float, float] = None) -> None:
+        """
+        按纵轴范围extent设置纵轴, 上下各留ylim_margin比例的空白, extent为None时取当前可见数据的范围
+        """
+        if extent is None:
+            extent = self.visible_extent()
+        if extent is None:
+            return
+        y_min, y_max = extent
+        margin = (y_max - y_min) * self.ylim_margin
+        if margin == 0:
+            margin = abs(y_max) * self.ylim_margin or 1.0 # 可见数据为常数时也留出空白
+        self.plot_ax.set_ylim(y_min - margin, y_max + margin)
+
+    def set_auto_ylim(self, auto_ylim: bool) -> None:
+        """
+        开启或关闭纵轴自适应, 开启时立即按当前可见数据设置纵轴
+        """
+        self.auto_ylim = auto_ylim
+        if auto_ylim and self.visible:
+            self.autoscale_y()
 
     def add_curve(self, curve: ExcelPlotCurve) -> None:
         """
@@ -166,87 +411,153 @@ class ExcelPlotBaseFigure:
         self.curves = []
         self.curve_num = 0
 
-    def update_cursor_annotation(self, cursor: mplcursors._mplcursors.Cursor) -> None:
+    def annotation_text(self, selection: CurveSelection) -> str:
         """
-        更新鼠标点击曲线显示的标签信息
+        生成点选曲线显示的标签信息, 包含曲线数值及该行的所有附加信息
         """
-        cursor_text = f'{cursor.artist.get_label()}:{cursor.target[1]:.2f}\n{round(cursor.target[0])}'
-        index = round(cursor.index)
-        info = ''
+        curve, index = selection.curve, selection.index
+        value = curve.y_axis_data[index]
+        value_text = f'{value:.2f}' if isinstance(value, (int, float, np.number)) else f'{value!s}' # 文本列直接显示
+        cursor_text = f'{curve.label}:{value_text}\n{round(curve.x_axis_data[index])}'
         if self.cursor_info is not None:
-            for i in range(self.cursor_info.info_num):
-                name = self.cursor_info.info_name_list[i]
-                data = self.cursor_info.info_data_list[i][index]
-                info = f'\n{name}:{data}'
-                cursor_text += info
-        cursor.annotation.set_text(cursor_text)
+            for name, data in self.cursor_info.lookup(index):
+                cursor_text += f'\n{name}:{data!s}' # str使float32按最短形式显示
+        return cursor_text
+
+    def pick_event(self, event: matplotlib.backend_bases.MouseEvent) -> bool:
+        """
+        鼠标点选事件响应: 左键点击曲线附近显示标签, 右键点击标签删除标签, 删除了标签时返回True
+        """
+        if self.picker is None:
+            return False
+        selection = self.picker.selection_at(event.x, event.y)
+        if event.button == 1:
+            self.pressed_on_annotation = selection is not None
+            if selection is None:
+                selection = self.picker.pick(event.x, event.y, self.curves)
+                if selection is not None:
+                    self.picker.add_selection(selection, self.annotation_text(selection))
+                    self.redraw()
+        elif event.button == 3 and selection is not None:
+            self.picker.remove_selection(selection)
+            self.redraw()
+            return True
+        return False
 
     def mouse_toggle_event(self, event: matplotlib.backend_bases.MouseEvent) -> None:
         """
         鼠标事件回调函数, 实现右键按住空白处拖动, 滚轮缩放
+        拖动和滚轮事件只记录待处理的位移和缩放量, 由调度器每帧合并处理一次
         """
         if self.plot_ax == event.inaxes and \
            (event.name == 'button_press_event' or event.name == 'scroll_event' or\
             event.name == 'button_press_event' or event.name == 'button_release_event' or \
             (event.name == 'motion_notify_event' and event.button == 3 and self.mouse_press == True)):
-            # 获取本图横纵轴范围
-            x_min, x_max = self.plot_ax.get_xlim()
-            y_min, y_max = self.plot_ax.get_ylim()
-            subplot_width = x_max - x_min
-            subplot_height = y_max - y_min
-            updated_x_min = x_min
-            updated_x_max = x_max
-            updated_y_min = y_min
-            updated_y_max = y_max
-
-            # 滚轮缩放事件响应
+            # 滚轮缩放事件响应, 同一帧内多次滚动的缩放系数累乘
             if event.name == 'scroll_event':
+                if self.blit_manager is not None:
+                    self.blit_manager.scroll_interaction()
                 scale_factor = 0.9 if event.button == 'up' else 1.1
-                fig_width_px, fig_height_px = self.fig.canvas.get_width_height()
-
-                if event.xdata > (x_min + subplot_width / 5.0):
-                    self.mouse_scroll_rx = scale_factor # 横轴缩放系数
-                    self.mouse_scroll_ry = 1.0          # 纵轴缩放系数
-
-                    # 横轴缩放参数
-                    x_mid = (x_max + x_min) / 2.0
-                    updated_x_min = x_mid - (subplot_width / 2.0) * self.mouse_scroll_rx
-                    updated_x_max = x_mid + (subplot_width / 2.0) * self.mouse_scroll_rx
+                x_min, x_max = self.plot_ax.get_xlim()
+                if event.xdata > (x_min + (x_max - x_min) / 5.0):
+                    self.pending_scroll_rx *= scale_factor # 横轴缩放系数
                 else:
-                    self.mouse_scroll_rx = 1.0          # 横轴缩放系数
-                    self.mouse_scroll_ry = scale_factor # 纵轴缩放系数
+                    self.pending_scroll_ry *= scale_factor # 纵轴缩放系数
+                self.schedule(event, self.apply_scroll)
 
-                    # 纵轴缩放参数
-                    y_mid = (y_max + y_min) / 2.0
-                    updated_y_min = y_mid - (subplot_height / 2.0) * self.mouse_scroll_ry
-                    updated_y_max = y_mid + (subplot_height / 2.0) * self.mouse_scroll_ry
+            # 鼠标点选事件响应, 右键点在标签上时只删除标签, 不开始拖动
+            removed = event.name == 'button_press_event' and self.pick_event(event)
 
             # 鼠标拖动事件响应
-            if event.name == 'button_press_event' and event.button == 3:
+            if event.name == 'button_press_event' and event.button == 3 and not removed:
                 self.mouse_press = True
                 self.mouse_move_start_x = event.xdata
                 self.mouse_move_start_y = event.ydata
+                if self.blit_manager is not None:
+                    self.blit_manager.begin_interaction()
             elif event.name == 'button_release_event' and event.button == 3:
-                self.mouse_press = False
+                self.end_drag()
             elif event.name == 'motion_notify_event' and event.button == 3 and self.mouse_press:
-                mx = event.xdata - self.mouse_move_start_x
-                my = event.ydata - self.mouse_move_start_y
-                self.mouse_move_rx = mx / subplot_width
-                self.mouse_move_ry = my / subplot_height
-
-                updated_x_min = x_min - mx
-                updated_x_max = x_min - mx + subplot_width
-                updated_y_min = y_min - my
-                updated_y_max = y_min - my + subplot_height
-            
-            self.plot_ax.set_xlim(updated_x_min, updated_x_max)
-            self.plot_ax.set_ylim(updated_y_min, updated_y_max)
-            self.plot_ax.set_xticks(np.linspace(updated_x_min, updated_x_max, self.xticks_density))
+                # 事件坐标基于尚未更新的坐标轴范围, 同一帧内只需处理最后一个事件
+                self.schedule(event, self.apply_motion)
 
-            if (self.mouse_event_callback is not None) and (event.name == 'scroll_event' or (event.name == 'motion_notify_event' and self.mouse_press) or (event.name == 'button_press_event' and event.button == 1)):
+            if (self.mouse_event_callback is not None) and (event.name == 'button_press_event' and event.button == 1):
                 self.mouse_event_callback(self, event)
 
             #self.fig.canvas.draw_idle()
+        elif event.name == 'button_release_event' and event.button == 3 and self.mouse_press:
+            # 在坐标轴外松开右键也要结束拖动
+            self.end_drag()
+
+    def schedule(self, event: matplotlib.backend_bases.MouseEvent, task: callable) -> None:
+        """
+        把平移缩放交给调度器在下一帧执行, 没有调度器时立即执行
+        """
+        self.pending_event = event
+        if self.scheduler is not None:
+            self.scheduler.post((self, task.__name__), task)
+        else:
+            task()
+
+    def end_drag(self) -> None:
+        """
+        结束右键拖动, 先处理尚未执行的平移再结束局部刷新
+        """
+        self.mouse_press = False
+        if self.scheduler is not None:
+            self.scheduler.flush()
+        if self.blit_manager is not None:
+            self.blit_manager.end_interaction()
+
+    def apply_scroll(self) -> None:
+        """
+        按累计的缩放系数缩放本图, 并同步其它子图
+        """
+        x_min, x_max = self.plot_ax.get_xlim()
+        y_min, y_max = self.plot_ax.get_ylim()
+        self.mouse_scroll_rx = self.pending_scroll_rx
+        self.mouse_scroll_ry = self.pending_scroll_ry
+        self.pending_scroll_rx = 1.0
+        self.pending_scroll_ry = 1.0
+
+        # 以中点为中心缩放
+        x_mid = (x_max + x_min) / 2.0
+        y_mid = (y_max + y_min) / 2.0
+        updated_x_min = x_mid - ((x_max - x_min) / 2.0) * self.mouse_scroll_rx
+        updated_x_max = x_mid + ((x_max - x_min) / 2.0) * self.mouse_scroll_rx
+        updated_y_min = y_mid - ((y_max - y_min) / 2.0) * self.mouse_scroll_ry
+        updated_y_max = y_mid + ((y_max - y_min) / 2.0) * self.mouse_scroll_ry
+        self.apply_view(updated_x_min, updated_x_max, updated_y_min, updated_y_max)
+
+    def apply_motion(self) -> None:
+        """
+        按最后一个拖动事件平移本图, 并同步其它子图
+        """
+        event = self.pending_event
+        if not self.mouse_press or event.xdata is None or event.ydata is None:
+            return
+        x_min, x_max = self.plot_ax.get_xlim()
+        y_min, y_max = self.plot_ax.get_ylim()
+        subplot_width = x_max - x_min
+        subplot_height = y_max - y_min
+        mx = event.xdata - self.mouse_move_start_x
+        my = event.ydata - self.mouse_move_start_y
+        self.mouse_move_rx = mx / subplot_width
+        self.mouse_move_ry = my / subplot_height
+        self.apply_view(x_min - mx, x_min - mx + subplot_width, y_min - my, y_min - my + subplot_height)
+
+    def apply_view(self, x_min: float, x_max: float, y_min: float, y_max: float) -> None:
+        """
+        设置本图显示范围, 调用外部回调同步其它子图后刷新画布
+        """
+        # 设置范围时共享横轴的子图同步范围并重新降采样
+        with profile_span(self.profiler, 'apply_view', PHASE_SYNC):
+            self.plot_ax.set_xlim(x_min, x_max)
+            if not self.auto_ylim: # 纵轴自适应时纵轴已由横轴范围变化回调设置
+                self.plot_ax.set_ylim(y_min, y_max)
+            if self.mouse_event_callback is not None:
+                self.mouse_event_callback(self, self.pending_event)
+        self.redraw()
 
 class ExcelPlotSubfigure(ExcelPlotBaseFigure):
     """
@@ -254,7 +565,6 @@ class ExcelPlotSubfigure(ExcelPlotBaseFigure):
     """
     def __init__(self, name: str, cursor_info: CursorInfo) -> None:
         super().__init__(name=name, fig=None, cursor_info=cursor_info, mouse_event_callback=None)
-        self.vline: matplotlib.lines.Line2D = None
         self.button_event_callback: callable
 
         # 控件位置参数
@@ -267,6 +577,8 @@ class ExcelPlotSubfigure(ExcelPlotBaseFigure):
         self.button: matplotlib.widgets.Button
         self.check_buttons_ax: matplotlib.axes.Axes
         self.check_buttons: matplotlib.widgets.CheckButtons
+        self.materialized = False # 曲线图和复选框是否已创建
+        self.x_sorted: bool = None
 
     def plot(
         self,
@@ -276,19 +588,21 @@ class ExcelPlotSubfigure(ExcelPlotBaseFigure):
         check_buttons_ax_pos: np.ndarray,
         x_axis_data: np.ndarray,
         mouse_event_callback: callable,
-        button_event_callback: callable
+        button_event_callback: callable,
+        blit_manager: BlitManager = None,
+        scheduler: RedrawScheduler = None,
+        x_sorted: bool = None,
+        sharex: matplotlib.axes.Axes = None
     ) -> None:
         """
-        子图绘制, 调用父类方法进行绘制, 子类添加复选框控件
+        子图绘制, 先创建子图按键, 可见的子图随即创建曲线图和复选框
+        隐藏的子图只记录绘制参数, 第一次显示时再调用materialize创建, 启动时不为其绘制曲线和构建降采样索引
         """
         self.fig = fig
-        self.fig.canvas.mpl_connect('scroll_event',        self.mouse_toggle_event)
-        self.fig.canvas.mpl_connect('button_press_event',  self.mouse_toggle_event)
-        self.fig.canvas.mpl_connect('motion_notify_event', self.mouse_toggle_event)
-        self.fig.canvas.mpl_connect('button_press_event',  self.mouse_toggle_event)
-
-        # 调用父类方法, 绘制曲线图
-        super().plot(plot_ax_pos, x_axis_data)
+        self.x_axis_data = x_axis_data
+        self.x_sorted = x_sorted
+        self.blit_manager = blit_manager
+        self.scheduler = scheduler
 
         # 绑定鼠标事件外部回调函数
         self.mouse_event_callback = mouse_event_callback
@@ -300,17 +614,51 @@ class ExcelPlotSubfigure(ExcelPlotBaseFigure):
         self.button = Button(ax=self.button_ax, label=self.name)
         self.button.on_clicked(self.button_toggle_event)
 
+        if self.visible:
+            self.materialize(plot_ax_pos, check_buttons_ax_pos, sharex)
+
+    def materialize(self, plot_ax_pos: np.ndarray, check_buttons_ax_pos: np.ndarray, sharex: matplotlib.axes.Axes = None) -> None:
+        """
+        创建曲线图和复选框并绑定鼠标事件, 与已有子图共享横轴时沿用当前的显示范围
+        """
+        self.fig.canvas.mpl_connect('scroll_event',         self.mouse_toggle_event)
+        self.fig.canvas.mpl_connect('button_press_event',   self.mouse_toggle_event)
+        self.fig.canvas.mpl_connect('motion_notify_event',  self.mouse_toggle_event)
+        self.fig.canvas.mpl_connect('button_release_event', self.mouse_toggle_event)
+
+        # 调用父类方法, 绘制曲线图
+        super().plot(plot_ax_pos, self.x_axis_data, self.x_sorted, sharex)
+        if self.blit_manager is not None:
+            self.blit_manager.add_axes(self.plot_ax)
+
         # 创建子图复选框
         self.check_buttons_ax = self.fig.add_axes(check_buttons_ax_pos)
         labels = [curve.label for curve in self.curves]
         visibility = [curve.visible for curve in self.curves]
         self.check_buttons = CheckButtons(ax=self.check_buttons_ax, labels=labels, actives=visibility)
         self.check_buttons.on_clicked(self.checkbuttons_toggle_event)
+        self.materialized = True
 
+    def set_layout(self, plot_ax_pos: np.ndarray, check_buttons_ax_pos: np.ndarray) -> None:
+        """
+        按可见状态调整子图布局, 隐藏的子图整体不参与绘制
+        """
+        if not self.materialized:
+            return
+        self.plot_ax.set_visible(self.visible)
+        self.check_buttons_ax.set_visible(self.visible)
+        if self.visible:
+            self.plot_ax.set_position(plot_ax_pos)
+            self.check_buttons_ax.set_position(check_buttons_ax_pos)
+
+    @profiled(PHASE_EVENT)
     def mouse_toggle_event(self, event: matplotlib.backend_bases.MouseEvent) -> None:
         """
         鼠标事件回调函数, 继承父类的标签显示, 右键拖动, 滚轮缩放功能, 添加左键点击空白处显示时间刻度功能
         """
+        # 隐藏的子图不响应鼠标事件
+        if not self.visible:
+            return
         # 调用父类方法
         super().mouse_toggle_event(event)
 
@@ -319,25 +667,23 @@ class ExcelPlotSubfigure(ExcelPlotBaseFigure):
             event.name == 'button_press_event' or event.name == 'button_release_event' or \
             (event.name == 'motion_notify_event' and event.button == 3 and self.mouse_press == True)):
             if event.name == 'button_press_event' and event.button == 1:
-                for sel in self.cursor.selections:
-                    annotation = sel.annotation
-                    bbox = annotation.get_window_extent()
-                    if bbox.contains(event.x, event.y):
-                        return
-                if self.vline is not None:
-                    self.vline.remove()
-                self.vline = self.plot_ax.axvline(x=event.xdata, color='black', linewidth=1, visible=True)
-
-            # 鼠标操作有效更新画布, 防止卡顿
-            self.fig.canvas.draw_idle()
+                if self.pressed_on_annotation:
+                    return
+                self.draw_vline(event.xdata)
 
+            # 鼠标操作有效更新画布, 防止卡顿; 平移缩放由调度器每帧刷新一次
+            if event.name != 'motion_notify_event' and event.name != 'scroll_event':
+                self.redraw()
+
+    @profiled(PHASE_EVENT)
     def checkbuttons_toggle_event(self, label: str) -> None:
         """
         复选框点击事件回调函数, 设置曲线是否可见
         """
         index = [curve.label for curve in self.curves].index(label)
-        self.curves[index].visible = not self.curves[index].visible
-        self.curves[index].line.set_visible(self.curves[index].visible)
+        self.curves[index].set_visible(not self.curves[index].visible)
+        if self.auto_ylim:
+            self.autoscale_y()
         self.fig.canvas.draw_idle() 
 
     def button_toggle_event(self, event) -> None:
@@ -349,7 +695,8 @@ class ExcelPlotSubfigure(ExcelPlotBaseFigure):
 
 class ExcelPlotUi:
     """
-    excel数据绘图工具主类, 继承于绘图基类, 根据子图中的操作调整界面布局及同步各子图横轴动作, 默认显示2幅图, 最多显示3幅图
+    excel数据绘图工具主类, 继承于绘图基类, 根据子图中的操作调整界面布局及同步各子图横轴动作
+    默认显示2幅图, 最多同时显示visible_subplot_num_max幅图, 各子图共享同一个横轴, 同步代价与子图数量无关
     功能:
         点击按键显示或隐藏某类数据
         点击复选框显示或隐藏某条曲线
@@ -368,8 +715,10 @@ class ExcelPlotUi:
         self.subplots: list[ExcelPlotSubfigure] = []
         self.data_category_num = 0
         self.default_visible_subplot_num = 2
-        self.visible_subplot_num_max = 3
-        self.visible_subplots_dq = deque(maxlen=self.visible_subplot_num_max)
+        self.visible_subplot_num_max = 3 # 可在添加子图前修改
+        self.visible_subplots_dq = deque()
+        self.shared_ax: matplotlib.axes.Axes = None # 各子图共享横轴的坐标轴, 为第一个创建的曲线图
+        self.vline_x: float = None # 时间竖线位置, 隐藏的子图重新显示时补画
 
         # 子图控件布局参数
         self.subplot2left = 0.13
@@ -391,31 +740,46 @@ class ExcelPlotUi:
         self.check_buttons_plot_step = 1.0 / max(self.subplot_num, 1)
 
         self.y_sync = False # 同画布下多个子图是否同步纵轴
-
-    def open_file(self) -> pd.DataFrame:
+        self.auto_ylim = False # 各子图纵轴是否自适应可见数据, 同时开启y_sync时各子图取所有可见子图数据的合并范围
+        self.blit = True    # 后端支持时是否开启局部刷新
+        self.file_cache = FileCache() # 数据文件二进制缓存, 设为None时每次都重新解析
+        self.mmap = False             # 是否以内存映射方式打开缓存, 用于超过物理内存的数据
+        self.dtype_policy = DtypePolicy() # 读取后压缩各列类型, 设为None时保持解析得到的类型
+        self.blit_manager: BlitManager = None
+        self.max_fps = 60   # 平移缩放的最大刷新帧率
+        self.scheduler: RedrawScheduler = None
+        self.profiler: Profiler = None # 设为Profiler()开启性能记录, 需在plot前设置
+
+    @profiled(PHASE_LOAD)
+    def open_file(self, file_path: str = None, usecols: list[str] = None, x_range: tuple[str, float, float] = None, x_label: str = None) -> pd.DataFrame:
         """
-        打开对话框选择文件
+        读取数据文件, file_path为None时打开对话框选择文件
+        usecols为需要绘制及在标签中显示的列名, 只读取这些列, 为None时读取全部列
+        mmap为True时返回内存映射的ColumnStore, 按列名取列的用法与DataFrame相同
+        x_range为(横轴列名, 最小值, 最大值)时只读取横轴在该范围内的行, 横轴需单调递增, 支持CSV和Parquet
+        x_label为横轴列名, 横轴列保持读取时的类型, 不按dtype_policy压缩
         """
-        root = tk.Tk()
-        root.withdraw()
-        file_path = filedialog.askopenfilename()
+        if file_path is None:
+            root = tk.Tk()
+            root.withdraw()
+            file_path = filedialog.askopenfilename()
+        dtype_policy = self.dtype_policy
+        if dtype_policy is not None:
+            dtype_policy = dtype_policy.with_keep_columns([x_label, x_range[0] if x_range is not None else None])
         data_frame: pd.DataFrame
         try:
-            data_frame = pd.read_csv(file_path)
+            if x_range is not None:
+                data_frame = load_data_window(file_path, *x_range, usecols=usecols, cache=self.file_cache, dtype_policy=dtype_policy)
+            else:
+                data_frame = load_data_file(file_path, usecols=usecols, progress_callback=print_progress, cache=self.file_cache, mmap=self.mmap, dtype_policy=dtype_policy)
             print("Read file successfully!")
-        except pd.errors.ParserError:
-            print("CSV file format error!")
-            sys.exit(1)
+            print(f"Data memory: {data_nbytes(data_frame) / 2**20:.1f} MiB")
         except FileNotFoundError:
             print("File Not Found!")
             sys.exit(1)
-        except Exception as e:
-            try:
-                data_frame = pd.read_excel(file_path)
-                print("Read file successfully!")
-            except pd.errors.ParserError:
-                print(f"Read file failed: {e}!")
-                sys.exit(1)
+        except DataFileError as e:
+            print(f"Read file failed: {e}!")
+            sys.exit(1)
         return data_frame
 
     def add_subplot(self, subplot: ExcelPlotSubfigure) -> None:
@@ -432,6 +796,60 @@ class ExcelPlotUi:
         if self.subplot_num > self.default_visible_subplot_num:
             self.subplot_num = self.default_visible_subplot_num
 
+    def read_layout(self, layout) -> dict:
+        """
+        layout为文件路径时读取布局文件, 为dict时检查内容后直接返回
+        """
+        try:
+            if isinstance(layout, str):
+                return load_layout(layout)
+            check_layout(layout)
+            return layout
+        except LayoutError as e:
+            print(f"Read layout failed: {e}!")
+            sys.exit(1)
+
+    def open_layout(self, layout, file_path: str = None) -> pd.DataFrame:
+        """
+        按布局读取数据文件并创建子图及曲线, 只读取布局中用到的列
+        layout为布局dict或JSON/YAML/TOML布局文件路径, file_path为None时打开对话框选择文件
+        """
+        layout = self.read_layout(layout)
+        data_frame = self.open_file(file_path, usecols=layout_columns(layout), x_label=layout['x'])
+        try:
+            data_frame = layout_frame(layout, data_frame)
+            self.add_layout(layout, data_frame)
+        except (LayoutError, ExpressionError) as e:
+            print(f"Layout error: {e}!")
+            sys.exit(1)
+        return data_frame
+
+    def add_layout(self, layout: dict, data_frame: pd.DataFrame) -> None:
+        """
+        按布局创建标签信息, 子图及曲线并添加到界面
+        """
+        cursor_info = CursorInfo()
+        for name in layout.get('cursor_info', []):
+            cursor_info.add_info(name=name, data=data_frame[name])
+        for subplot_layout in layout['subplots']:
+            subplot = ExcelPlotSubfigure(name=subplot_layout.get('name', ''), cursor_info=cursor_info)
+            for curve_layout in subplot_layout['curves']:
+                subplot.add_curve(ExcelPlotCurve(
+                    y_axis_data=data_frame[curve_layout['column']],
+                    label=curve_layout.get('label', curve_layout['column']),
+                    color=curve_layout.get('color'),
+                    visible=curve_layout.get('visible', True)
+                ))
+            self.add_subplot(subplot)
+
+    def plot_layout(self, layout, file_path: str = None) -> None:
+        """
+        按布局读取数据文件并绘制界面
+        """
+        layout = self.read_layout(layout)
+        data_frame = self.open_layout(layout, file_path)
+        self.plot(suptitle=layout.get('title', ''), x_axis_data=data_frame[layout['x']])
+
     def cal_ax_poses(self, data_category_idx: int) -> None:
         """
         大图分配各控件布局位置
@@ -452,7 +870,15 @@ class ExcelPlotUi:
         """
         self.fig = plt.figure(self.title)
         self.fig.suptitle(suptitle)
-
+        self.blit_manager = BlitManager(self.fig, enabled=self.blit)
+        self.scheduler = RedrawScheduler(self.fig, max_fps=self.max_fps)
+        if self.profiler is not None:
+            self.profiler.attach(self.fig, self.blit_manager)
+
+        # 各子图共用同一份横轴数据, 单调性只判断一次
+        x_axis_data = np.asarray(x_axis_data)
+        x_sorted = is_sorted(x_axis_data)
+        self.shared_ax = None
         for i in range(self.data_category_num):
             subplot = self.subplots[i]
 
@@ -460,6 +886,8 @@ class ExcelPlotUi:
             if i >= self.default_visible_subplot_num:
                 subplot_default_visibile = False
             plot_pos, button_pos, check_buttons_pos = self.cal_ax_poses(i)
+            subplot.profiler = self.profiler
+            subplot.auto_ylim = self.auto_ylim
             subplot.plot(
                 fig=self.fig,
                 plot_ax_pos=plot_pos,
@@ -467,8 +895,17 @@ class ExcelPlotUi:
                 check_buttons_ax_pos=check_buttons_pos,
                 x_axis_data=x_axis_data,
                 mouse_event_callback=self.subplot_mouse_toggle_event,
-                button_event_callback=self.subplot_button_toggle_event
+                button_event_callback=self.subplot_button_toggle_event,
+                blit_manager=self.blit_manager,
+                scheduler=self.scheduler,
+                x_sorted=x_sorted,
+                sharex=self.shared_ax
             )
+            if self.shared_ax is None and subplot.materialized:
+                self.shared_ax = subplot.plot_ax
+        self.sync_auto_ylim()
+        decimation_nbytes = sum(subplot.decimation_nbytes() for subplot in self.subplots)
+        print(f"Decimation index memory: {decimation_nbytes / 2**20:.1f} MiB")
         plt.show()
 
     def subplot_button_toggle_event(self, major_subplot: ExcelPlotSubfigure) -> None:
@@ -490,180 +927,670 @@ class ExcelPlotUi:
                     subplot_miss.visible = False
                 self.visible_subplots_dq.append(major_subplot)
 
-        # 调整整体布局
+        # 调整整体布局, 隐藏的子图不参与绘制
         for i in range(self.data_category_num):
             subplot = self.subplots[i]
-            if subplot in self.visible_subplots_dq:
-                # 可见队列中的子图重新布局
-                plot_pos, button_pos, check_buttons_pos = self.cal_ax_poses(self.visible_subplots_dq.index(subplot))
+            if subplot not in self.visible_subplots_dq:
+                subplot.set_layout(None, None)
+                continue
+            # 可见队列中的子图重新布局
+            plot_pos, button_pos, check_buttons_pos = self.cal_ax_poses(self.visible_subplots_dq.index(subplot))
+            if not subplot.materialized:
+                # 第一次显示时才创建曲线图和复选框
+                subplot.materialize(plot_pos, check_buttons_pos, self.shared_ax)
+                if self.vline_x is not None:
+                    subplot.draw_vline(self.vline_x)
             else:
-                # 把非可见队列中的子图都放到看不见的区域
-                plot_pos, button_pos, check_buttons_pos = self.cal_ax_poses(4)
-            # 更新子图布局
-            subplot.plot_ax.set_position(plot_pos)
-            #subplot.button_ax.set_position(button_pos)
-            subplot.check_buttons_ax.set_position(check_buttons_pos)
+                subplot.set_layout(plot_pos, check_buttons_pos)
+        # 隐藏期间跳过了降采样, 按当前范围补算
+        if major_subplot.materialized:
+            major_subplot.update_curves_view()
+        self.sync_auto_ylim()
 
         # 画布更新
         self.fig.canvas.draw_idle()
 
+    @profiled(PHASE_SYNC)
     def subplot_mouse_toggle_event(self, major_subplot: ExcelPlotSubfigure, mouse_event: matplotlib.backend_bases.MouseEvent) -> None:
         """
         子图中的鼠标事件回调函数, 同步各子图行为
+        横轴范围和刻度由共享横轴自动同步, 这里只同步时间竖线, 以及开启y_sync时的纵轴
         """
-        for other_subplot in self.subplots:
+        # 同步竖线
+        if mouse_event.name == 'button_press_event' and mouse_event.button == 1:
+            if major_subplot.pressed_on_annotation:
+                return
+            self.vline_x = mouse_event.xdata
+            for other_subplot in self.subplots:
+                if other_subplot is not major_subplot and other_subplot.materialized:
+                    other_subplot.draw_vline(mouse_event.xdata)
+            return
+
+        if False == self.y_sync:
+            return
+        if self.auto_ylim:
+            # 各子图纵轴已由横轴范围变化回调设置, 改为取合并范围
+            if mouse_event.name == 'scroll_event' or mouse_event.name == 'motion_notify_event':
+                self.sync_auto_ylim()
+            return
+        for other_subplot in self.visible_subplots_dq:
             if other_subplot is major_subplot:
                 continue
-
-            # 获取子图横纵轴更新范围
-            x_min, x_max = other_subplot.plot_ax.get_xlim()
             y_min, y_max = other_subplot.plot_ax.get_ylim()
-            subplot_width  = x_max - x_min
             subplot_height = y_max - y_min
-            updated_x_min = x_min
-            updated_x_max = x_max
-            updated_y_min = y_min
-            updated_y_max = y_max
-
-            # 同步竖线
-            if mouse_event.name == 'button_press_event' and mouse_event.button == 1:
-                for sel in major_subplot.cursor.selections:
-                    annotation = sel.annotation
-                    bbox = annotation.get_window_extent()
-                    if bbox.contains(mouse_event.x, mouse_event.y):
-                        return
-                if other_subplot.vline is not None:
-                    other_subplot.vline.remove()
-                other_subplot.vline = other_subplot.plot_ax.axvline(x=mouse_event.xdata, color='black', linewidth=1, visible=True)
-            
-            elif mouse_event.name == 'scroll_event':
-                # 横向缩放
-                x_mid = (x_max + x_min) / 2.0
+            if mouse_event.name == 'scroll_event':
+                # 纵向缩放
                 y_mid = (y_max + y_min) / 2.0
-                updated_x_min = x_mid - (subplot_width  / 2.0) * major_subplot.mouse_scroll_rx
-                updated_x_max = x_mid + (subplot_width  / 2.0) * major_subplot.mouse_scroll_rx
                 updated_y_min = y_mid - (subplot_height / 2.0) * major_subplot.mouse_scroll_ry
                 updated_y_max = y_mid + (subplot_height / 2.0) * major_subplot.mouse_scroll_ry
-            
             elif mouse_event.name == 'motion_notify_event':
-                # 横向移动
-                mx = subplot_width  * major_subplot.mouse_move_rx
-                my = subplot_height * major_subplot.mouse_move_ry
-                updated_x_min = x_min - mx
-                updated_x_max = x_min - mx + subplot_width
                 # 纵向移动
+                my = subplot_height * major_subplot.mouse_move_ry
                 updated_y_min = y_min - my
                 updated_y_max = y_min - my + subplot_height
+            else:
+                continue
+            other_subplot.plot_ax.set_ylim(updated_y_min, updated_y_max)
 
-            # 其它子图同步更新
-            other_subplot.plot_ax.set_xlim(updated_x_min, updated_x_max)
-            if True == self.y_sync:
-                other_subplot.plot_ax.set_ylim(updated_y_min, updated_y_max)
-            other_subplot.plot_ax.set_xticks(np.linspace(updated_x_min, updated_x_max, other_subplot.xticks_density))
+        # 画布由触发事件的子图统一刷新, 此处不再重复重绘
 
-        # 画布更新
-        self.fig.canvas.draw_idle()
+    def sync_auto_ylim(self) -> None:
+        """
+        同时开启auto_ylim和y_sync时, 各可见子图的纵轴设为所有可见子图在当前横轴范围内数据的合并范围
+        """
+        if not self.auto_ylim or not self.y_sync:
+            return
+        subplots = [subplot for subplot in self.visible_subplots_dq if subplot.materialized]
+        extents = [subplot.visible_extent() for subplot in subplots]
+        extents = [extent for extent in extents if extent is not None]
+        if not extents:
+            return
+        extent = (min(extent[0] for extent in extents), max(extent[1] for extent in extents))
+        for subplot in subplots:
+            subplot.autoscale_y(extent)
+
+    def set_auto_ylim(self, auto_ylim: bool) -> None:
+        """
+        开启或关闭各子图的纵轴自适应, 可在绘制后调用
+        """
+        self.auto_ylim = auto_ylim
+        for subplot in self.subplots:
+            if subplot.materialized:
+                subplot.set_auto_ylim(auto_ylim)
+            else:
+                subplot.auto_ylim = auto_ylim # 第一次显示时按此设置
+        self.sync_auto_ylim()
+        if isinstance(self.fig, matplotlib.figure.Figure):
+            self.fig.canvas.draw_idle()
 
 class ExcelPlotUiMini(ExcelPlotBaseFigure):
     """
     excel数据绘图工具, 继承于绘图基类
     功能:
-        点击按键打开任意数据文件
+        点击按键打开任意数据文件, 文件在后台读取, 读取期间再次点击按键取消
+        点击Follow按键跟踪持续追加写入的CSV文件, 定时读取新增的行并延长曲线
         点击复选框显示或隐藏某条曲线
         鼠标左键点击曲线显示标签信息
         鼠标右键按住空白处拖动移动
         鼠标滚轮缩放
     """
-    def __init__(self, name: str, fig: matplotlib.figure.Figure) -> None:
-        super().__init__(name=name, fig=fig, cursor_info=None, mouse_event_callback=None)
+    def __init__(self, name: str, fig: matplotlib.figure.Figure, blit: bool = True, max_fps: float = 60, follow_interval: int = 200, profiler: Profiler = None) -> None:
+        super().__init__(
+            name=name,
+            fig=fig,
+            cursor_info=None,
+            mouse_event_callback=None,
+            blit_manager=BlitManager(fig, enabled=blit),
+            scheduler=RedrawScheduler(fig, max_fps=max_fps)
+        )
+        # 开启性能记录时记录画布重绘
+        self.profiler = profiler
+        if self.profiler is not None:
+            self.profiler.attach(self.fig, self.blit_manager)
 
         self.data_frame: pd.DataFrame = None
         self.check_buttons_labels: list[str] = None
         self.plot_ax_pos           = [0.130, 0.05, 0.80, 0.89]
-        self.button_ax_pos        = [0.005, 0.95, 0.10, 0.03]
+        self.button_ax_pos        = [0.005, 0.95, 0.05, 0.03]
+        self.follow_button_ax_pos = [0.057, 0.95, 0.048, 0.03]
         self.check_buttons_ax_pos = [0.005, 0.05, 0.10, 0.89]
         self.plot_ax          = self.fig.add_axes(self.plot_ax_pos)
         self.button_ax        = self.fig.add_axes(self.button_ax_pos)
+        self.follow_button_ax = self.fig.add_axes(self.follow_button_ax_pos)
         self.check_buttons_ax = self.fig.add_axes(self.check_buttons_ax_pos)
+        self.blit_manager.add_axes(self.plot_ax)
 
         # 创建控件
         self.button = Button(ax=self.button_ax, label="Open File")
         self.button.on_clicked(self.button_toggle_event)
+        self.follow_button = Button(ax=self.follow_button_ax, label="Follow")
+        self.follow_button.on_clicked(self.follow_button_toggle_event)
         self.check_buttons: CheckButtons = None
-        self.vline: matplotlib.lines.Line2D = None
+        self.status_text = self.fig.text(0.130, 0.955, "", fontsize=9) # 读取进度及错误信息
 
         self.is_x_choosed = False
         self.x_label = ""
+        self.x_sorted = False # 横轴是否单调, 选择横轴后计算一次, 追加曲线时复用
         self.curves: list[ExcelPlotCurve] = []
+        self.file_cache = FileCache() # 数据文件二进制缓存, 设为None时每次都重新解析
+        self.mmap = False             # 是否以内存映射方式打开缓存, 用于超过物理内存的数据
+        self.dtype_policy = DtypePolicy() # 读取后压缩各列类型, 设为None时保持解析得到的类型
+
+        # 跟踪模式相关参数
+        self.tail_reader: CsvTailReader = None # 跟踪中的文件, 为None表示未开启跟踪
+        self.follow_interval = follow_interval # 读取新增数据的间隔, 单位ms
+        self.follow_timer = None
+
+        # 后台读取相关参数
+        self.loader: BackgroundLoader = None # 读取中的任务, 为None表示空闲
+        self.loading_interval = 100          # 查询读取进度的间隔, 单位ms
+        self.loading_timer = None
+        self.loading_start_time = 0.0        # 开始读取的时间, 用于记录读取耗时
+
+        # 多文件对比相关参数
+        self.runs: RunSet = None  # 同时打开多个文件时的对比数据, 为None表示只打开了一个文件
+        self.align = ALIGN_OFFSET # 多个文件横轴的对齐方式, 见compare模块
+        self.load_workers = None  # 同时读取的文件数, 为None时取文件数和CPU核数的较小值
+        self.channel_curves: dict[str, list[ExcelPlotCurve]] = {} # 对比模式下每列在各次运行中的曲线
+        self.curve_runs: dict[ExcelPlotCurve, int] = {}            # 对比模式下曲线所属的运行序号
+
+        # 派生通道, 名称到表达式的映射, 读取数据后作为复选框中的通道显示, 第一次勾选时才计算
+        self.expressions: dict[str, str] = {}
+
+        # 按横轴范围读取时的滑动窗口, 为None表示已读取全部数据
+        self.window: SlidingWindow = None
+
+        # 当前文件的列统计信息, 用于直接得到横轴范围及单调性; 再次打开文件时先显示sidecar中的概览, 读取完成后替换为完整数据
+        self.stats: FileStats = None
+        self.overview = False # 是否正在显示概览
+
+    def open_file(self, file_path: str = None) -> None:
+        """
+        在后台线程读取数据文件, file_path为None时打开对话框选择文件, 对话框中选择多个文件时进入对比模式
+        """
+        if file_path is None:
+            root = tk.Tk()
+            root.withdraw()
+            self.open_files(list(filedialog.askopenfilenames()))
+        else:
+            self.open_files([file_path])
 
-    def open_file(self) -> None:
+    @profiled(PHASE_LOAD)
+    def open_files(self, file_paths: list[str]) -> None:
         """
-        打开对话框选择文件
+        在后台线程读取数据文件, 多个文件并行读取, 读取完成后各文件的同名列叠加显示
+        读取完成后由界面线程的定时器取回数据并重建复选框, 读取失败只报告错误
         """
-        root = tk.Tk()
-        root.withdraw()
-        file_path = filedialog.askopenfilename()
-        data_frame: pd.DataFrame
-        try:
-            data_frame = pd.read_csv(file_path)
+        if not file_paths:
+            return # 对话框被取消
+        if self.loader is not None:
+            self.loader.cancel()
+
+        if len(file_paths) == 1:
+            self.loader = BackgroundLoader(file_paths[0], with_stats=True, cache=self.file_cache, mmap=self.mmap, dtype_policy=self.dtype_policy)
+            stats = FileStats.read(file_paths[0], self.file_cache)
+            if stats is not None:
+                self.show_overview(stats)
+        else:
+            self.loader = MultiFileLoader(file_paths, workers=self.load_workers, cache=self.file_cache, mmap=self.mmap, dtype_policy=self.dtype_policy)
+        self.loader.start()
+        self.loading_start_time = time.perf_counter()
+        self.button.label.set_text("Cancel")
+        self.set_status(f"Reading {os.path.basename(self.loader.file_path)}: 0%")
+        if self.loading_timer is None:
+            self.loading_timer = self.fig.canvas.new_timer(interval=self.loading_interval)
+            self.loading_timer.add_callback(self.poll_loading)
+        self.loading_timer.start()
+
+    def poll_loading(self) -> None:
+        """
+        读取进度定时器回调, 在界面线程中更新进度, 读取结束后取回数据或报告错误
+        """
+        loader = self.loader
+        if loader is None:
+            return
+        file_name = os.path.basename(loader.file_path)
+        if not loader.done:
+            if not loader.cancelled:
+                self.set_status(f"Reading {file_name}: {loader.progress:.0%}")
+            return
+
+        self.loading_timer.stop()
+        self.loader = None
+        self.button.label.set_text("Open File")
+        if self.profiler is not None:
+            self.profiler.record('background_load', PHASE_LOAD, self.loading_start_time, time.perf_counter())
+        if loader.cancelled:
+            print("Read file cancelled!")
+            self.set_status(f"Reading {file_name} cancelled")
+        elif isinstance(loader.error, FileNotFoundError):
+            print("File Not Found!")
+            self.set_status(f"File {file_name} not found")
+        elif loader.error is not None:
+            print(f"Read file failed: {loader.error}!")
+            self.set_status(f"Read {file_name} failed: {loader.error}")
+        elif isinstance(loader, MultiFileLoader):
+            print(f"Read {len(loader.result)} files successfully!")
+            print(f"Data memory: {sum(data_nbytes(result) for result in loader.result) / 2**20:.1f} MiB")
+            self.set_status("")
+            self.reset_plot()
+            self.window = None
+            self.stats = None
+            self.overview = False
+            self.runs = RunSet(loader.file_paths, [self.derive(result) for result in loader.result], align=self.align)
+            self.reset_check_buttons(self.runs.columns)
+            self.data_frame = self.runs.data_frames[0]
+        else:
             print("Read file successfully!")
-        except pd.errors.ParserError:
-            print("CSV file format error!")
-            sys.exit(1)
+            print(f"Data memory: {data_nbytes(loader.result) / 2**20:.1f} MiB")
+            self.set_status("")
+            self.stats = loader.stats
+            data_frame = self.derive(loader.result)
+            if self.overview and data_frame.columns == self.check_buttons_labels:
+                # 保留概览中已勾选的曲线, 只替换为完整数据
+                self.overview = False
+                self.data_frame = data_frame
+                self.replace_overview()
+                return
+            self.overview = False
+            self.reset_plot()
+            self.runs = None
+            self.window = None
+            self.data_frame = data_frame
+            self.reset_check_buttons(self.data_frame.columns)
+
+    def show_overview(self, stats: FileStats) -> None:
+        """
+        读取完成前显示sidecar中的概览, 复选框与读取完成后相同, 可以先选择横轴和曲线
+        """
+        self.stop_follow()
+        self.reset_plot()
+        self.runs = None
+        self.window = None
+        self.stats = stats
+        self.overview = True
+        self.data_frame = OverviewFrame(stats, list(self.expressions))
+        self.reset_check_buttons(self.data_frame.columns)
+
+    def replace_overview(self) -> None:
+        """
+        读取完成后把概览曲线替换为完整数据, 显示范围不变
+        未选择横轴时已勾选的曲线没有绘制, 只替换纵轴数据, 再次选择横轴时按完整数据绘制
+        """
+        if not self.is_x_choosed:
+            for curve in list(self.curves):
+                if curve.label in self.expressions and not self.evaluate_channel(curve.label):
+                    self.remove_curve(curve)
+                    continue
+                curve.y_axis_data = self.data_frame[curve.label]
+            return
+        self.x_axis_data = np.asarray(self.data_frame[self.x_label])
+        self.x_sorted = self.stats.sorted[self.x_label] if self.x_label in self.stats.sorted else is_sorted(self.x_axis_data)
+        for curve in list(self.curves):
+            if curve.label in self.expressions and not self.evaluate_channel(curve.label):
+                self.unplot_curve(curve)
+                continue
+            curve.set_data(self.x_axis_data, self.data_frame[curve.label], self.x_sorted)
+        self.update_curves_view()
+        self.fig.canvas.draw_idle()
+
+    def cancel_loading(self) -> None:
+        """
+        取消正在进行的读取, 后台线程在下一次报告进度时退出
+        """
+        if self.loader is not None and not self.loader.cancelled:
+            self.loader.cancel()
+            self.set_status(f"Cancelling {os.path.basename(self.loader.file_path)}...")
+
+    def set_status(self, text: str) -> None:
+        """
+        更新左上角的状态信息
+        """
+        self.status_text.set_text(text)
+        self.fig.canvas.draw_idle()
+
+    def reset_check_buttons(self, labels: list[str], actives: list[bool] = None) -> None:
+        """
+        按数据列名重建复选框控件, actives为各复选框是否勾选
+        """
+        self.check_buttons_ax.remove()
+        self.check_buttons_labels = labels
+        self.check_buttons_ax = self.fig.add_axes(self.check_buttons_ax_pos)
+        self.check_buttons = CheckButtons(ax=self.check_buttons_ax, labels=self.check_buttons_labels, actives=actives)
+        self.check_buttons.on_clicked(self.checkbuttons_toggle_event)
+
+    def derive(self, data_frame) -> DerivedFrame:
+        """
+        在读取的数据上附加派生通道, 表达式用到的列不存在时打印错误并跳过该通道
+        """
+        derived_frame = DerivedFrame(data_frame)
+        for name, expression in self.expressions.items():
+            try:
+                derived_frame.add_expression(name, expression)
+            except ExpressionError as e:
+                print(f"Skip derived channel {name}: {e}!")
+        return derived_frame
+
+    def add_expression(self, name: str, expression: str) -> None:
+        """
+        添加派生通道, 已读取数据时立即出现在复选框中, 已勾选的曲线保持不变
+        """
+        frames = [] if self.data_frame is None else (self.runs.data_frames if self.runs is not None else [self.data_frame])
+        try:
+            for data_frame in frames:
+                data_frame.add_expression(name, expression)
+        except ExpressionError as e:
+            print(f"Add derived channel {name} failed: {e}!")
+            self.set_status(f"Add {name} failed: {e}")
+            return
+        self.expressions[name] = expression
+        if frames:
+            columns = self.runs.columns if self.runs is not None else self.data_frame.columns
+            if self.runs is not None and name not in columns:
+                self.runs.columns.append(name)
+            checked = set(self.channel_curves) | {curve.label for curve in self.curves} | {self.x_label}
+            self.reset_check_buttons(columns, [label in checked for label in columns])
+            self.fig.canvas.draw_idle()
+
+    def evaluate_channel(self, label: str) -> bool:
+        """
+        勾选派生通道时计算其数据, 计算失败时报告错误并取消勾选
+        """
+        frames = self.runs.data_frames if self.runs is not None else [self.data_frame]
+        try:
+            for data_frame in frames:
+                data_frame[label]
+        except ExpressionError as e:
+            print(f"Evaluate {label} failed: {e}!")
+            self.set_status(f"Evaluate {label} failed: {e}")
+            self.check_buttons.eventson = False # 取消勾选不触发回调
+            self.check_buttons.set_active(self.check_buttons_labels.index(label))
+            self.check_buttons.eventson = True
+            return False
+        return True
+
+    def reset_plot(self) -> None:
+        """
+        清除图中曲线并重置横轴选择状态
+        """
+        self.remove_all_curve()
+        self.plot_ax.clear()
+        self.is_x_choosed = False
+        self.x_label = ""
+        self.channel_curves = {}
+        self.curve_runs = {}
+
+    def follow_file(self, file_path: str = None) -> None:
+        """
+        以跟踪模式打开CSV文件, file_path为None时打开对话框选择文件
+        记录已读取的文件偏移, 之后每隔follow_interval毫秒只解析新追加的行
+        """
+        if file_path is None:
+            root = tk.Tk()
+            root.withdraw()
+            file_path = filedialog.askopenfilename()
+        try:
+            tail_reader = CsvTailReader(file_path)
+            tail_reader.read_new_rows()
         except FileNotFoundError:
             print("File Not Found!")
-            sys.exit(1)
-        except Exception as e:
+            return
+        except (OSError, ValueError, pd.errors.ParserError) as e:
+            print(f"Follow file failed: {e}!")
+            return
+
+        self.cancel_loading()
+        self.stop_follow()
+        self.reset_plot()
+        self.runs = None
+        self.window = None
+        self.stats = None
+        self.overview = False
+        self.data_frame = self.derive(tail_reader) # 派生通道随新增的行增量计算
+        self.tail_reader = tail_reader
+        self.reset_check_buttons(self.data_frame.columns)
+
+        if self.follow_timer is None:
+            self.follow_timer = self.fig.canvas.new_timer(interval=self.follow_interval)
+            self.follow_timer.add_callback(self.follow_timer_event)
+        self.follow_timer.interval = self.follow_interval
+        self.follow_timer.start()
+        self.follow_button.label.set_text("Stop")
+        self.fig.canvas.draw_idle()
+
+    def open_window(self, file_path: str, x_label: str, x_min: float, x_max: float) -> None:
+        """
+        只读取横轴x_label在[x_min, x_max]附近的数据并以该列为横轴, 用于很长的记录文件
+        第一次打开时建立稀疏索引并保存在缓存目录中; 平移缩放超出已读取的范围时读取相邻的数据段, 内存中只保留显示范围附近的数据
+        """
+        try:
+            windowed_file = WindowedFile(file_path, x_label, cache=self.file_cache)
+            window = SlidingWindow(windowed_file, tile_width=x_max - x_min, dtype_policy=self.dtype_policy)
+            window.update(x_min, x_max)
+        except FileNotFoundError:
+            print("File Not Found!")
+            return
+        except DataFileError as e:
+            print(f"Read file failed: {e}!")
+            return
+        print(f"Read {len(window.data_frame)} rows of {x_label} in [{window.data_frame[x_label].min()}, {window.data_frame[x_label].max()}]")
+
+        self.cancel_loading()
+        self.stop_follow()
+        self.reset_plot()
+        self.runs = None
+        self.window = window
+        self.stats = None
+        self.overview = False
+        self.data_frame = self.derive(window.data_frame)
+        self.reset_check_buttons(self.data_frame.columns)
+        self.check_buttons.set_active(self.check_buttons_labels.index(x_label)) # 勾选横轴
+        self.fig.canvas.draw_idle()
+
+    def update_curves_view(self, plot_ax: matplotlib.axes.Axes = None) -> None:
+        """
+        按当前横轴范围更新所有曲线的降采样结果, 按横轴范围读取时先更新已读取的数据段
+        """
+        if self.window is not None and self.x_label == self.window.x_label and self.curve_num > 0:
+            x_min, x_max = self.plot_ax.get_xlim()
             try:
-                data_frame = pd.read_excel(file_path)
-                print("Read file successfully!")
-            except pd.errors.ParserError:
+                updated = self.window.update(x_min, x_max)
+            except (OSError, DataFileError) as e:
                 print(f"Read file failed: {e}!")
-                sys.exit(1)
+                updated = False
+            if updated:
+                self.data_frame = self.derive(self.window.data_frame)
+                self.x_axis_data = np.asarray(self.data_frame[self.x_label])
+                self.x_sorted = is_sorted(self.x_axis_data)
+                for curve in self.curves:
+                    curve.set_data(self.x_axis_data, self.data_frame[curve.label])
+        super().update_curves_view(plot_ax)
+
+    def stop_follow(self) -> None:
+        """
+        停止跟踪, 已读取的数据保留在图中
+        """
+        if self.follow_timer is not None:
+            self.follow_timer.stop()
+        if self.tail_reader is not None:
+            self.tail_reader = None
+            self.follow_button.label.set_text("Follow")
 
-        # 重置checkbuttons控件
-        self.check_buttons_ax.remove()
-        self.check_buttons_labels = data_frame.columns
-        self.check_buttons_ax = self.fig.add_axes(self.check_buttons_ax_pos)
-        self.check_buttons = CheckButtons(ax=self.check_buttons_ax, labels=self.check_buttons_labels)
-        self.check_buttons.on_clicked(self.checkbuttons_toggle_event)
-        self.data_frame = data_frame
+    def data_x_range(self) -> tuple[float, float]:
+        """
+        当前横轴数据的范围, 横轴单调时直接取首尾
+        """
+        if self.curves and self.curves[0].x_sorted:
+            return self.x_axis_data[0], self.x_axis_data[-1]
+        return np.nanmin(self.x_axis_data), np.nanmax(self.x_axis_data)
+
+    def follow_timer_event(self) -> None:
+        """
+        跟踪定时器回调, 读取新追加的行并延长曲线, 只更新曲线数据和横轴范围
+        显示范围包含数据末尾时窗口跟随末尾移动, 显示全部数据时范围随之扩大, 正在查看历史数据时范围不变
+        """
+        if self.tail_reader is None:
+            return
+        try:
+            row_num = self.tail_reader.read_new_rows()
+        except (OSError, ValueError, pd.errors.ParserError) as e:
+            print(f"Follow file failed: {e}!")
+            self.stop_follow()
+            return
+        if row_num == 0 or not self.is_x_choosed:
+            return
+        if self.curve_num == 0:
+            self.x_axis_data = self.data_frame[self.x_label]
+            return
+
+        was_empty = len(self.x_axis_data) == 0
+        if not was_empty:
+            data_min, data_max = self.data_x_range()
+        x_min, x_max = self.plot_ax.get_xlim()
+        self.x_axis_data = self.data_frame[self.x_label]
+        for curve in self.curves:
+            curve.extend_data(self.x_axis_data, self.data_frame[curve.label])
+        new_min, new_max = self.data_x_range()
+
+        # 拖动过程中不改变范围, 避免与鼠标操作冲突
+        if not self.mouse_press and (was_empty or x_max >= data_max):
+            if was_empty or x_min <= data_min:
+                x_min = new_min
+            else:
+                x_min += new_max - data_max
+            x_max = new_max if new_max > x_min else x_min + 1.0
+            self.plot_ax.set_xlim(x_min, x_max)
+        else:
+            self.update_curves_view()
+        self.fig.canvas.draw_idle()
 
     def plot(self, x_axis_data: np.ndarray) -> None:
         """
         绘制曲线
         """
         self.x_axis_data = x_axis_data
-        lines = []
+        if self.stats is not None and self.x_label in self.stats.sorted:
+            self.x_sorted = self.stats.sorted[self.x_label] # 统计信息中已有单调性, 不再扫描横轴
+        else:
+            self.x_sorted = is_sorted(self.x_axis_data)
         for curve in self.curves:
             if curve.label == self.x_label:
                 continue
-            curve.plot(self.plot_ax, self.x_axis_data)
-            lines.append(curve.line)
-        self.cursor = mplcursors.cursor(lines, multiple=True)
-        self.cursor.connect('add', self.update_cursor_annotation)
-
-        self.plot_ax.set_xlim(self.x_axis_data.min(), self.x_axis_data.max())
+            curve.plot(self.plot_ax, *self.curve_x(curve))
+        # 按横轴范围读取时显示打开时的范围, 预读的相邻数据段不显示; 在绑定回调前设置, 自动缩放的范围不会触发读取
+        in_window = self.window is not None and self.x_label == self.window.x_label
+        if in_window:
+            self.plot_ax.set_xlim(*self.window.view)
+        self.connect_view_update()
+        if self.picker is not None:
+            self.picker.remove_all_selection()
+        self.picker = CurvePicker(self.plot_ax, blit_manager=self.blit_manager)
+
+        # 跟踪模式下文件可能还没有数据行
+        if self.runs is not None:
+            self.plot_ax.set_xlim(*self.runs.x_limits(self.x_label))
+        elif in_window:
+            self.update_curves_view()
+        elif self.stats is not None and self.stats.limits(self.x_label) is not None:
+            self.plot_ax.set_xlim(*self.stats.limits(self.x_label))
+        elif len(self.x_axis_data) > 0:
+            self.plot_ax.set_xlim(self.x_axis_data.min(), self.x_axis_data.max())
         self.plot_ax.legend(fontsize=8)
         self.plot_ax.grid()
-        self.plot_ax.set_xticks(np.linspace(self.x_axis_data.min(), self.x_axis_data.max(), self.xticks_density))
         self.plot_ax.tick_params(axis='x', rotation=20)
-        self.plot_ax.ticklabel_format(axis='x', style='plain')
+        self.setup_xticks()
+
+    def plot_curve(self, curve: ExcelPlotCurve) -> None:
+        """
+        在已绘制的图中追加一条曲线, 只新建该曲线, 坐标轴范围/刻度/网格保持不变, 代价与已显示的曲线数量无关
+        """
+        curve.plot(self.plot_ax, *self.curve_x(curve))
+        curve.refresh_view() # 按当前显示范围降采样
+        self.plot_ax.legend(fontsize=8)
+
+    def curve_x(self, curve: ExcelPlotCurve) -> tuple[np.ndarray, bool]:
+        """
+        曲线的横轴及横轴是否单调, 对比模式下为曲线所属运行对齐后的横轴
+        """
+        if self.overview:
+            return self.stats.overview_x(self.x_label, curve.label), self.stats.sorted.get(self.x_label, False)
+        if self.runs is None:
+            return self.x_axis_data, self.x_sorted
+        run_index = self.curve_runs[curve]
+        return self.runs.x(run_index, self.x_label), self.runs.x_sorted(run_index, self.x_label)
+
+    def add_channel(self, label: str) -> None:
+        """
+        对比模式下添加某列在各次运行中的曲线, 各曲线的min/max金字塔在线程池中并行构建
+        """
+        curves = []
+        for run_index, name in enumerate(self.runs.names):
+            y_axis_data = self.runs.y(run_index, self.x_label, label)
+            if y_axis_data is None:
+                continue # 重采样时跳过非数值列
+            curve = ExcelPlotCurve(y_axis_data=y_axis_data, label=f'{label} [{name}]', color=None, visible=True)
+            self.curve_runs[curve] = run_index
+            curves.append(curve)
+        sorted_curves = [curve for curve in curves if curve.decimation and self.curve_x(curve)[1]]
+        with ThreadPoolExecutor(max_workers=max(min(len(sorted_curves), os.cpu_count() or 1), 1)) as executor:
+            pyramids = list(executor.map(MinMaxPyramid, [curve.y_axis_data for curve in sorted_curves]))
+        for curve, pyramid in zip(sorted_curves, pyramids):
+            curve.pyramid = pyramid # 绘制时复用, 不再重复构建
+
+        self.channel_curves[label] = curves
+        for curve in curves:
+            self.add_curve(curve)
+        if self.curve_num == len(curves):
+            self.plot_ax.clear()
+            self.plot(self.x_axis_data)
+        else:
+            for curve in curves:
+                self.plot_curve(curve)
+
+    def remove_channel(self, label: str) -> None:
+        """
+        对比模式下删除某列在各次运行中的曲线
+        """
+        for curve in self.channel_curves.pop(label):
+            self.curve_runs.pop(curve)
+            self.unplot_curve(curve)
+
+    def unplot_curve(self, curve: ExcelPlotCurve) -> None:
+        """
+        从图中删除一条曲线, 其余曲线不重新绘制
+        """
+        self.picker.remove_curve(curve)
+        self.remove_curve(curve)
+        if self.curve_num > 0:
+            self.plot_ax.legend(fontsize=8)
+        else:
+            self.plot_ax.clear()
 
     def button_toggle_event(self, event) -> None:
         """
         按键触发函数, 打开对话框选择数据文件
         """
         if self.button_ax == event.inaxes:
-            # 打开文件
+            # 读取中再次点击则取消读取
+            if self.loader is not None:
+                self.cancel_loading()
+                return
+            # 打开文件, 读取完成后清除图中曲线并重置状态
+            self.stop_follow()
             self.open_file()
-            # 清楚图中曲线并重置状态
-            self.remove_all_curve()
-            self.plot_ax.clear()
-            self.is_x_choosed = False
-            self.x_label = ""
-            self.fig.canvas.draw_idle()
 
+    def follow_button_toggle_event(self, event) -> None:
+        """
+        跟踪按键触发函数, 未跟踪时选择文件开始跟踪, 跟踪中则停止跟踪
+        """
+        if self.follow_button_ax == event.inaxes:
+            if self.tail_reader is None:
+                self.follow_file()
+            else:
+                self.stop_follow()
+                self.fig.canvas.draw_idle()
+
+    @profiled(PHASE_EVENT)
     def mouse_toggle_event(self, event: matplotlib.backend_bases.MouseEvent) -> None:
         """
         鼠标触发事件, 鼠标拖拽等交互
@@ -676,27 +1603,39 @@ class ExcelPlotUiMini(ExcelPlotBaseFigure):
             (event.name == 'motion_notify_event' and event.button == 3 and self.mouse_press == True)):
 
             if event.name == 'button_press_event' and event.button == 1:
-                for sel in self.cursor.selections:
-                    annotation = sel.annotation
-                    bbox = annotation.get_window_extent()
-                    if bbox.contains(event.x, event.y):
-                        return
-                if self.vline is not None:
-                    self.vline.remove()
-                self.vline = self.plot_ax.axvline(x=event.xdata, color='black', linewidth=1, visible=True)
-            # 有效操作才更新画布, 防止卡顿
-            self.fig.canvas.draw_idle()
+                if self.pressed_on_annotation:
+                    return
+                self.draw_vline(event.xdata)
+            # 有效操作才更新画布, 防止卡顿; 平移缩放由调度器每帧刷新一次
+            if event.name != 'motion_notify_event' and event.name != 'scroll_event':
+                self.redraw()
 
     # 本图复选框勾选回调函数
     # 复选框勾选曲线显示或隐藏
+    @profiled(PHASE_EVENT)
     def checkbuttons_toggle_event(self, label: str) -> None:
         """
         复选框勾选回调函数, 勾选曲线显示或隐藏: 第一个勾选的数据为横轴, 后面勾选的数据都为纵轴
         """
+        if label in self.expressions and not self.evaluate_channel(label):
+            return
         if False == self.is_x_choosed:
             self.is_x_choosed = True
             self.x_label = label
-            self.x_axis_data = self.data_frame[label].values
+            self.x_axis_data = np.asarray(self.data_frame[label])
+            # 对比模式下各运行的横轴及重采样后的纵轴与横轴有关, 重新生成所有曲线
+            if self.runs is not None and self.curve_num > 0:
+                labels = list(self.channel_curves)
+                self.curves, self.curve_num = [], 0
+                self.channel_curves, self.curve_runs = {}, {}
+                for channel_label in labels:
+                    self.add_channel(channel_label)
+                self.fig.canvas.draw_idle()
+            # 更换横轴后已勾选的纵轴数据需要全部重新绘制
+            elif self.curve_num > 0:
+                self.plot_ax.clear()
+                self.plot(self.x_axis_data)
+                self.fig.canvas.draw_idle()
             return
         elif True == self.is_x_choosed and label == self.x_label:
             self.is_x_choosed = False
@@ -704,16 +1643,24 @@ class ExcelPlotUiMini(ExcelPlotBaseFigure):
             self.plot_ax.clear()
             return
 
-        if label in [curve.label for curve in self.curves]:
-            index = [curve.label for curve in self.curves].index(label)
-            curve = self.curves[index]
-            self.remove_curve(curve)
+        # 只增删被点击的曲线, 其余曲线不重新绘制
+        curve = next((curve for curve in self.curves if curve.label == label), None)
+        if self.runs is not None:
+            if label in self.channel_curves:
+                self.remove_channel(label)
+            else:
+                self.add_channel(label)
+        elif curve is not None:
+            self.unplot_curve(curve)
         else:
-            curve = ExcelPlotCurve(y_axis_data=self.data_frame[label].values, label=label, color=None, visible=True)
+            curve = ExcelPlotCurve(y_axis_data=np.asarray(self.data_frame[label]), label=label, color=None, visible=True)
             self.add_curve(curve)
+            if self.curve_num == 1:
+                self.plot_ax.clear()
+                self.plot(self.x_axis_data)
+            else:
+                self.plot_curve(curve)
 
-        self.plot_ax.clear()
-        if self.curve_num > 0:
-            self.plot(self.x_axis_data)
-
+        if self.auto_ylim and self.curve_num > 0:
+            self.autoscale_y()
         self.fig.canvas.draw_idle()
\ No newline at end of file
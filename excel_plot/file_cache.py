@@ -0,0 +1,458 @@
+# 数据文件二进制缓存相关模块
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+DEFAULT_CACHE_DIR = os.environ.get('EXCEL_PLOT_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'excel_plot'))
+
+COLUMN_KIND_NUMERIC = 'numeric'
+COLUMN_KIND_STRING = 'string'
+COLUMN_KIND_DATETIME = 'datetime'
+
+class FileCache:
+    """
+    已打开数据文件的二进制列缓存, 以文件路径, 大小和修改时间为键, 文件变化后缓存自动失效
+    每个源文件对应缓存目录下的一个子目录, meta.json记录列信息
+    数值列保存为原始二进制, 时间列保存为int64及其类型和时区, 文本列保存为utf-8字节流, 偏移量及缺失值标记
+    再次打开时直接读取二进制, 无需重新解析文本, 得到的数据与解析结果相同
+    缓存总大小(包括sidecar子目录)超过max_bytes时按最近最少使用淘汰
+    """
+    def __init__(self, cache_dir: str = None, max_bytes: int = 8 * 2**30) -> None:
+        """
+        初始化成员变量
+        """
+        self.cache_dir = cache_dir if cache_dir is not None else DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+
+    def cache_key(self, file_path: str) -> str:
+        """
+        由文件绝对路径, 大小和修改时间生成缓存键
+        """
+        stat = os.stat(file_path)
+        source = f'{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}'
+        return hashlib.sha1(source.encode('utf-8')).hexdigest()[:20]
+
+    def entry_dir(self, file_path: str) -> str:
+        """
+        源文件对应的缓存子目录
+        """
+        return os.path.join(self.cache_dir, self.cache_key(file_path))
+
+    def sidecar_path(self, file_path: str, suffix: str) -> str:
+        """
+        源文件的附属索引文件路径, 保存在缓存目录的sidecar子目录下, 与缓存使用相同的键, 文件变化后自动失效
+        """
+        return os.path.join(self.cache_dir, 'sidecar', f'{self.cache_key(file_path)}.{suffix}')
+
+    def touch(self, path: str) -> None:
+        """
+        更新sidecar文件的访问时间, 用于LRU淘汰
+        """
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def read_meta(self, entry_dir: str) -> dict:
+        """
+        读取缓存子目录的列信息, 不存在或损坏时返回None
+        """
+        try:
+            with open(os.path.join(entry_dir, 'meta.json'), 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def write_meta(self, entry_dir: str, meta: dict) -> None:
+        """
+        写入缓存子目录的列信息, 先写临时文件再替换, 避免留下不完整的meta.json
+        """
+        meta_path = os.path.join(entry_dir, 'meta.json')
+        with open(meta_path + '.tmp', 'w', encoding='utf-8') as file:
+            json.dump(meta, file, ensure_ascii=False)
+        os.replace(meta_path + '.tmp', meta_path)
+
+    def resolve_columns(self, meta: dict, usecols: list[str]) -> list[str]:
+        """
+        检查缓存是否包含需要的列, 命中时与pandas的usecols一致按源文件中的列顺序返回列名, 否则返回None
+        """
+        cached_names = {column['name'] for column in meta['columns']}
+        if usecols is None:
+            return list(meta['column_order']) if meta['complete'] else None
+        if any(name not in cached_names for name in usecols):
+            return None
+        return [name for name in meta['column_order'] if name in usecols]
+
+    def load(self, file_path: str, usecols: list[str] = None) -> pd.DataFrame:
+        """
+        从缓存读取数据, usecols中的列全部命中时返回DataFrame, 否则返回None
+        """
+        entry_dir = self.entry_dir(file_path)
+        meta = self.read_meta(entry_dir)
+        if meta is None:
+            return None
+        usecols = self.resolve_columns(meta, usecols)
+        if usecols is None:
+            return None
+        columns = {column['name']: column for column in meta['columns']}
+        data = {}
+        for name in usecols:
+            data[name] = self.read_column(entry_dir, columns[name], meta['rows'])
+        # 更新访问时间用于LRU淘汰
+        os.utime(os.path.join(entry_dir, 'meta.json'))
+        return pd.DataFrame(data)
+
+    def read_column(self, entry_dir: str, column: dict, rows: int) -> np.ndarray:
+        """
+        读取单列缓存
+        """
+        data_path = os.path.join(entry_dir, column['file'])
+        if column['kind'] == COLUMN_KIND_NUMERIC:
+            return np.fromfile(data_path, dtype=np.dtype(column['dtype']), count=rows)
+        if column['kind'] == COLUMN_KIND_DATETIME:
+            values = np.fromfile(data_path, dtype=np.int64, count=rows).view(np.dtype(column['dtype']))
+            return localize_datetimes(values, column.get('tz'))
+        offsets = np.fromfile(data_path + '.off', dtype=np.int64, count=rows + 1)
+        blob = np.fromfile(data_path, dtype=np.uint8)
+        strings = decode_strings(blob, offsets)
+        if column.get('nulls', 0) > 0:
+            strings[np.fromfile(data_path + '.null', dtype=bool, count=rows)] = np.nan
+        return strings
+
+    def open_columns(self, file_path: str, usecols: list[str] = None) -> 'ColumnStore':
+        """
+        以内存映射方式打开缓存, usecols中的列全部命中时返回ColumnStore, 否则返回None
+        各列直接映射缓存文件, 不占用进程内存, 可浏览超过物理内存大小的数据
+        """
+        entry_dir = self.entry_dir(file_path)
+        meta = self.read_meta(entry_dir)
+        if meta is None:
+            return None
+        usecols = self.resolve_columns(meta, usecols)
+        if usecols is None:
+            return None
+        columns = {column['name']: column for column in meta['columns']}
+        data = {}
+        for name in usecols:
+            data[name] = self.map_column(entry_dir, columns[name], meta['rows'])
+        os.utime(os.path.join(entry_dir, 'meta.json'))
+        return ColumnStore(data, meta['rows'])
+
+    def map_column(self, entry_dir: str, column: dict, rows: int):
+        """
+        内存映射单列缓存, 带时区的时间列映射为UTC时间
+        """
+        data_path = os.path.join(entry_dir, column['file'])
+        if column['kind'] == COLUMN_KIND_NUMERIC or column['kind'] == COLUMN_KIND_DATETIME:
+            return map_file(data_path, np.dtype(column['dtype']), rows)
+        offsets = map_file(data_path + '.off', np.dtype(np.int64), rows + 1)
+        blob = map_file(data_path, np.dtype(np.uint8), int(offsets[-1]) if rows > 0 else 0)
+        nulls = map_file(data_path + '.null', np.dtype(bool), rows) if column.get('nulls', 0) > 0 else None
+        return StringColumn(blob, offsets, nulls)
+
+    def writer(self, file_path: str) -> 'CacheWriter':
+        """
+        创建缓存写入器, 可以分块追加数据
+        """
+        return CacheWriter(self, file_path)
+
+    def store(self, file_path: str, data_frame: pd.DataFrame, complete: bool) -> None:
+        """
+        把解析后的数据写入缓存, complete表示data_frame是否包含源文件的全部列
+        同一源文件已有缓存时只追加缺少的列
+        """
+        writer = self.writer(file_path)
+        try:
+            writer.append(data_frame)
+        except BaseException:
+            writer.abort()
+            raise
+        writer.commit(complete)
+
+    def evict(self, keep: str = None) -> None:
+        """
+        缓存总大小超过上限时, 按最近访问时间从旧到新删除缓存子目录及sidecar文件, keep为不删除的子目录或文件
+        """
+        if not os.path.isdir(self.cache_dir):
+            return
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            entry_dir = os.path.join(self.cache_dir, name)
+            meta = self.read_meta(entry_dir)
+            if meta is None:
+                continue
+            entries.append((os.path.getmtime(os.path.join(entry_dir, 'meta.json')), meta['nbytes'], entry_dir))
+        sidecar_dir = os.path.join(self.cache_dir, 'sidecar')
+        if os.path.isdir(sidecar_dir):
+            for name in os.listdir(sidecar_dir):
+                sidecar_path = os.path.join(sidecar_dir, name)
+                try:
+                    entries.append((os.path.getmtime(sidecar_path), os.path.getsize(sidecar_path), sidecar_path))
+                except OSError:
+                    continue
+        total_bytes = sum(entry[1] for entry in entries)
+        for _, nbytes, entry_path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            if entry_path == keep:
+                continue
+            if os.path.isdir(entry_path):
+                shutil.rmtree(entry_path, ignore_errors=True)
+            else:
+                try:
+                    os.remove(entry_path)
+                except OSError:
+                    pass
+            total_bytes -= nbytes
+
+    def clear(self) -> None:
+        """
+        删除全部缓存
+        """
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+class CacheWriter:
+    """
+    缓存写入器, 数据分块追加写入缓存文件, 解析超大文件时无需在内存中保留完整数据
+    """
+    def __init__(self, cache: FileCache, file_path: str) -> None:
+        """
+        初始化成员变量, 读取已有缓存的列信息
+        """
+        self.cache = cache
+        self.entry_dir = cache.entry_dir(file_path)
+        self.meta = cache.read_meta(self.entry_dir)
+        if self.meta is None:
+            # 没有有效的列信息时清除残留文件, 避免追加到不完整的旧文件上
+            shutil.rmtree(self.entry_dir, ignore_errors=True)
+            self.meta = {
+                'source': os.path.abspath(file_path),
+                'rows': None,
+                'complete': False,
+                'column_order': [],
+                'columns': [],
+                'nbytes': 0,
+            }
+        os.makedirs(self.entry_dir, exist_ok=True)
+        self.cached_names = {column['name'] for column in self.meta['columns']}
+        self.new_columns: dict[str, dict] = {} # 本次新写入的列
+        self.column_order: list[str] = []
+        self.rows = 0
+
+    def append(self, chunk: pd.DataFrame) -> None:
+        """
+        追加一块数据, 已缓存的列跳过
+        """
+        for name in chunk.columns:
+            series = chunk[name]
+            tz = None
+            if isinstance(series.dtype, pd.DatetimeTZDtype):
+                # 带时区的时间列按UTC时间保存, 读取时再转换回原时区
+                tz = str(series.dtype.tz)
+                series = series.dt.tz_convert('UTC').dt.tz_localize(None)
+            values = series.to_numpy()
+            name = str(name)
+            if name not in self.column_order:
+                self.column_order.append(name)
+            if name in self.cached_names:
+                continue
+            column = self.new_columns.get(name)
+            if column is None:
+                column = self.create_column(name, values, tz)
+                self.new_columns[name] = column
+            self.write_chunk(column, values)
+        self.rows += len(chunk)
+
+    def create_column(self, name: str, values: np.ndarray, tz: str = None) -> dict:
+        """
+        按第一块数据的类型创建列描述, 数值列保存原始二进制, 时间列保存为int64并记录类型及时区, 其余类型统一按文本保存
+        """
+        file_name = f'c{len(self.meta["columns"]) + len(self.new_columns)}.bin'
+        if values.dtype.kind in 'biuf':
+            return {'name': name, 'file': file_name, 'kind': COLUMN_KIND_NUMERIC, 'dtype': values.dtype.str, 'nbytes': 0, 'written': False}
+        if values.dtype.kind in 'mM':
+            return {'name': name, 'file': file_name, 'kind': COLUMN_KIND_DATETIME, 'dtype': values.dtype.str, 'tz': tz, 'nbytes': 0, 'written': False}
+        return {'name': name, 'file': file_name, 'kind': COLUMN_KIND_STRING, 'dtype': 'str', 'nbytes': 0, 'written': False, 'text_bytes': 0, 'nulls': 0}
+
+    def write_chunk(self, column: dict, values: np.ndarray) -> None:
+        """
+        把一块数据追加到列文件末尾
+        """
+        data_path = os.path.join(self.entry_dir, column['file'])
+        mode = 'ab' if column['written'] else 'wb'
+        column['written'] = True
+        if column['kind'] == COLUMN_KIND_NUMERIC or column['kind'] == COLUMN_KIND_DATETIME:
+            values = np.ascontiguousarray(values, dtype=np.dtype(column['dtype']))
+            if column['kind'] == COLUMN_KIND_DATETIME:
+                values = values.view(np.int64)
+            with open(data_path, mode) as file:
+                values.tofile(file)
+            column['nbytes'] += values.nbytes
+            return
+
+        # 文本列写入utf-8字节流, 偏移量接续之前的块, 缺失值写为空字符串并单独记录标记
+        nulls = np.asarray(pd.isna(values), dtype=bool)
+        encoded = [b'' if null else str(value).encode('utf-8') for value, null in zip(values, nulls)]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        offsets = column['text_bytes'] + np.cumsum(lengths)
+        if mode == 'wb':
+            offsets = np.concatenate(([0], offsets))
+        with open(data_path, mode) as file:
+            file.write(b''.join(encoded))
+        with open(data_path + '.off', mode) as file:
+            offsets.tofile(file)
+        with open(data_path + '.null', mode) as file:
+            nulls.tofile(file)
+        column['text_bytes'] += int(lengths.sum())
+        column['nulls'] += int(nulls.sum())
+        column['nbytes'] += int(lengths.sum()) + offsets.nbytes + nulls.nbytes
+
+    def commit(self, complete: bool) -> None:
+        """
+        写入列信息使缓存生效, 并按大小上限淘汰旧缓存
+        """
+        if self.meta['rows'] is not None and self.meta['rows'] != self.rows:
+            # 行数与已有缓存不一致, 说明缓存已损坏, 整体丢弃
+            shutil.rmtree(self.entry_dir, ignore_errors=True)
+            return
+        self.meta['rows'] = self.rows
+        for column in self.new_columns.values():
+            column.pop('written')
+            column.pop('text_bytes', None)
+            self.meta['columns'].append(column)
+            self.meta['nbytes'] += column['nbytes']
+        if complete:
+            self.meta['complete'] = True
+            self.meta['column_order'] = list(self.column_order)
+        else:
+            self.meta['column_order'] += [name for name in self.column_order if name not in self.meta['column_order']]
+        self.cache.write_meta(self.entry_dir, self.meta)
+        self.cache.evict(keep=self.entry_dir)
+
+    def abort(self) -> None:
+        """
+        放弃本次写入, 删除新写入的列文件
+        """
+        for column in self.new_columns.values():
+            data_path = os.path.join(self.entry_dir, column['file'])
+            for path in (data_path, data_path + '.off', data_path + '.null'):
+                if os.path.exists(path):
+                    os.remove(path)
+
+class StringColumn:
+    """
+    内存映射的文本列, 按下标访问时才解码对应的字符串, 缺失值为NaN
+    """
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray, nulls: np.ndarray = None) -> None:
+        """
+        初始化成员变量, nulls为缺失值标记, 为None表示没有缺失值
+        """
+        self.blob = blob
+        self.offsets = offsets
+        self.nulls = nulls
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            index = range(len(self))[index]
+            if self.nulls is not None and self.nulls[index]:
+                return np.nan
+            return bytes(self.blob[self.offsets[index]:self.offsets[index + 1]]).decode('utf-8')
+        return np.array([self[int(i)] for i in np.arange(len(self))[index]], dtype=object)
+
+    @property
+    def nbytes(self) -> int:
+        return self.blob.nbytes + self.offsets.nbytes + (self.nulls.nbytes if self.nulls is not None else 0)
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        strings = decode_strings(np.asarray(self.blob), np.asarray(self.offsets))
+        if self.nulls is not None:
+            strings[np.asarray(self.nulls)] = np.nan
+        return strings if dtype is None else strings.astype(dtype)
+
+class ColumnStore:
+    """
+    内存映射的列存储, 按列名取列, 用法与DataFrame取列一致
+    数值列为np.memmap, 曲线和标签直接读取映射的缓存文件, 不产生数据拷贝
+    """
+    def __init__(self, data: dict, rows: int) -> None:
+        """
+        初始化成员变量
+        """
+        self.data = data
+        self.rows = rows
+
+    @property
+    def columns(self) -> list[str]:
+        return list(self.data.keys())
+
+    def keys(self) -> list[str]:
+        return self.columns
+
+    def __getitem__(self, name: str):
+        return self.data[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.data
+
+    def __len__(self) -> int:
+        return self.rows
+
+def map_file(data_path: str, dtype: np.dtype, count: int) -> np.ndarray:
+    """
+    只读内存映射文件, 空文件无法映射, 返回空数组
+    """
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(data_path, dtype=dtype, mode='r', shape=(count,))
+
+def localize_datetimes(values: np.ndarray, tz: str):
+    """
+    把按UTC保存的时间转换回原时区, tz为None时直接返回
+    """
+    if tz is None:
+        return values
+    return pd.DatetimeIndex(values).tz_localize('UTC').tz_convert(tz)
+
+def decode_strings(blob: np.ndarray, offsets: np.ndarray, block_rows: int = 1_000_000, matrix_bytes: int = 64 << 20) -> np.ndarray:
+    """
+    把utf-8字节流按偏移量还原为字符串数组
+    按块拼成定长字节矩阵再整体解码, 避免逐个字符串解码, 分块限制临时内存
+    矩阵宽度由块内最长字符串决定, 个别超长字符串会使矩阵超过matrix_bytes, 这些字符串逐个解码, 不放入矩阵
+    """
+    rows = len(offsets) - 1
+    strings = np.empty(rows, dtype=object)
+    for block_start in range(0, rows, block_rows):
+        block_stop = min(block_start + block_rows, rows)
+        starts = offsets[block_start:block_stop].astype(np.int64)
+        lengths = np.diff(offsets[block_start:block_stop + 1]).astype(np.int64)
+        long_rows = lengths > max(matrix_bytes // (block_stop - block_start), 1)
+        for i in np.flatnonzero(long_rows):
+            strings[block_start + i] = bytes(blob[starts[i]:starts[i] + lengths[i]]).decode('utf-8')
+        short_rows = np.flatnonzero(~long_rows)
+        if len(short_rows) > 0:
+            strings[block_start + short_rows] = decode_matrix(blob, starts[short_rows], lengths[short_rows])
+    return strings
+
+def decode_matrix(blob: np.ndarray, starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """
+    把blob中起点为starts, 长度为lengths的若干字符串拼成定长字节矩阵后整体解码
+    """
+    width = int(lengths.max())
+    if width == 0:
+        return np.full(len(starts), '', dtype=object)
+    row_idx = np.repeat(np.arange(len(starts)), lengths)
+    col_idx = np.arange(len(row_idx)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    data = blob[np.repeat(starts, lengths) + col_idx]
+    matrix = np.zeros((len(starts), width), dtype=np.uint8)
+    matrix[row_idx, col_idx] = data
+    encoded = matrix.view(f'S{width}').ravel()
+    if data.max() < 0x80:
+        # 纯ASCII文本可以直接按定长字符串转换, 比逐个utf-8解码快数倍
+        return encoded.astype(f'U{width}')
+    return np.char.decode(encoded, 'utf-8')
@@ -0,0 +1,360 @@
+# 数据文件读取相关模块
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from .file_cache import FileCache
+from .dtype_policy import DtypePolicy
+from .file_stats import FileStats, load_file_stats
+
+# pyarrow为可选依赖, 安装后CSV使用多线程的pyarrow引擎解析
+try:
+    import pyarrow
+    import pyarrow.csv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+FILE_FORMAT_CSV = 'csv'
+FILE_FORMAT_EXCEL = 'excel'
+FILE_FORMAT_PARQUET = 'parquet'
+
+class DataFileError(Exception):
+    """
+    数据文件格式错误或解析失败
+    """
+
+class LoadCancelled(Exception):
+    """
+    读取被用户取消
+    """
+
+def sniff_file_format(file_path: str) -> str:
+    """
+    根据文件头魔数和扩展名判断文件格式, 魔数优先, 其余文本文件都按CSV处理
+    """
+    with open(file_path, 'rb') as file:
+        magic = file.read(8)
+    extension = os.path.splitext(file_path)[1].lower()
+    if magic.startswith(b'PK\x03\x04') or magic.startswith(b'\xd0\xcf\x11\xe0'):
+        return FILE_FORMAT_EXCEL  # xlsx为zip压缩包, xls为OLE复合文档
+    if magic.startswith(b'PAR1') or extension == '.parquet':
+        return FILE_FORMAT_PARQUET
+    if extension in ('.xlsx', '.xlsm', '.xls'):
+        return FILE_FORMAT_EXCEL
+    return FILE_FORMAT_CSV
+
+def sniff_csv_dtypes(file_path: str, usecols: list[str] = None, sample_rows: int = 1000) -> dict:
+    """
+    读取CSV前若干行推断各列类型, 数值列统一为float64, 其余为object, 保证分块读取时各块类型一致
+    """
+    sample = pd.read_csv(file_path, usecols=usecols, nrows=sample_rows)
+    dtypes = {}
+    for name in sample.columns:
+        column = sample[name]
+        if pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column):
+            dtypes[name] = 'float64'
+        else:
+            dtypes[name] = 'object'
+    return dtypes
+
+def iter_csv_chunks(file_path: str, usecols: list[str] = None, dtype: dict = None, chunksize: int = 200_000, progress_callback: callable = None):
+    """
+    分块读取CSV的生成器, 按已读取字节数报告进度
+    """
+    file_size = max(os.path.getsize(file_path), 1)
+    with open(file_path, 'rb') as file:
+        for chunk in pd.read_csv(file, usecols=usecols, dtype=dtype, chunksize=chunksize):
+            yield chunk
+            if progress_callback is not None:
+                progress_callback(file.tell() / file_size)
+
+def read_csv_chunked(file_path: str, usecols: list[str] = None, dtype: dict = None, chunksize: int = 200_000, progress_callback: callable = None) -> pd.DataFrame:
+    """
+    分块读取CSV, 各列分块结果最后逐列拼接, 峰值内存约为结果大小加一列
+    """
+    columns: dict[str, list[np.ndarray]] = {}
+    for chunk in iter_csv_chunks(file_path, usecols, dtype, chunksize, progress_callback):
+        for name in chunk.columns:
+            columns.setdefault(name, []).append(chunk[name].to_numpy())
+    data = {}
+    for name in list(columns.keys()):
+        data[name] = np.concatenate(columns.pop(name))
+    return pd.DataFrame(data)
+
+def read_csv_pyarrow(file_path: str, usecols: list[str] = None, block_size: int = 1 << 22, progress_callback: callable = None) -> pd.DataFrame:
+    """
+    用pyarrow流式读取CSV, 每批对应约block_size字节的输入, 每读完一批报告进度, 取消读取在下一批生效
+    各批类型由第一批推断, 之后出现不一致的内容时抛出ArrowInvalid(ValueError的子类)
+    """
+    file_size = max(os.path.getsize(file_path), 1)
+    read_options = pyarrow.csv.ReadOptions(block_size=block_size)
+    convert_options = None
+    if usecols is not None:
+        # 与pandas相同按文件中的顺序排列各列, 不存在的列放在最后由pyarrow报错
+        header = list(pd.read_csv(file_path, nrows=0).columns)
+        include_columns = [name for name in header if name in usecols] + [name for name in usecols if name not in header]
+        convert_options = pyarrow.csv.ConvertOptions(include_columns=include_columns)
+    with pyarrow.input_stream(file_path) as stream:
+        reader = pyarrow.csv.open_csv(stream, read_options=read_options, convert_options=convert_options)
+        batches = []
+        for batch in reader:
+            batches.append(batch)
+            if progress_callback is not None:
+                progress_callback(min(len(batches) * block_size / file_size, 1.0))
+        table = pyarrow.Table.from_batches(batches, schema=reader.schema)
+    if progress_callback is not None:
+        progress_callback(1.0)
+    return table.to_pandas()
+
+def read_csv(file_path: str, usecols: list[str] = None, chunksize: int = 200_000, progress_callback: callable = None) -> pd.DataFrame:
+    """
+    读取CSV文件, 安装pyarrow时使用pyarrow引擎读取, 否则按推断的类型分块读取
+    pyarrow一次读取整个文件最快, 但期间无法报告进度和取消, 因此有progress_callback时改为分批读取
+    """
+    if PYARROW_AVAILABLE:
+        try:
+            if progress_callback is None:
+                return pd.read_csv(file_path, usecols=usecols, engine='pyarrow')
+            return read_csv_pyarrow(file_path, usecols, progress_callback=progress_callback)
+        except (ValueError, KeyError):
+            # 第一批之后类型不一致, 列名不存在或空文件等, 交给pandas分块读取处理或报告错误
+            pass
+
+    dtype = sniff_csv_dtypes(file_path, usecols)
+    try:
+        return read_csv_chunked(file_path, usecols, dtype, chunksize, progress_callback)
+    except ValueError:
+        # 样本之后出现非数值内容, 退回由pandas逐块推断类型
+        return read_csv_chunked(file_path, usecols, None, chunksize, progress_callback)
+
+def stream_csv_to_cache(file_path: str, usecols: list[str], chunksize: int, progress_callback: callable, cache: FileCache) -> bool:
+    """
+    分块解析CSV并直接追加写入缓存, 内存中不保留完整数据, 用于内存映射打开超过物理内存的文件
+    样本之后出现非数值内容或写入失败时放弃写入并返回False
+    """
+    dtype = sniff_csv_dtypes(file_path, usecols)
+    try:
+        writer = cache.writer(file_path)
+    except OSError:
+        return False
+    try:
+        for chunk in iter_csv_chunks(file_path, usecols, dtype, chunksize, progress_callback):
+            writer.append(chunk)
+        writer.commit(complete=usecols is None)
+    except (ValueError, OSError):
+        writer.abort()
+        return False
+    except Exception:
+        # 取消读取等其它异常, 清理写了一半的缓存后继续抛出
+        writer.abort()
+        raise
+    return True
+
+def load_data_file(
+    file_path: str,
+    usecols: list[str] = None,
+    progress_callback: callable = None,
+    chunksize: int = 200_000,
+    cache: FileCache = None,
+    mmap: bool = False,
+    dtype_policy: DtypePolicy = None
+):
+    """
+    读取数据文件, 按文件头判断格式, usecols为需要读取的列名, 为None时读取全部列
+    progress_callback接收0~1的读取进度, cache不为None时优先从二进制缓存读取, 未命中时解析后写入缓存
+    mmap为True时返回内存映射缓存文件的ColumnStore, CSV文件边解析边写入缓存, 数据无需全部放入内存
+    dtype_policy不为None时按策略压缩DataFrame各列类型, 缓存中保存的是解析得到的原始类型, 内存映射的数据不转换
+    """
+    if mmap and cache is None:
+        cache = FileCache()
+    if cache is not None:
+        try:
+            data_frame = cache.open_columns(file_path, usecols) if mmap else cache.load(file_path, usecols)
+        except OSError:
+            data_frame = None
+        if data_frame is not None:
+            if progress_callback is not None:
+                progress_callback(1.0)
+            return apply_dtype_policy(data_frame, dtype_policy)
+
+    file_format = sniff_file_format(file_path)
+    data_frame: pd.DataFrame = None
+    try:
+        if mmap and file_format == FILE_FORMAT_CSV and stream_csv_to_cache(file_path, usecols, chunksize, progress_callback, cache):
+            pass
+        elif file_format == FILE_FORMAT_EXCEL:
+            data_frame = pd.read_excel(file_path, usecols=usecols)
+        elif file_format == FILE_FORMAT_PARQUET:
+            data_frame = pd.read_parquet(file_path, columns=usecols)
+        else:
+            data_frame = read_csv(file_path, usecols, chunksize, progress_callback)
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, ValueError, UnicodeDecodeError, ImportError) as e:
+        raise DataFileError(e) from e
+    if progress_callback is not None and file_format != FILE_FORMAT_CSV:
+        progress_callback(1.0)
+
+    if data_frame is not None and cache is not None:
+        try:
+            cache.store(file_path, data_frame, complete=usecols is None)
+        except OSError as e:
+            print(f"Write file cache failed: {e}")
+    if mmap:
+        try:
+            column_store = cache.open_columns(file_path, usecols)
+        except OSError:
+            column_store = None
+        if column_store is not None:
+            return column_store
+        print("Memory map file cache failed, data loaded into memory")
+        if data_frame is None:
+            data_frame = cache.load(file_path, usecols)
+    return apply_dtype_policy(data_frame, dtype_policy)
+
+def apply_dtype_policy(data_frame, dtype_policy: DtypePolicy):
+    """
+    对读取到内存的DataFrame应用列类型策略
+    """
+    if dtype_policy is None or not isinstance(data_frame, pd.DataFrame):
+        return data_frame
+    return dtype_policy.apply(data_frame)
+
+def print_progress(progress: float) -> None:
+    """
+    在终端打印读取进度
+    """
+    print(f"Reading file: {progress:.0%}", end='\r' if progress < 1.0 else '\n')
+
+class BackgroundLoader:
+    """
+    在后台线程读取数据文件, 界面线程定时查询进度和结果, 读取期间界面保持响应
+    取消在下一次报告进度时生效, CSV按块检查, Excel等一次性读取的格式读完后丢弃结果
+    """
+    def __init__(self, file_path: str, with_stats: bool = False, **load_kwargs) -> None:
+        """
+        初始化成员变量, with_stats为True时读取完成后在后台线程中取得列统计信息, load_kwargs为传给load_data_file的其余参数
+        """
+        self.file_path = file_path
+        self.with_stats = with_stats
+        self.load_kwargs = load_kwargs
+        self.progress = 0.0
+        self.result = None              # 读取结果, DataFrame或ColumnStore
+        self.stats: FileStats = None    # 列统计信息, 有缓存时从sidecar读取, 否则统计后写入sidecar
+        self.error: Exception = None    # 读取失败时的异常
+        self.cancel_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self) -> None:
+        """
+        启动后台读取
+        """
+        self.thread.start()
+
+    def run(self) -> None:
+        """
+        后台线程入口, 异常记录下来交给界面线程报告, 不在后台线程中处理
+        """
+        try:
+            result = load_data_file(self.file_path, progress_callback=self.report_progress, **self.load_kwargs)
+            if self.with_stats:
+                self.stats = load_file_stats(result, self.file_path, self.load_kwargs.get('cache'))
+            self.result = result
+        except LoadCancelled:
+            pass
+        except Exception as e:
+            self.error = e
+
+    def report_progress(self, progress: float) -> None:
+        """
+        读取进度回调, 已请求取消时抛出异常中断读取
+        """
+        if self.cancel_event.is_set():
+            raise LoadCancelled()
+        self.progress = progress
+
+    def cancel(self) -> None:
+        """
+        请求取消读取
+        """
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    @property
+    def done(self) -> bool:
+        return self.thread.ident is not None and not self.thread.is_alive()
+
+class MultiFileLoader:
+    """
+    在后台并行读取多个数据文件, 每个文件由一个BackgroundLoader在线程池中读取, 查询进度和结果的用法与BackgroundLoader相同
+    解析主要在pandas/pyarrow中释放GIL的部分完成, 读取结果在同一进程内共享, 不需要跨进程复制
+    """
+    def __init__(self, file_paths: list[str], workers: int = None, **load_kwargs) -> None:
+        """
+        初始化成员变量, workers为同时读取的文件数, 为None时取文件数和CPU核数的较小值
+        """
+        self.file_paths = list(file_paths)
+        self.file_path = f"{len(self.file_paths)} files" # 用于显示状态, 读取失败时为失败的文件
+        self.loaders = [BackgroundLoader(file_path, **load_kwargs) for file_path in self.file_paths]
+        self.workers = workers if workers is not None else min(len(self.file_paths), os.cpu_count() or 1)
+        self.result: list = None        # 各文件的读取结果, 顺序与file_paths相同
+        self.error: Exception = None    # 第一个读取失败的文件的异常
+        self.cancel_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self) -> None:
+        """
+        启动后台读取
+        """
+        self.thread.start()
+
+    def run(self) -> None:
+        """
+        后台线程入口, 在线程池中执行各文件的读取
+        """
+        with ThreadPoolExecutor(max_workers=max(self.workers, 1)) as executor:
+            futures = [executor.submit(self.run_loader, loader) for loader in self.loaders]
+            for future in futures:
+                future.result()
+        if self.cancelled:
+            return
+        failed = next((loader for loader in self.loaders if loader.error is not None), None)
+        if failed is not None:
+            self.file_path = failed.file_path
+            self.error = failed.error
+        else:
+            self.result = [loader.result for loader in self.loaders]
+
+    def run_loader(self, loader: BackgroundLoader) -> None:
+        """
+        在线程池中读取单个文件, 失败时其余文件在下一次报告进度时停止读取
+        """
+        if self.cancelled:
+            return
+        loader.run()
+        if loader.error is not None:
+            for other_loader in self.loaders:
+                other_loader.cancel()
+
+    @property
+    def progress(self) -> float:
+        return sum(loader.progress for loader in self.loaders) / max(len(self.loaders), 1)
+
+    def cancel(self) -> None:
+        """
+        请求取消读取
+        """
+        self.cancel_event.set()
+        for loader in self.loaders:
+            loader.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    @property
+    def done(self) -> bool:
+        return self.thread.ident is not None and not self.thread.is_alive()
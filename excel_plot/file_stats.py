@@ -0,0 +1,160 @@
+# 数据文件列统计及概览相关模块
+import os
+import numpy as np
+from .file_cache import FileCache
+from .decimation import is_sorted, minmax_decimate
+
+class FileStats:
+    """
+    数据文件各数值列的统计信息(最小值, 最大值, NaN个数, 是否单调不减)及粗略概览
+    概览为每列按行数分成overview_bins段的min/max降采样结果(保留点的行号及数值), 不依赖横轴的选择
+    以sidecar文件保存在缓存目录中, 再次打开同一文件时在读取完成前即可显示全范围的概览, 并直接得到横轴范围和单调性
+    """
+    def __init__(self, rows: int, columns: list[str]) -> None:
+        """
+        初始化成员变量, columns为文件的全部列名, 只有数值列有统计信息
+        """
+        self.rows = rows
+        self.columns = list(columns)
+        self.min: dict[str, float] = {}
+        self.max: dict[str, float] = {}
+        self.nan_count: dict[str, int] = {}
+        self.sorted: dict[str, bool] = {}
+        self.overview_rows: dict[str, np.ndarray] = {}   # 概览保留点的行号
+        self.overview_values: dict[str, np.ndarray] = {} # 概览保留点的数值
+
+    @classmethod
+    def compute(cls, data_frame, overview_bins: int = 1024) -> 'FileStats':
+        """
+        统计读取结果的各数值列, 每列顺序扫描几遍, 概览直接复用min/max降采样
+        """
+        stats = cls(len(data_frame), [str(name) for name in data_frame.columns])
+        for name in stats.columns:
+            values = np.asarray(data_frame[name])
+            if values.dtype.kind not in 'biuf':
+                continue
+            nan_count = int(np.count_nonzero(np.isnan(values))) if values.dtype.kind == 'f' else 0
+            rows = minmax_decimate(values, 0, len(values), overview_bins) if len(values) > 0 else np.zeros(0, dtype=np.int64)
+            overview = values[rows]
+            if len(values) == 0 or nan_count == len(values):
+                stats.min[name], stats.max[name] = np.nan, np.nan
+            elif nan_count == 0:
+                # 各段极值都在概览中, 全局极值不需要再扫描一遍
+                stats.min[name], stats.max[name] = float(overview.min()), float(overview.max())
+            else:
+                stats.min[name], stats.max[name] = float(np.nanmin(values)), float(np.nanmax(values))
+            stats.nan_count[name] = nan_count
+            stats.sorted[name] = nan_count == 0 and is_sorted(values)
+            stats.overview_rows[name] = rows.astype(np.int32 if stats.rows < 2**31 else np.int64)
+            stats.overview_values[name] = overview
+        return stats
+
+    @classmethod
+    def read(cls, file_path: str, cache: FileCache) -> 'FileStats':
+        """
+        读取sidecar中的统计信息, 不存在或损坏时返回None
+        """
+        if cache is None:
+            return None
+        try:
+            with np.load(cache.sidecar_path(file_path, 'stats.npz')) as sidecar:
+                stats = cls(int(sidecar['rows']), [str(name) for name in sidecar['columns']])
+                for i, name in enumerate(str(name) for name in sidecar['numeric']):
+                    stats.min[name] = float(sidecar['min'][i])
+                    stats.max[name] = float(sidecar['max'][i])
+                    stats.nan_count[name] = int(sidecar['nan_count'][i])
+                    stats.sorted[name] = bool(sidecar['sorted'][i])
+                    stats.overview_rows[name] = sidecar[f'rows{i}']
+                    stats.overview_values[name] = sidecar[f'values{i}']
+        except (OSError, KeyError, ValueError):
+            return None
+        cache.touch(cache.sidecar_path(file_path, 'stats.npz'))
+        return stats
+
+    def write(self, file_path: str, cache: FileCache) -> None:
+        """
+        把统计信息写入sidecar, 先写临时文件再替换, 写入失败只打印提示
+        """
+        if cache is None:
+            return
+        stats_path = cache.sidecar_path(file_path, 'stats.npz')
+        numeric = list(self.min)
+        arrays = {}
+        for i, name in enumerate(numeric):
+            arrays[f'rows{i}'] = self.overview_rows[name]
+            arrays[f'values{i}'] = self.overview_values[name]
+        try:
+            os.makedirs(os.path.dirname(stats_path), exist_ok=True)
+            with open(stats_path + '.tmp', 'wb') as file:
+                np.savez(
+                    file,
+                    rows=np.array(self.rows),
+                    columns=np.array(self.columns, dtype=str),
+                    numeric=np.array(numeric, dtype=str),
+                    min=np.array([self.min[name] for name in numeric], dtype=np.float64),
+                    max=np.array([self.max[name] for name in numeric], dtype=np.float64),
+                    nan_count=np.array([self.nan_count[name] for name in numeric], dtype=np.int64),
+                    sorted=np.array([self.sorted[name] for name in numeric], dtype=bool),
+                    **arrays
+                )
+            os.replace(stats_path + '.tmp', stats_path)
+        except OSError as e:
+            print(f"Write file stats failed: {e}")
+            return
+        cache.evict(keep=stats_path)
+
+    def limits(self, name: str) -> tuple[float, float]:
+        """
+        某列的数值范围, 没有统计信息时返回None
+        """
+        if name not in self.min or not np.isfinite(self.min[name]):
+            return None
+        return self.min[name], self.max[name]
+
+    def overview_x(self, x_label: str, y_label: str) -> np.ndarray:
+        """
+        y_label概览点对应的横轴, 由横轴列的概览按行号插值得到, 横轴不单调时为NaN(不显示)
+        """
+        if y_label not in self.overview_rows:
+            return np.zeros(0)
+        rows = self.overview_rows[y_label]
+        if not self.sorted.get(x_label):
+            return np.full(len(rows), np.nan)
+        return np.interp(rows, self.overview_rows[x_label], self.overview_values[x_label])
+
+def load_file_stats(data_frame, file_path: str, cache: FileCache, overview_bins: int = 1024) -> FileStats:
+    """
+    读取文件的统计信息, sidecar不存在时由读取结果统计并写入sidecar
+    """
+    stats = FileStats.read(file_path, cache)
+    if stats is None or stats.rows != len(data_frame):
+        stats = FileStats.compute(data_frame, overview_bins)
+        stats.write(file_path, cache)
+    return stats
+
+class OverviewFrame:
+    """
+    以概览数据代替读取结果, 按列名取列的用法与DataFrame相同, 用于读取完成前显示全范围的概览
+    各列概览点的行号不同, 横轴需按FileStats.overview_x取得; 没有概览的列(文本列, 派生通道)为空数组
+    """
+    def __init__(self, stats: FileStats, extra_columns: list[str] = None) -> None:
+        """
+        初始化成员变量, extra_columns为读取完成后才有数据的列, 如派生通道
+        """
+        self.stats = stats
+        self.names = stats.columns + [name for name in extra_columns or [] if name not in stats.columns]
+
+    @property
+    def columns(self) -> list[str]:
+        return list(self.names)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name not in self.names:
+            raise KeyError(name)
+        return self.stats.overview_values.get(name, np.zeros(0))
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.names
+
+    def __len__(self) -> int:
+        return self.stats.rows
@@ -0,0 +1,138 @@
+# 界面布局描述相关模块
+import json
+import os
+from .derived import DerivedFrame, Expression, ExpressionError
+
+# PyYAML为可选依赖, 安装后可读取YAML格式的布局文件
+try:
+    import yaml
+    YAML_AVAILABLE = True
+except ImportError:
+    YAML_AVAILABLE = False
+
+# Python3.11起自带tomllib, 更早的版本可安装tomli
+try:
+    import tomllib
+    TOML_AVAILABLE = True
+except ImportError:
+    try:
+        import tomli as tomllib
+        TOML_AVAILABLE = True
+    except ImportError:
+        TOML_AVAILABLE = False
+
+"""
+布局描述为dict, 与example/excel_plot_ui.py中的子图及曲线对应, JSON格式如下:
+{
+    "title": "Excel Plot",
+    "x": "time",
+    "cursor_info": ["time", "extra_info"],
+    "expressions": {"relative_vel": "v2 - v1"},
+    "subplots": [
+        {"name": "Velocity", "curves": [
+            {"column": "v1", "label": "obj1_vel", "color": "tab:blue", "visible": true},
+            {"column": "v2", "label": "obj2_vel", "color": "tab:red"}
+        ]}
+    ]
+}
+cursor_info为鼠标点击标签上显示的列, expressions为派生通道名称到表达式的映射(见derived模块), 派生通道可像列一样使用, 只能引用在它之前定义的派生通道
+label缺省时使用列名, color缺省时按matplotlib默认颜色循环, visible缺省为true
+YAML及TOML格式的键与JSON相同, TOML中子图和曲线分别写为[[subplots]]和[[subplots.curves]]
+"""
+
+class LayoutError(Exception):
+    """
+    布局文件无法读取或内容不完整
+    """
+
+def load_layout(layout_path: str) -> dict:
+    """
+    按扩展名读取JSON/YAML/TOML格式的布局文件, 并检查内容
+    """
+    extension = os.path.splitext(layout_path)[1].lower()
+    try:
+        if extension == '.json':
+            with open(layout_path, 'r', encoding='utf-8') as file:
+                layout = json.load(file)
+        elif extension in ('.yaml', '.yml'):
+            if not YAML_AVAILABLE:
+                raise LayoutError('reading YAML layout requires PyYAML')
+            with open(layout_path, 'r', encoding='utf-8') as file:
+                layout = yaml.safe_load(file)
+        elif extension == '.toml':
+            if not TOML_AVAILABLE:
+                raise LayoutError('reading TOML layout requires tomli')
+            with open(layout_path, 'rb') as file:
+                layout = tomllib.load(file)
+        else:
+            raise LayoutError(f'unsupported layout format {extension}')
+    except LayoutError:
+        raise
+    except Exception as e:
+        # 各解析库的异常类型不同, 统一转为LayoutError
+        raise LayoutError(f'{layout_path}: {e}') from e
+    check_layout(layout)
+    return layout
+
+def check_layout(layout: dict) -> None:
+    """
+    检查布局中的必需项, 缺失时抛出LayoutError
+    """
+    if not isinstance(layout, dict):
+        raise LayoutError('layout must be a mapping')
+    if not isinstance(layout.get('x'), str):
+        raise LayoutError('layout has no x column')
+    if not isinstance(layout.get('subplots'), list) or len(layout['subplots']) == 0:
+        raise LayoutError('layout has no subplots')
+    for i, subplot in enumerate(layout['subplots']):
+        curves = subplot.get('curves') if isinstance(subplot, dict) else None
+        if not isinstance(curves, list):
+            raise LayoutError(f'subplot {i} has no curves')
+        for j, curve in enumerate(curves):
+            if not isinstance(curve, dict) or not isinstance(curve.get('column'), str):
+                raise LayoutError(f'curve {j} of subplot {i} has no column')
+    expressions = layout.get('expressions', {})
+    if not isinstance(expressions, dict) or not all(isinstance(expression, str) for expression in expressions.values()):
+        raise LayoutError('layout expressions must map names to expression strings')
+    for name, expression in expressions.items():
+        try:
+            Expression(expression)
+        except ExpressionError as e:
+            raise LayoutError(f'expression {name}: {e}') from e
+
+def layout_columns(layout: dict, include_cursor_info: bool = True) -> list[str]:
+    """
+    布局中用到的所有列名, 按出现顺序去重, 读取文件时只解析这些列
+    """
+    columns = [layout['x']]
+    for subplot in layout['subplots']:
+        columns += [curve['column'] for curve in subplot['curves']]
+    if include_cursor_info:
+        columns += list(layout.get('cursor_info', []))
+
+    # 派生通道替换为表达式用到的列, 派生通道可以引用其他派生通道
+    expressions = layout.get('expressions', {})
+    source_columns = []
+    pending = list(dict.fromkeys(columns))
+    while pending:
+        column = pending.pop(0)
+        if column in source_columns:
+            continue
+        if column in expressions:
+            pending = Expression(expressions[column]).columns + pending
+            expressions = {name: expression for name, expression in expressions.items() if name != column} # 防止循环引用
+        else:
+            source_columns.append(column)
+    return source_columns
+
+def layout_frame(layout: dict, data_frame):
+    """
+    按布局中的expressions在数据上附加派生通道, 没有派生通道时直接返回数据
+    """
+    expressions = layout.get('expressions', {})
+    if not expressions:
+        return data_frame
+    try:
+        return DerivedFrame(data_frame, expressions)
+    except ExpressionError as e:
+        raise LayoutError(str(e)) from e
@@ -0,0 +1,112 @@
+# 实时跟踪追加写入的数据文件相关模块
+import io
+import os
+import numpy as np
+import pandas as pd
+
+class ColumnBuffer:
+    """
+    可增长的一维数组, 容量不足时按2倍扩容, 追加数据的均摊代价与追加的样本数成正比
+    """
+    def __init__(self, dtype: np.dtype, capacity: int = 1024) -> None:
+        """
+        初始化成员变量
+        """
+        self.buffer = np.empty(capacity, dtype=dtype)
+        self.size = 0
+
+    def append(self, values: np.ndarray) -> None:
+        """
+        在末尾追加数据
+        """
+        new_size = self.size + len(values)
+        if new_size > len(self.buffer):
+            grown = np.empty(max(new_size, 2 * len(self.buffer)), dtype=self.buffer.dtype)
+            grown[:self.size] = self.buffer[:self.size]
+            self.buffer = grown
+        self.buffer[self.size:new_size] = values
+        self.size = new_size
+
+    @property
+    def data(self) -> np.ndarray:
+        """
+        已写入数据的视图, 扩容后旧视图不再更新, 需要重新获取
+        """
+        return self.buffer[:self.size]
+
+    def __len__(self) -> int:
+        return self.size
+
+class CsvTailReader:
+    """
+    跟踪追加写入的CSV文件, 记录已读取的文件偏移, 每次只解析新追加的完整行
+    按列名取列的用法与DataFrame相同, 取到的是当前数据的视图
+    """
+    def __init__(self, file_path: str, max_read_bytes: int = 64 * 2**20) -> None:
+        """
+        初始化成员变量, 读取表头
+        max_read_bytes为单次读取的最大字节数, 已有数据较多时分多次读入, 避免界面长时间无响应
+        """
+        self.file_path = file_path
+        self.max_read_bytes = max_read_bytes
+        with open(self.file_path, 'rb') as file:
+            header = file.readline()
+        if not header.endswith(b'\n'):
+            raise ValueError(f'{file_path} has no complete header line')
+        self.header_size = len(header)
+        self.names = [str(name) for name in pd.read_csv(io.BytesIO(header)).columns]
+        self.offset = self.header_size
+        self.buffers: dict[str, ColumnBuffer] = {}
+
+    @property
+    def columns(self) -> list[str]:
+        return list(self.names)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name not in self.buffers and name in self.names:
+            return np.empty(0) # 尚未读到数据行
+        return self.buffers[name].data
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.buffers
+
+    def __len__(self) -> int:
+        return len(self.buffers[self.names[0]]) if self.buffers else 0
+
+    def read_new_rows(self) -> int:
+        """
+        解析上次读取之后追加的完整行, 返回新增行数, 文件被截断或重写时从头开始读取
+        """
+        file_size = os.path.getsize(self.file_path)
+        if file_size < self.offset:
+            self.offset = self.header_size
+            self.buffers = {}
+        if file_size == self.offset:
+            return 0
+
+        with open(self.file_path, 'rb') as file:
+            file.seek(self.offset)
+            data = file.read(min(file_size - self.offset, self.max_read_bytes))
+        # 最后一行可能尚未写完, 只解析到最后一个换行符
+        end = data.rfind(b'\n') + 1
+        if end == 0:
+            return 0
+        # 已确定为文本的列按文本解析, 后续批次中只含数字的文本保持原样
+        text_columns = {name: str for name, buffer in self.buffers.items() if buffer.buffer.dtype != np.float64}
+        chunk = pd.read_csv(io.BytesIO(data[:end]), header=None, names=self.names, dtype=text_columns)
+        self.offset += end
+
+        for name in self.names:
+            column = chunk[name]
+            buffer = self.buffers.get(name)
+            if buffer is None:
+                # 首批数据决定列类型, 数值列统一为float64, 其余为文本
+                is_numeric = pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column)
+                buffer = ColumnBuffer(np.float64 if is_numeric else object)
+                self.buffers[name] = buffer
+            if buffer.buffer.dtype == np.float64:
+                values = pd.to_numeric(column, errors='coerce').to_numpy(dtype=np.float64)
+            else:
+                values = column.to_numpy(dtype=object) # 缺失的文本保持为NaN, 与FileCache/StringColumn一致
+            buffer.append(values)
+        return len(chunk)
@@ -0,0 +1,153 @@
+# 曲线点选相关模块
+import matplotlib.axes
+import matplotlib.text
+import numpy as np
+from .blit import BlitManager
+from .decimation import visible_range, minmax_decimate
+
+class CurveSelection:
+    """
+    一次点选的结果, 记录被选中的曲线, 原始数据下标及显示的标签
+    """
+    def __init__(self, curve, index: int, annotation: matplotlib.text.Annotation = None) -> None:
+        """
+        初始化成员变量
+        """
+        self.curve = curve
+        self.index = index
+        self.annotation = annotation
+
+class CurvePicker:
+    """
+    曲线点选类, 代替mplcursors逐个顶点扫描所有曲线
+    横轴单调时二分查找点击位置左右pick_radius像素内的样本, 样本过多时只取min/max金字塔中的极值点作为候选,
+    每条曲线只在显示坐标下比较少量候选点, 点选耗时与数据长度无关
+    标签作为动态元素登记到blit_manager, 增删标签时只局部刷新
+    """
+    def __init__(self, plot_ax: matplotlib.axes.Axes, pick_radius: float = 8.0, max_candidates: int = 4096, blit_manager: BlitManager = None) -> None:
+        """
+        初始化成员变量, pick_radius为选中曲线的最大像素距离, max_candidates为单条曲线直接比较的最大样本数
+        """
+        self.plot_ax = plot_ax
+        self.blit_manager = blit_manager
+        self.pick_radius = pick_radius
+        self.max_candidates = max_candidates
+        self.selections: list[CurveSelection] = []
+
+    def candidates(self, curve, x_min: float, x_max: float) -> np.ndarray:
+        """
+        曲线在横轴范围[x_min, x_max]内参与比较的样本下标, 升序排列
+        """
+        if not curve.x_sorted:
+            # 横轴不单调时只能比较显示的全部点
+            if curve.display_index is not None:
+                return curve.display_index
+            return np.arange(len(curve.x_axis_data))
+        start, stop = visible_range(curve.x_axis_data, x_min, x_max)
+        if stop - start <= self.max_candidates:
+            return np.arange(start, stop)
+        # 每半个像素保留最小值和最大值, 曲线的外形不变
+        bin_num = max(int(4 * self.pick_radius), 1)
+        if curve.pyramid is not None:
+            return curve.pyramid.decimate(start, stop, bin_num)
+        return minmax_decimate(curve.y_axis_data, start, stop, bin_num)
+
+    def nearest_sample(self, curve, x: float, y: float) -> tuple[float, int]:
+        """
+        计算点击位置(显示坐标)到曲线的像素距离, 返回距离和离点击位置最近的原始数据下标
+        """
+        if curve.x_axis_data is None or len(curve.x_axis_data) == 0:
+            return np.inf, -1
+        to_data = self.plot_ax.transData.inverted()
+        (x_min, _), (x_max, _) = to_data.transform([(x - self.pick_radius, y), (x + self.pick_radius, y)])
+        index = self.candidates(curve, min(x_min, x_max), max(x_min, x_max))
+        if len(index) == 0:
+            return np.inf, -1
+        try:
+            # 文本等非数值列按坐标轴的单位转换(如分类轴)得到绘图坐标
+            x_data = np.asarray(self.plot_ax.xaxis.convert_units(curve.x_axis_data[index]), dtype=np.float64)
+            y_data = np.asarray(self.plot_ax.yaxis.convert_units(curve.y_axis_data[index]), dtype=np.float64)
+        except (TypeError, ValueError):
+            return np.inf, -1 # 无法转换为绘图坐标的曲线不参与点选
+        points = self.plot_ax.transData.transform(np.column_stack([x_data, y_data]))
+        if len(index) == 1:
+            return float(np.hypot(*(points[0] - (x, y)))), int(index[0])
+
+        # 点到各线段的距离, 选中最近线段上更靠近点击位置的端点
+        start, end = points[:-1], points[1:]
+        segment = end - start
+        length = np.einsum('ij,ij->i', segment, segment)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            t = np.clip(np.einsum('ij,ij->i', (x, y) - start, segment) / length, 0.0, 1.0)
+        t = np.where(length > 0, t, 0.0)
+        distance = np.hypot(*(start + t[:, None] * segment - (x, y)).T)
+        if np.all(np.isnan(distance)):
+            return np.inf, -1
+        k = int(np.nanargmin(distance))
+        return float(distance[k]), int(index[k] if t[k] <= 0.5 else index[k + 1])
+
+    def pick(self, x: float, y: float, curves: list) -> CurveSelection:
+        """
+        查找离点击位置(显示坐标)最近的可见曲线, 距离超过pick_radius时返回None
+        """
+        best_distance, best = self.pick_radius, None
+        for curve in curves:
+            if not curve.visible:
+                continue
+            distance, index = self.nearest_sample(curve, x, y)
+            if distance <= best_distance:
+                best_distance, best = distance, CurveSelection(curve, index)
+        return best
+
+    def add_selection(self, selection: CurveSelection, text: str) -> None:
+        """
+        在选中的样本处显示标签, 样式与mplcursors一致
+        """
+        x = selection.curve.x_axis_data[selection.index]
+        y = selection.curve.y_axis_data[selection.index]
+        selection.annotation = self.plot_ax.annotate(
+            text,
+            xy=(x, y),
+            xytext=(-15, 15),
+            textcoords='offset points',
+            ha='right',
+            va='bottom',
+            bbox=dict(boxstyle='round,pad=.5', fc='yellow', alpha=.5, ec='k'),
+            arrowprops=dict(arrowstyle='->', connectionstyle='arc3', shrinkB=0, ec='k'),
+        )
+        if self.blit_manager is not None:
+            self.blit_manager.add_artist(selection.annotation)
+        self.selections.append(selection)
+
+    def remove_selection(self, selection: CurveSelection) -> None:
+        """
+        删除一个标签
+        """
+        if self.blit_manager is not None:
+            self.blit_manager.remove_artist(selection.annotation)
+        if selection.annotation.axes is not None:
+            selection.annotation.remove()
+        self.selections.remove(selection)
+
+    def remove_curve(self, curve) -> None:
+        """
+        删除某条曲线上的所有标签
+        """
+        for selection in [selection for selection in self.selections if selection.curve is curve]:
+            self.remove_selection(selection)
+
+    def remove_all_selection(self) -> None:
+        """
+        删除所有标签, 重新绘制前调用, 同时从blit_manager注销
+        """
+        for selection in list(self.selections):
+            self.remove_selection(selection)
+
+    def selection_at(self, x: float, y: float) -> CurveSelection:
+        """
+        查找包含点击位置(显示坐标)的标签, 没有时返回None
+        """
+        for selection in reversed(self.selections):
+            if selection.annotation.get_window_extent().contains(x, y):
+                return selection
+        return None
@@ -0,0 +1,181 @@
+# 性能记录相关模块
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+import numpy as np
+import matplotlib.figure
+
+# 记录的阶段
+PHASE_EVENT = 'event'   # 鼠标及控件事件处理
+PHASE_SYNC = 'sync'     # 子图间同步显示范围
+PHASE_TICKS = 'ticks'   # 刻度计算
+PHASE_RENDER = 'render' # 画布绘制
+PHASE_LOAD = 'load'     # 读取数据文件
+
+# 画布绘制记录中作为一帧统计的名称
+FRAME_NAMES = ('draw', 'blit')
+
+NULL_SPAN = contextlib.nullcontext()
+
+class Span:
+    """
+    记录一段代码耗时的上下文管理器
+    """
+    __slots__ = ('profiler', 'name', 'phase', 'start')
+
+    def __init__(self, profiler: 'Profiler', name: str, phase: str) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.phase = phase
+        self.start = 0.0
+
+    def __enter__(self) -> 'Span':
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.profiler.record(self.name, self.phase, self.start, time.perf_counter())
+
+def profile_span(profiler: 'Profiler', name: str, phase: str):
+    """
+    profiler为None时返回空的上下文管理器, 未开启性能记录时几乎没有额外开销
+    """
+    return NULL_SPAN if profiler is None else Span(profiler, name, phase)
+
+def profiled(phase: str):
+    """
+    方法装饰器, 对象的profiler属性不为None时按方法名记录每次调用的耗时
+    """
+    def decorator(method: callable) -> callable:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.profiler is None:
+                return method(self, *args, **kwargs)
+            with Span(self.profiler, method.__name__, phase):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+class Profiler:
+    """
+    性能记录类, 按阶段记录事件处理, 同步, 刻度计算, 绘制及读取文件的耗时
+    记录保存在容量为capacity的环形缓冲区中, 超出后丢弃最早的记录, 可导出为Chrome trace JSON(chrome://tracing或Perfetto打开)
+    overlay为True时在画布右上角显示帧率及帧耗时的p50/p99, trace_path不为None时关闭窗口时自动导出
+    """
+    def __init__(self, capacity: int = 65536, frame_window: int = 240, overlay: bool = True, trace_path: str = None) -> None:
+        """
+        初始化成员变量, frame_window为统计帧率及帧耗时的最近帧数
+        """
+        self.spans = deque(maxlen=capacity) # (名称, 阶段, 开始时间, 耗时, 线程id)
+        self.frame_durations = deque(maxlen=frame_window)
+        self.frame_ends = deque(maxlen=frame_window)
+        self.overlay = overlay
+        self.trace_path = trace_path
+        self.overlay_text = None
+        self.overlay_interval = 0.25 # 帧率文字的最短更新间隔, 单位s
+        self.overlay_update_time = 0.0
+        self.origin = time.perf_counter() # trace时间戳的起点
+
+    def span(self, name: str, phase: str) -> Span:
+        """
+        记录with语句块的耗时
+        """
+        return Span(self, name, phase)
+
+    def record(self, name: str, phase: str, start: float, end: float) -> None:
+        """
+        添加一条记录, start和end为time.perf_counter()的时间
+        """
+        self.spans.append((name, phase, start, end - start, threading.get_ident()))
+        if phase == PHASE_RENDER and name in FRAME_NAMES:
+            self.frame_durations.append(end - start)
+            self.frame_ends.append(end)
+            if self.overlay_text is not None and end - self.overlay_update_time >= self.overlay_interval:
+                self.overlay_update_time = end
+                self.update_overlay()
+
+    def frame_stats(self) -> tuple[float, float, float]:
+        """
+        最近frame_window帧的帧率及帧耗时的p50/p99, 单位ms
+        """
+        if len(self.frame_durations) == 0:
+            return 0.0, 0.0, 0.0
+        durations = np.asarray(self.frame_durations) * 1000.0
+        elapsed = self.frame_ends[-1] - self.frame_ends[0]
+        fps = (len(self.frame_ends) - 1) / elapsed if elapsed > 0 else 0.0
+        return fps, float(np.percentile(durations, 50)), float(np.percentile(durations, 99))
+
+    def phase_stats(self) -> dict:
+        """
+        按阶段统计缓冲区内记录的次数, 总耗时及p50/p99, 单位ms
+        """
+        durations: dict[str, list[float]] = {}
+        for _, phase, _, duration, _ in list(self.spans):
+            durations.setdefault(phase, []).append(duration * 1000.0)
+        return {
+            phase: {
+                'count': len(values),
+                'total_ms': round(float(np.sum(values)), 3),
+                'p50_ms': round(float(np.percentile(values, 50)), 3),
+                'p99_ms': round(float(np.percentile(values, 99)), 3),
+            }
+            for phase, values in durations.items()
+        }
+
+    def clear(self) -> None:
+        """
+        清空所有记录
+        """
+        self.spans.clear()
+        self.frame_durations.clear()
+        self.frame_ends.clear()
+
+    def dump_chrome_trace(self, file_path: str) -> None:
+        """
+        把缓冲区内的记录导出为Chrome trace JSON
+        """
+        pid = os.getpid()
+        events = [
+            {
+                'name': name,
+                'cat': phase,
+                'ph': 'X',
+                'ts': (start - self.origin) * 1e6,
+                'dur': duration * 1e6,
+                'pid': pid,
+                'tid': thread_id,
+            }
+            for name, phase, start, duration, thread_id in list(self.spans)
+        ]
+        with open(file_path, 'w', encoding='utf-8') as file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
+
+    def attach(self, fig: matplotlib.figure.Figure, blit_manager=None) -> None:
+        """
+        记录画布的完整重绘及局部刷新, 按设置显示帧率文字及在关闭窗口时导出trace
+        """
+        draw = fig.draw
+        def profiled_draw(renderer) -> None:
+            with self.span('draw', PHASE_RENDER):
+                draw(renderer)
+        fig.draw = profiled_draw # 画布通过figure.draw完整重绘, 替换实例方法即可记录所有后端的重绘
+
+        if blit_manager is not None:
+            blit_manager.profiler = self
+        if self.overlay:
+            self.overlay_text = fig.text(0.995, 0.995, '', ha='right', va='top', fontsize=8, family='monospace')
+            if blit_manager is not None:
+                blit_manager.add_artist(self.overlay_text) # 局部刷新时也重绘帧率文字
+        if self.trace_path is not None:
+            fig.canvas.mpl_connect('close_event', lambda event: self.dump_chrome_trace(self.trace_path))
+
+    def update_overlay(self) -> None:
+        """
+        更新帧率文字, 在下一帧显示
+        """
+        fps, p50, p99 = self.frame_stats()
+        self.overlay_text.set_text(f'{fps:5.1f} FPS  p50 {p50:6.1f} ms  p99 {p99:6.1f} ms')
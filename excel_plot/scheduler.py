@@ -0,0 +1,55 @@
+# 重绘调度相关模块
+import time
+import matplotlib.figure
+
+class RedrawScheduler:
+    """
+    重绘调度类, 把高频鼠标事件合并为每帧最多一次的更新
+    同一个key在一帧内只保留最后一次提交的任务, 距上次执行超过一帧时立即执行, 否则由画布定时器在帧末执行
+    max_fps为None或不大于0时不做合并, 每次提交立即执行
+    """
+    def __init__(self, fig: matplotlib.figure.Figure, max_fps: float = 60) -> None:
+        """
+        初始化成员变量
+        """
+        self.canvas = fig.canvas
+        self.max_fps = max_fps
+        self.pending_tasks: dict = {} # 待执行任务, 同一key只保留最后一次
+        self.last_flush_time = 0.0
+        self.timer = None
+        self.timer_active = False
+
+    def post(self, key, task: callable) -> None:
+        """
+        提交任务, 在当前帧结束时执行
+        """
+        self.pending_tasks[key] = task
+        if self.max_fps is None or self.max_fps <= 0:
+            self.flush()
+            return
+
+        frame_interval = 1.0 / self.max_fps
+        elapsed = time.perf_counter() - self.last_flush_time
+        if elapsed >= frame_interval:
+            self.flush()
+        elif not self.timer_active:
+            if self.timer is None:
+                self.timer = self.canvas.new_timer()
+                self.timer.single_shot = True
+                self.timer.add_callback(self.flush)
+            self.timer.interval = max(int((frame_interval - elapsed) * 1000), 1)
+            self.timer_active = True
+            self.timer.start()
+
+    def flush(self) -> None:
+        """
+        立即执行所有待执行任务
+        """
+        if self.timer_active:
+            self.timer.stop()
+            self.timer_active = False
+        self.last_flush_time = time.perf_counter()
+        tasks = list(self.pending_tasks.values())
+        self.pending_tasks.clear()
+        for task in tasks:
+            task()
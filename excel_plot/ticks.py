@@ -0,0 +1,92 @@
+# 坐标轴刻度相关模块
+import math
+import numpy as np
+import matplotlib.ticker
+from .profiler import PHASE_TICKS, profile_span
+
+NICE_STEPS = (1.0, 2.0, 2.5, 5.0, 10.0)
+
+def nice_step(raw_step: float) -> float:
+    """
+    把刻度间距向上取整为1, 2, 2.5, 5乘以10的整数次幂
+    """
+    exponent = math.floor(math.log10(raw_step))
+    magnitude = 10.0 ** exponent
+    fraction = raw_step / magnitude
+    for step in NICE_STEPS:
+        if fraction <= step + 1e-9:
+            return step * magnitude
+    return 10.0 * magnitude
+
+def step_decimals(step: float, max_decimals: int = 12) -> int:
+    """
+    刻度间距需要显示的小数位数
+    """
+    for decimals in range(max_decimals + 1):
+        scaled = step * 10.0 ** decimals
+        if abs(scaled - round(scaled)) <= 1e-6 * max(scaled, 1.0):
+            return decimals
+    return max_decimals
+
+class NiceTickLocator(matplotlib.ticker.Locator):
+    """
+    横轴刻度定位类, 按坐标轴像素宽度选择间距为1, 2, 2.5, 5乘以10的整数次幂的刻度
+    平移时刻度值保持为间距的整数倍, 标签文字在帧间重复, 文字排版可命中matplotlib的缓存;
+    显示范围和像素宽度不变时直接返回上次结果, 共享横轴的多个子图每帧只计算一次
+    """
+    def __init__(self, max_ticks: int = 30, min_spacing: float = 80.0) -> None:
+        """
+        初始化成员变量, max_ticks为最多刻度数, min_spacing为相邻刻度的最小像素间距
+        """
+        self.max_ticks = max_ticks
+        self.min_spacing = min_spacing
+        self.step = 1.0
+        self.cache_key: tuple = None
+        self.cache_ticks: np.ndarray = None
+        self.profiler = None # 开启性能记录时记录每次重新计算刻度的耗时
+
+    def __call__(self) -> np.ndarray:
+        vmin, vmax = self.axis.get_view_interval()
+        return self.tick_values(vmin, vmax)
+
+    def tick_values(self, vmin: float, vmax: float) -> np.ndarray:
+        """
+        计算[vmin, vmax]范围内的刻度
+        """
+        if vmax < vmin:
+            vmin, vmax = vmax, vmin
+        width = self.axis.axes.bbox.width if self.axis is not None else self.max_ticks * self.min_spacing
+        key = (vmin, vmax, width)
+        if key == self.cache_key:
+            return self.cache_ticks
+
+        with profile_span(self.profiler, 'tick_values', PHASE_TICKS):
+            span = vmax - vmin
+            if not np.isfinite(span) or span <= 0:
+                ticks = np.array([vmin])
+            else:
+                interval_num = max(min(self.max_ticks, int(width / self.min_spacing)) - 1, 1)
+                self.step = nice_step(span / interval_num)
+                first = math.ceil(vmin / self.step) * self.step
+                ticks = first + self.step * np.arange(int(math.floor((vmax - first) / self.step + 1e-9)) + 1)
+        self.cache_key = key
+        self.cache_ticks = ticks
+        return ticks
+
+class NiceTickFormatter(matplotlib.ticker.Formatter):
+    """
+    横轴刻度标签格式类, 按刻度间距确定小数位数, 不使用科学计数法和偏移量
+    """
+    def __init__(self) -> None:
+        """
+        初始化成员变量
+        """
+        self.decimals = 0
+
+    def set_locs(self, locs) -> None:
+        super().set_locs(locs)
+        if len(locs) > 1:
+            self.decimals = step_decimals(abs(locs[1] - locs[0]))
+
+    def __call__(self, x: float, pos: int = None) -> str:
+        return f'{x + 0.0:.{self.decimals}f}' # 加0.0避免显示-0
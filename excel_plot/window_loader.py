@@ -0,0 +1,314 @@
+# 按横轴范围读取数据文件相关模块
+import io
+import math
+import os
+import numpy as np
+import pandas as pd
+from .file_cache import FileCache
+from .dtype_policy import DtypePolicy
+from .file_loader import DataFileError, PYARROW_AVAILABLE, FILE_FORMAT_CSV, FILE_FORMAT_PARQUET, sniff_file_format, sniff_csv_dtypes, apply_dtype_policy
+
+if PYARROW_AVAILABLE:
+    import pyarrow.parquet
+
+class WindowedFile:
+    """
+    按横轴范围读取数据文件的一段, 横轴列需要单调递增(如时间)
+    第一次打开时建立稀疏索引: CSV每隔stride_bytes字节记录一行的字节偏移及横轴值, 只需跳读文件, 不解析全部内容;
+    Parquet使用各行组横轴列的min/max统计, 缺少统计信息时读取该行组的横轴列计算
+    cache不为None时索引保存在缓存目录的sidecar子目录下, 再次打开同一文件时直接读取
+    """
+    def __init__(self, file_path: str, x_label: str, usecols: list[str] = None, cache: FileCache = None, stride_bytes: int = 2**20) -> None:
+        """
+        初始化成员变量, 读取或建立索引, usecols为需要读取的列名, 为None时读取全部列
+        """
+        self.file_path = file_path
+        self.x_label = x_label
+        self.usecols = None if usecols is None else list(dict.fromkeys([x_label] + list(usecols)))
+        self.cache = cache
+        self.stride_bytes = stride_bytes
+        self.file_format = sniff_file_format(file_path)
+        if self.file_format not in (FILE_FORMAT_CSV, FILE_FORMAT_PARQUET):
+            raise DataFileError(f'windowed loading supports CSV and Parquet files, not {self.file_format}')
+        if self.file_format == FILE_FORMAT_PARQUET and not PYARROW_AVAILABLE:
+            raise DataFileError('windowed loading of Parquet files requires pyarrow')
+
+        # 第i块数据的横轴范围为[block_min[i], block_max[i]], CSV中位于字节偏移block_pos[i]到block_pos[i+1]之间, Parquet中为第i个行组
+        self.block_min: np.ndarray = None
+        self.block_max: np.ndarray = None
+        self.block_pos: np.ndarray = None
+        self.header = b''
+        self.dtype: dict = None
+        if not self.read_index():
+            self.build_index()
+            self.write_index()
+        if len(self.block_min) == 0:
+            raise DataFileError(f'{file_path} has no data rows')
+        if self.file_format == FILE_FORMAT_CSV:
+            with open(file_path, 'rb') as file:
+                self.header = file.readline()
+            self.dtype = sniff_csv_dtypes(file_path, self.usecols)
+
+    @property
+    def x_min(self) -> float:
+        return float(self.block_min[0])
+
+    @property
+    def x_max(self) -> float:
+        return float(self.block_max[-1])
+
+    @property
+    def columns(self) -> list[str]:
+        if self.usecols is not None:
+            return list(self.usecols)
+        if self.file_format == FILE_FORMAT_PARQUET:
+            return list(pyarrow.parquet.ParquetFile(self.file_path).schema_arrow.names)
+        return [str(name) for name in pd.read_csv(io.BytesIO(self.header), nrows=0).columns]
+
+    def index_path(self) -> str:
+        return self.cache.sidecar_path(self.file_path, 'index.npz')
+
+    def read_index(self) -> bool:
+        """
+        从sidecar读取索引, 不存在, 损坏或横轴列不同时返回False
+        """
+        if self.cache is None:
+            return False
+        try:
+            with np.load(self.index_path()) as index:
+                if str(index['x_label']) != self.x_label or int(index['stride_bytes']) != self.stride_bytes:
+                    return False
+                self.block_min, self.block_max, self.block_pos = index['block_min'], index['block_max'], index['block_pos']
+        except (OSError, KeyError, ValueError):
+            return False
+        self.cache.touch(self.index_path())
+        return True
+
+    def write_index(self) -> None:
+        """
+        把索引写入sidecar, 先写临时文件再替换, 写入失败只打印提示
+        """
+        if self.cache is None:
+            return
+        index_path = self.index_path()
+        try:
+            os.makedirs(os.path.dirname(index_path), exist_ok=True)
+            with open(index_path + '.tmp', 'wb') as file:
+                np.savez(
+                    file,
+                    x_label=np.array(self.x_label),
+                    stride_bytes=np.array(self.stride_bytes),
+                    block_min=self.block_min,
+                    block_max=self.block_max,
+                    block_pos=self.block_pos
+                )
+            os.replace(index_path + '.tmp', index_path)
+        except OSError as e:
+            print(f"Write index failed: {e}")
+            return
+        self.cache.evict(keep=index_path)
+
+    def build_index(self) -> None:
+        """
+        建立稀疏索引
+        """
+        if self.file_format == FILE_FORMAT_PARQUET:
+            self.build_parquet_index()
+        else:
+            self.build_csv_index()
+
+    def build_csv_index(self) -> None:
+        """
+        每隔stride_bytes字节跳到下一行的行首, 记录该行的字节偏移及横轴值, 最后记录末行的横轴值
+        """
+        file_size = os.path.getsize(self.file_path)
+        positions, values = [], []
+        with open(self.file_path, 'rb') as file:
+            header = file.readline()
+            names = [str(name) for name in pd.read_csv(io.BytesIO(header), nrows=0).columns]
+            if self.x_label not in names:
+                raise DataFileError(f'{self.file_path} has no column {self.x_label}')
+            x_index = names.index(self.x_label)
+            position = len(header)
+            while position < file_size:
+                file.seek(position)
+                line = file.readline()
+                x = parse_csv_field(line, x_index)
+                if x is not None:
+                    positions.append(position)
+                    values.append(x)
+                # 跳过stride_bytes字节后丢弃不完整的一行
+                file.seek(max(position + len(line), position + self.stride_bytes) - 1)
+                file.readline()
+                position = file.tell()
+            last_x = parse_csv_field(last_csv_line(file, len(header), file_size), x_index)
+
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) > 0 and (np.any(np.diff(values) < 0) or (last_x is not None and last_x < values[-1])):
+            raise DataFileError(f'column {self.x_label} is not sorted, windowed loading needs an increasing x column')
+        self.block_min = values
+        self.block_max = np.append(values[1:], values[-1] if last_x is None else last_x) if len(values) > 0 else values
+        self.block_pos = np.array(positions + [file_size], dtype=np.int64)
+
+    def build_parquet_index(self) -> None:
+        """
+        读取各行组横轴列的min/max统计
+        """
+        parquet_file = pyarrow.parquet.ParquetFile(self.file_path)
+        names = parquet_file.schema_arrow.names
+        if self.x_label not in names:
+            raise DataFileError(f'{self.file_path} has no column {self.x_label}')
+        x_index = names.index(self.x_label)
+        block_min, block_max = [], []
+        for i in range(parquet_file.metadata.num_row_groups):
+            statistics = parquet_file.metadata.row_group(i).column(x_index).statistics
+            if statistics is not None and statistics.has_min_max:
+                block_min.append(float(statistics.min))
+                block_max.append(float(statistics.max))
+            else:
+                x = parquet_file.read_row_group(i, columns=[self.x_label]).column(0).to_numpy()
+                block_min.append(float(np.nanmin(x)) if len(x) > 0 else np.nan)
+                block_max.append(float(np.nanmax(x)) if len(x) > 0 else np.nan)
+        self.block_min = np.asarray(block_min, dtype=np.float64)
+        self.block_max = np.asarray(block_max, dtype=np.float64)
+        self.block_pos = np.arange(len(block_min), dtype=np.int64)
+
+    def load(self, x_min: float, x_max: float, include_max: bool = True) -> pd.DataFrame:
+        """
+        读取横轴在[x_min, x_max]内的行, include_max为False时不含x_max, 只读取与范围相交的块
+        """
+        blocks = np.flatnonzero((self.block_max >= x_min) & (self.block_min <= x_max))
+        if len(blocks) == 0:
+            data_frame = self.empty_frame()
+        elif self.file_format == FILE_FORMAT_PARQUET:
+            table = pyarrow.parquet.ParquetFile(self.file_path).read_row_groups(blocks.tolist(), columns=self.usecols)
+            data_frame = table.to_pandas()
+        else:
+            data_frame = self.read_csv_range(int(self.block_pos[blocks[0]]), int(self.block_pos[blocks[-1] + 1]))
+
+        x = data_frame[self.x_label].to_numpy()
+        mask = (x >= x_min) & ((x <= x_max) if include_max else (x < x_max))
+        return data_frame[mask].reset_index(drop=True)
+
+    def read_csv_range(self, start: int, stop: int) -> pd.DataFrame:
+        """
+        解析CSV中字节偏移[start, stop)之间的行, 各段使用相同的列类型
+        """
+        with open(self.file_path, 'rb') as file:
+            file.seek(start)
+            data = self.header + file.read(stop - start)
+        try:
+            try:
+                return pd.read_csv(io.BytesIO(data), usecols=self.usecols, dtype=self.dtype)
+            except ValueError:
+                # 样本之后出现非数值内容, 由pandas推断类型
+                return pd.read_csv(io.BytesIO(data), usecols=self.usecols)
+        except (pd.errors.ParserError, pd.errors.EmptyDataError, ValueError, UnicodeDecodeError) as e:
+            raise DataFileError(e) from e
+
+    def empty_frame(self) -> pd.DataFrame:
+        """
+        没有数据的DataFrame, 列与读取结果一致
+        """
+        if self.file_format == FILE_FORMAT_CSV:
+            return self.read_csv_range(0, 0)
+        return pyarrow.parquet.ParquetFile(self.file_path).schema_arrow.empty_table().select(self.usecols or self.columns).to_pandas()
+
+class SlidingWindow:
+    """
+    按显示范围维护已读取的数据, 只保留显示范围附近的数据在内存中
+    横轴范围按tile_width划分为若干段, 保留与显示范围相交的段及两侧各prefetch段, 平移进入预读段时读取下一段并释放远处的段
+    显示范围过大时最多保留max_tiles段, dtype_policy不为None时对拼接后的数据按策略压缩列类型, 与完整读取时一致
+    """
+    def __init__(self, windowed_file: WindowedFile, tile_width: float, prefetch: int = 1, max_tiles: int = 16, dtype_policy: DtypePolicy = None) -> None:
+        """
+        初始化成员变量
+        """
+        self.windowed_file = windowed_file
+        self.tile_width = tile_width if tile_width > 0 else max(windowed_file.x_max - windowed_file.x_min, 1.0)
+        self.prefetch = prefetch
+        self.max_tiles = max_tiles
+        self.dtype_policy = dtype_policy
+        self.tile_num = max(math.ceil((windowed_file.x_max - windowed_file.x_min) / self.tile_width), 1)
+        self.tiles: dict[int, pd.DataFrame] = {}
+        self.view = (windowed_file.x_min, windowed_file.x_max)
+        self.data_frame: pd.DataFrame = None
+
+    @property
+    def x_label(self) -> str:
+        return self.windowed_file.x_label
+
+    def tile(self, x: float) -> int:
+        """
+        横轴x所在的段
+        """
+        return min(max(int(math.floor((x - self.windowed_file.x_min) / self.tile_width)), 0), self.tile_num - 1)
+
+    def load_tile(self, tile: int) -> pd.DataFrame:
+        """
+        读取一段数据, 最后一段包含文件末行
+        """
+        x_min = self.windowed_file.x_min + tile * self.tile_width
+        return self.windowed_file.load(x_min, x_min + self.tile_width, include_max=tile == self.tile_num - 1)
+
+    def update(self, x_min: float, x_max: float) -> bool:
+        """
+        显示范围变化后更新已读取的数据, 读取了新段时返回True, 由调用方用data_frame替换曲线数据
+        """
+        self.view = (x_min, x_max)
+        first, last = self.tile(x_min), self.tile(x_max)
+        if last - first + 1 > self.max_tiles:
+            # 显示范围过大, 只保留中间的max_tiles段
+            first = (first + last - self.max_tiles + 1) // 2
+            last = first + self.max_tiles - 1
+        needed = range(max(first - self.prefetch, 0), min(last + self.prefetch, self.tile_num - 1) + 1)
+        if self.data_frame is not None and all(tile in self.tiles for tile in needed):
+            return False
+        # 多保留一段再释放, 在段边界来回平移时不反复读取
+        keep = range(first - self.prefetch - 1, last + self.prefetch + 2)
+        tiles = {tile: data_frame for tile, data_frame in self.tiles.items() if tile in keep}
+        for tile in needed:
+            if tile not in tiles:
+                tiles[tile] = self.load_tile(tile)
+        self.tiles = dict(sorted(tiles.items()))
+        dtype_policy = self.dtype_policy.with_keep_columns([self.x_label]) if self.dtype_policy is not None else None
+        self.data_frame = apply_dtype_policy(pd.concat(list(self.tiles.values()), ignore_index=True), dtype_policy)
+        return True
+
+def parse_csv_field(line: bytes, index: int) -> float:
+    """
+    解析CSV一行中第index个字段为浮点数, 无法解析时返回None
+    """
+    fields = line.rstrip(b'\r\n').split(b',')
+    if index >= len(fields):
+        return None
+    try:
+        return float(fields[index].strip(b'"'))
+    except ValueError:
+        return None
+
+def last_csv_line(file, data_start: int, file_size: int, tail_bytes: int = 2**16) -> bytes:
+    """
+    CSV文件的最后一个非空行
+    """
+    start = max(file_size - tail_bytes, data_start)
+    file.seek(start)
+    lines = [line for line in file.read(file_size - start).splitlines() if line.strip()]
+    return lines[-1] if lines else b''
+
+def load_data_window(
+    file_path: str,
+    x_label: str,
+    x_min: float,
+    x_max: float,
+    usecols: list[str] = None,
+    cache: FileCache = None,
+    dtype_policy: DtypePolicy = None
+) -> pd.DataFrame:
+    """
+    只读取横轴x_label在[x_min, x_max]内的行, 用于只关心长时间记录中一小段的场景
+    dtype_policy不为None时与load_data_file相同按策略压缩列类型, 横轴列保持读取时的类型
+    """
+    if dtype_policy is not None:
+        dtype_policy = dtype_policy.with_keep_columns([x_label])
+    return apply_dtype_policy(WindowedFile(file_path, x_label, usecols, cache).load(x_min, x_max), dtype_policy)
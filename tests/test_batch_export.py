@@ -0,0 +1,17 @@
+from excel_plot.batch_export import output_stems
+
+def test_unique_stems_kept():
+    assert output_stems(['a/run1.csv', 'b/run2.csv']) == {'a/run1.csv': 'run1', 'b/run2.csv': 'run2'}
+
+def test_same_name_in_different_dirs():
+    stems = output_stems(['data/run1/log.csv', 'data/run2/log.csv'])
+    assert stems == {'data/run1/log.csv': 'run1_log', 'data/run2/log.csv': 'run2_log'}
+
+def test_same_stem_different_extension():
+    stems = output_stems(['docs/example_data.txt', 'docs/example_data.xlsx'])
+    assert stems == {'docs/example_data.txt': 'example_data.txt', 'docs/example_data.xlsx': 'example_data.xlsx'}
+
+def test_stems_unique_ignoring_case():
+    file_paths = ['x/Log.csv', 'y/log.csv', 'x_Log.csv', 'x/x_log.csv']
+    stems = output_stems(file_paths)
+    assert len({stem.lower() for stem in stems.values()}) == len(file_paths)
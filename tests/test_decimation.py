@@ -0,0 +1,64 @@
+import numpy as np
+from excel_plot.decimation import minmax_decimate, MinMaxPyramid
+
+def nan_signal(n: int = 200_000, nan_step: int = 5000) -> np.ndarray:
+    """
+    带尖峰且每隔nan_step个样本有一个NaN的信号
+    """
+    rng = np.random.default_rng(0)
+    y = rng.standard_normal(n)
+    y[::nan_step] = np.nan
+    y[n // 2 + 7] = 100.0
+    return y
+
+def test_minmax_decimate_skips_nan():
+    y = nan_signal()
+    index = minmax_decimate(y, 0, len(y), 1000)
+    assert np.nanmax(y[index]) == 100.0
+    assert np.nanmin(y[index]) == np.nanmin(y)
+
+def test_pyramid_decimate_skips_nan():
+    y = nan_signal()
+    pyramid = MinMaxPyramid(y)
+    for level in range(len(pyramid.levels_max)):
+        assert not np.isnan(y[pyramid.levels_max[level]]).any()
+    index = pyramid.decimate(0, len(y), 1000)
+    assert np.nanmax(y[index]) == 100.0
+    assert np.nanmin(y[index]) == np.nanmin(y)
+
+def test_pyramid_all_nan_block():
+    y = np.arange(64, dtype=np.float64)
+    y[:16] = np.nan
+    pyramid = MinMaxPyramid(y)
+    top = len(pyramid.levels_min) - 1
+    assert y[pyramid.levels_min[top][0]] == 16.0
+    assert y[pyramid.levels_max[top][0]] == 63.0
+
+def test_pyramid_extend_skips_nan():
+    y = nan_signal(50_000)
+    pyramid = MinMaxPyramid(y[:20_001])
+    pyramid.extend(y)
+    index = pyramid.decimate(0, len(y), 100)
+    assert np.nanmax(y[index]) == np.nanmax(y)
+    assert np.nanmin(y[index]) == np.nanmin(y)
+
+def test_pyramid_extent_skips_nan():
+    rng = np.random.default_rng(1)
+    y = rng.standard_normal(300_000)
+    y[::5000] = np.nan
+    pyramid = MinMaxPyramid(y)
+    for start, stop in [(0, len(y)), (1, len(y) - 3), (12345, 234567), (5000, 5001), (100, 117)]:
+        window = y[start:stop]
+        if np.isnan(window).all():
+            assert pyramid.extent(start, stop) is None
+        else:
+            assert pyramid.extent(start, stop) == (np.nanmin(window), np.nanmax(window))
+
+def test_pyramid_extent_matches_scan():
+    rng = np.random.default_rng(2)
+    y = rng.standard_normal(10_001)
+    pyramid = MinMaxPyramid(y)
+    for start, stop in rng.integers(0, len(y) + 1, size=(200, 2)):
+        start, stop = sorted((int(start), int(stop)))
+        expected = None if start == stop else (y[start:stop].min(), y[start:stop].max())
+        assert pyramid.extent(start, stop) == expected
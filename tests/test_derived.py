@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+from excel_plot.derived import DerivedFrame, Expression
+from excel_plot.dtype_policy import DtypePolicy
+
+def downcast_frame() -> pd.DataFrame:
+    """
+    经DtypePolicy压缩后的数据, 整数列为int8/int16, 浮点列为float32
+    """
+    data_frame = pd.DataFrame({
+        'a': np.full(100, 100, dtype=np.int64),
+        'b': np.full(100, 100, dtype=np.int64),
+        'c': np.arange(300, 400, dtype=np.int64),
+        'v': np.linspace(0.0, 1.0, 100),
+    })
+    return DtypePolicy().apply(data_frame)
+
+def test_downcast_inputs():
+    data_frame = downcast_frame()
+    assert data_frame['a'].dtype == np.int8
+    assert data_frame['c'].dtype == np.int16
+    derived = DerivedFrame(data_frame, {'sum': 'a + b', 'square': 'c * c'})
+    np.testing.assert_array_equal(derived['sum'], np.full(100, 200))
+    np.testing.assert_array_equal(derived['square'], np.arange(300, 400) ** 2)
+
+def test_downcast_float_precision():
+    data_frame = downcast_frame()
+    result = Expression('v * 1e9 - v * 1e9').evaluate([np.asarray(data_frame['v'])])
+    assert result.dtype == np.float64
+    np.testing.assert_array_equal(result, 0.0)
+
+def test_incremental_matches_full():
+    rng = np.random.default_rng(0)
+    data_frame = pd.DataFrame({'t': np.arange(1000) * 0.01, 'v': rng.standard_normal(1000)})
+    derived = DerivedFrame(data_frame.iloc[:600].reset_index(drop=True), {'smooth': 'lowpass(v, 21)', 'acc': 'derivative(v, t)'})
+    derived['smooth'], derived['acc']
+    derived.data_frame = data_frame
+    full = DerivedFrame(data_frame, {'smooth': 'lowpass(v, 21)', 'acc': 'derivative(v, t)'})
+    np.testing.assert_allclose(derived['smooth'], full['smooth'], rtol=1e-12)
+    np.testing.assert_allclose(derived['acc'], full['acc'], rtol=1e-12)
@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+from excel_plot.dtype_policy import DtypePolicy
+
+def test_long_time_column_kept():
+    # 1kHz采样12小时的相对时间列, 转为float32后采样间隔抖动并出现重复值
+    time = np.arange(1000 * 3600 * 12) * 0.001
+    converted = DtypePolicy().apply(pd.DataFrame({'time': time}))
+    assert converted['time'].dtype == np.float64
+    assert np.all(np.diff(converted['time'].to_numpy()) > 0)
+
+def test_keep_columns():
+    data_frame = pd.DataFrame({'time': np.arange(1000) * 0.5 + 0.25, 'v': np.linspace(0.0, 1.0, 1000)})
+    policy = DtypePolicy().with_keep_columns(['time', None])
+    converted = policy.apply(data_frame)
+    assert converted['time'].dtype == np.float64
+    assert converted['v'].dtype == np.float32
+    assert DtypePolicy().apply(data_frame)['time'].dtype == np.float32
+
+def test_signal_column_downcast():
+    rng = np.random.default_rng(0)
+    data_frame = pd.DataFrame({'v': rng.standard_normal(100_000), 'sin': np.sin(np.arange(100_000) * 0.001)})
+    converted = DtypePolicy().apply(data_frame)
+    assert converted['v'].dtype == np.float32
+    assert converted['sin'].dtype == np.float32
@@ -0,0 +1,56 @@
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.backend_bases import MouseEvent
+from excel_plot.excel_plot import ExcelPlotBaseFigure, ExcelPlotCurve
+
+def plotted_figure(curves: list[ExcelPlotCurve], x_axis_data: np.ndarray) -> ExcelPlotBaseFigure:
+    """
+    在Agg画布上绘制曲线
+    """
+    figure = ExcelPlotBaseFigure(name='test', fig=plt.figure())
+    for curve in curves:
+        figure.add_curve(curve)
+    figure.plot([0.1, 0.1, 0.8, 0.8], x_axis_data)
+    return figure
+
+def test_auto_ylim_with_nan():
+    rng = np.random.default_rng(0)
+    x = np.arange(200_000) * 0.01
+    y = rng.standard_normal(len(x))
+    y[::5000] = np.nan
+    figure = plotted_figure([ExcelPlotCurve(y, 'y', None)], x)
+    figure.set_auto_ylim(True)
+    figure.plot_ax.set_xlim(100.0, 1500.0)
+    visible = y[(x >= 100.0) & (x <= 1500.0)]
+    assert figure.visible_extent() == (np.nanmin(visible), np.nanmax(visible))
+    y_min, y_max = figure.plot_ax.get_ylim()
+    assert y_min < np.nanmin(visible) and y_max > np.nanmax(visible)
+    plt.close('all')
+
+def test_auto_ylim_skips_text_curve():
+    x = np.arange(100, dtype=np.float64)
+    text = np.array([f'state{i % 3}' for i in range(100)], dtype=object)
+    figure = plotted_figure([ExcelPlotCurve(text, 'state', None), ExcelPlotCurve(x * 2.0, 'v', None)], x)
+    figure.set_auto_ylim(True)
+    figure.plot_ax.set_xlim(10.0, 20.0)
+    assert figure.visible_extent() == (20.0, 40.0)
+    plt.close('all')
+
+def test_pick_with_text_curve():
+    x = np.arange(100, dtype=np.float64)
+    text = np.array([f'state{i % 3}' for i in range(100)], dtype=object)
+    value = ExcelPlotCurve(x * 0.01, 'v', None)
+    figure = plotted_figure([ExcelPlotCurve(text, 'state', None), value], x)
+    figure.fig.canvas.draw()
+    x_pixel, y_pixel = figure.plot_ax.transData.transform((50.0, figure.plot_ax.yaxis.convert_units(['state2'])[0]))
+    event = MouseEvent('button_press_event', figure.fig.canvas, x_pixel, y_pixel, button=1)
+    assert not figure.pick_event(event)
+    selection, = figure.picker.selections
+    assert selection.curve.label == 'state' and selection.index == 50
+    x_pixel, y_pixel = figure.plot_ax.transData.transform((20.0, 0.2))
+    figure.pick_event(MouseEvent('button_press_event', figure.fig.canvas, x_pixel, y_pixel, button=1))
+    assert figure.picker.selections[-1].curve is value
+    figure.fig.canvas.draw()
+    plt.close('all')
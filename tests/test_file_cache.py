@@ -0,0 +1,77 @@
+import os
+import numpy as np
+import pandas as pd
+from excel_plot.file_cache import FileCache
+from excel_plot.file_loader import load_data_file
+
+def sample_frame(rows: int = 1000) -> pd.DataFrame:
+    """
+    含数值, 缺失文本, 非ASCII文本, 时间及带时区时间列的数据
+    """
+    rng = np.random.default_rng(0)
+    text = np.array([f'state{i % 7}' for i in range(rows)], dtype=object)
+    text[::13] = np.nan
+    text[5] = '速度'
+    return pd.DataFrame({
+        'time': np.arange(rows) * 0.01,
+        'v1': rng.standard_normal(rows),
+        'count': np.arange(rows, dtype=np.int64),
+        'state': text,
+        'stamp': pd.date_range('2024-01-01', periods=rows, freq='s'),
+        'stamp_tz': pd.date_range('2024-01-01', periods=rows, freq='min', tz='Asia/Shanghai'),
+    })
+
+def test_cache_round_trip(tmp_path):
+    source = tmp_path / 'data.csv'
+    source.write_text('placeholder')
+    cache = FileCache(str(tmp_path / 'cache'))
+    data_frame = sample_frame()
+    cache.store(str(source), data_frame, complete=True)
+    pd.testing.assert_frame_equal(cache.load(str(source)), data_frame)
+    pd.testing.assert_frame_equal(cache.load(str(source), ['stamp', 'state']), data_frame[['state', 'stamp']])
+
+def test_csv_parse_matches_cache(tmp_path):
+    source = tmp_path / 'data.csv'
+    sample_frame().drop(columns=['stamp', 'stamp_tz']).to_csv(source, index=False)
+    cache = FileCache(str(tmp_path / 'cache'))
+    parsed = load_data_file(str(source), cache=cache)
+    cached = load_data_file(str(source), cache=cache)
+    pd.testing.assert_frame_equal(cached, parsed)
+    assert pd.isna(cached['state'][0])
+
+def test_memory_map_text_nulls(tmp_path):
+    source = tmp_path / 'data.csv'
+    source.write_text('placeholder')
+    cache = FileCache(str(tmp_path / 'cache'))
+    data_frame = sample_frame()
+    cache.store(str(source), data_frame, complete=True)
+    store = cache.open_columns(str(source))
+    assert pd.isna(store['state'][13])
+    assert store['state'][5] == '速度'
+    np.testing.assert_array_equal(pd.isna(np.asarray(store['state'])), pd.isna(data_frame['state']))
+    np.testing.assert_array_equal(np.asarray(store['stamp']), data_frame['stamp'].to_numpy())
+
+def test_evict_includes_sidecars(tmp_path):
+    cache = FileCache(str(tmp_path / 'cache'), max_bytes=3000)
+    sidecar_dir = tmp_path / 'cache' / 'sidecar'
+    sidecar_dir.mkdir(parents=True)
+    for i in range(5):
+        path = sidecar_dir / f'{i}.stats.npz'
+        path.write_bytes(b'0' * 1000)
+        os.utime(path, (i, i))
+    cache.evict()
+    assert sorted(os.listdir(sidecar_dir)) == ['2.stats.npz', '3.stats.npz', '4.stats.npz']
+
+def test_very_long_text_cell(tmp_path):
+    # 单个超长单元格不应使解码时的定长矩阵按最长字符串分配
+    text = np.array([f'state{i % 7}' for i in range(200_000)], dtype=object)
+    text[1234] = '长' * 20_000
+    text[::97] = np.nan
+    source = tmp_path / 'long_cell.csv'
+    pd.DataFrame({'time': np.arange(200_000) * 0.01, 'state': text}).to_csv(source, index=False)
+    cache = FileCache(str(tmp_path / 'cache'))
+    expected = load_data_file(str(source))
+    load_data_file(str(source), cache=cache)
+    cached = load_data_file(str(source), cache=cache)
+    pd.testing.assert_series_equal(cached['state'], expected['state'])
+    assert cached['state'][1234] == '长' * 20_000